@@ -0,0 +1,129 @@
+"""
+Background threads for work taken off the request path.
+
+BackgroundPool runs jobs on a thread pool that is started on first use, and
+closes each job's database connection afterwards, as the threads don't go
+through the request cycle that normally would.
+
+QueueWorker drains a database-backed queue (the email outbox, the
+ActiveCampaign sync queue) on one such thread. It is woken when a
+transaction that added rows commits, at most one drain waits at a time, and
+after each drain a timer is set to wake it again when the queue's next
+retry or lease falls due, as nothing else would. backoff_delay is the
+jittered exponential delay the queues wait before trying a row again.
+"""
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# A timer is set at least this far ahead, so a row that keeps coming back due can't spin the thread
+MIN_WAKE_DELAY = timedelta(seconds=1)
+
+
+def backoff_delay(attempts, base, maximum):
+    """How long to wait before another try, after the given number of failed ones"""
+    delay = min(base * 2 ** (attempts - 1), maximum)
+    # Jitter, so rows that failed together don't all come back at once
+    return delay * random.uniform(0.5, 1)
+
+
+class BackgroundPool:
+    """A lazily started thread pool whose jobs close their database connection when they finish"""
+
+    def __init__(self, name, workers=1, workers_setting=None):
+        self.name = name
+        self.workers = workers
+        self.workers_setting = workers_setting
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._executor is None:
+                workers = getattr(settings, self.workers_setting, self.workers) if self.workers_setting else self.workers
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=self.name)
+        return self._executor.submit(self._run, fn, *args)
+
+    def _run(self, fn, *args):
+        try:
+            return fn(*args)
+        except Exception:
+            logger.exception('Background job %s failed', self.name)
+        finally:
+            # The worker thread has its own database connection
+            connection.close()
+
+
+class QueueWorker:
+    """
+    Drains a queue on a background thread, when woken and when its next row falls due.
+
+    drain runs every due row; next_due returns when the earliest pending row
+    falls due, or None. Nothing runs in the background when the setting
+    called enabled_setting is False, e.g. because a worker process runs the
+    queue's management command instead.
+    """
+
+    def __init__(self, name, drain, next_due, enabled_setting):
+        self.name = name
+        self.drain = drain
+        self.next_due = next_due
+        self.enabled_setting = enabled_setting
+        self._pool = BackgroundPool(name)
+        self._lock = threading.Lock()
+        self._wake_queued = False
+        self._timer = None
+        self._timer_due = None
+
+    def enabled(self):
+        return getattr(settings, self.enabled_setting, True)
+
+    def wake(self):
+        """Have the background thread drain the queue, unless it's about to already"""
+        if not self.enabled():
+            return
+        with self._lock:
+            if self._wake_queued:
+                return
+            self._wake_queued = True
+        self._pool.submit(self._drain)
+
+    def _drain(self):
+        with self._lock:
+            self._wake_queued = False
+        self.drain()
+        self.schedule_next_wake()
+
+    def schedule_next_wake(self):
+        """Wake the background thread when the earliest pending row falls due; returns when that is"""
+        next_due = self.next_due()
+        if next_due is None or not self.enabled():
+            return None
+        now = timezone.now()
+        with self._lock:
+            wake_at = max(next_due, now + MIN_WAKE_DELAY)
+            # One that has already fired may still be running the wake, so only a later one counts
+            if self._timer is not None and now < self._timer_due <= wake_at:
+                return self._timer_due
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer((wake_at - now).total_seconds(), self.wake)
+            self._timer.name = f'{self.name}-timer'
+            self._timer.daemon = True
+            self._timer_due = wake_at
+            self._timer.start()
+        return self._timer_due
+
+    def cancel_timer(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = self._timer_due = None
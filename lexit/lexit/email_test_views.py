@@ -1,5 +1,5 @@
 from django.http import JsonResponse
-from django.core.mail import send_mail
+from django.core.mail import get_connection, send_mail
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.conf import settings
@@ -40,6 +40,8 @@ def test_email(request):
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[to_email],
                 fail_silently=False,
+                # Straight to the mail API rather than the outbox, to test its configuration
+                connection=get_connection(settings.OUTBOUND_EMAIL_BACKEND),
             )
             
             # Debug: Check if Postmark server token is configured
@@ -0,0 +1,362 @@
+"""
+One HTTP client for the calls this project makes to other services:
+Postmark, ActiveCampaign and SendGrid.
+
+Connections are kept alive and pooled per host, so a run of calls to one
+API reuses a few TLS connections instead of opening one per call. On top of
+that the client gives every integration the same:
+
+- timeouts: INTEGRATION_HTTP_CONNECT_TIMEOUT to open a connection and
+  INTEGRATION_HTTP_TIMEOUT for each wait on the response, unless a call
+  passes its own
+- retries: up to INTEGRATION_HTTP_RETRIES, with exponential backoff and
+  jitter, or after Retry-After when the service sends one. Failed connections
+  and 429, 502, 503 and 504 answers are tried again for idempotent methods. A
+  POST is only tried again when it can't have been acted on: the connection
+  couldn't be opened, a kept-alive one had been dropped, or the answer was 429
+- a circuit breaker per host: after INTEGRATION_HTTP_BREAKER_THRESHOLD
+  failures in a row (errors and 5xx answers), calls to the host fail straight
+  away with CircuitOpenError for INTEGRATION_HTTP_BREAKER_RESET seconds, then
+  one trial call decides whether it closes again
+- metrics: http_metrics() has the calls, errors and latency of each endpoint
+  this process has called
+
+request() returns the Response whatever its status, and raises OSError or
+HTTPException when no answer could be had. CircuitOpenError is a
+ConnectionError, so callers handling connection failures handle it too.
+"""
+import json as jsonlib
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from http.client import HTTPConnection, HTTPException, HTTPSConnection, RemoteDisconnected
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 502, 503, 504}
+# Answers saying the request was turned away unprocessed, so even a POST can go again
+REFUSED_STATUSES = {429}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+RETRY_BASE_DELAY = 0.5  # seconds
+RETRY_MAX_DELAY = 30  # seconds
+# Connections idle for longer than this are closed rather than reused, as servers drop them
+POOL_IDLE_TIMEOUT = 60  # seconds
+# Latencies kept per endpoint for the percentiles
+LATENCY_SAMPLES = 200
+
+# Numeric path segments, except API versions like /api/3, are ids left out of endpoint names
+_ID_SEGMENT = re.compile(r'(?<!/api)/\d+(?=/|$)')
+# The ways a kept-alive connection the server has closed fails on the next request
+_STALE_CONNECTION_ERRORS = (RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class CircuitOpenError(ConnectionError):
+    """Calls to a host that keeps failing are refused until it has had time to recover"""
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    @property
+    def text(self):
+        return self.body.decode('utf-8', 'replace')
+
+    def json(self):
+        return jsonlib.loads(self.body) if self.body else {}
+
+
+class ConnectionPool:
+    """Idle keep-alive connections to one host, each handed to one caller at a time"""
+
+    def __init__(self, scheme, host, port, maxsize):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def get(self, connect_timeout):
+        """A connection to send on, and whether it is a reused one"""
+        with self._lock:
+            while self._idle:
+                connection, idle_since = self._idle.pop()
+                if time.monotonic() - idle_since < POOL_IDLE_TIMEOUT:
+                    return connection, True
+                connection.close()
+        connection_class = HTTPSConnection if self.scheme == 'https' else HTTPConnection
+        connection = connection_class(self.host, self.port, timeout=connect_timeout)
+        connection.connect()
+        return connection, False
+
+    def put(self, connection):
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append((connection, time.monotonic()))
+                return
+        connection.close()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+
+class CircuitBreaker:
+    """Refuses calls for reset_timeout seconds after failure_threshold failures in a row"""
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'open' if time.monotonic() - self.opened_at < self.reset_timeout else 'half-open'
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            # Half open: this call finds out whether the host has recovered
+            self._trial = True
+            return True
+
+    def record(self, success):
+        with self._lock:
+            self._trial = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failure_threshold and (self.opened_at is not None or self.failures >= self.failure_threshold):
+                if self.opened_at is None:
+                    logger.warning('Pausing calls to %s after %s failures in a row', self.name, self.failures)
+                self.opened_at = time.monotonic()
+
+
+def _milliseconds(seconds):
+    return round(seconds * 1000)
+
+
+def _percentile(ordered, fraction):
+    return _milliseconds(ordered[int(fraction * (len(ordered) - 1))]) if ordered else None
+
+
+class HttpClient:
+    def __init__(self, timeout=30, connect_timeout=10, retries=2, pool_size=4,
+                 breaker_threshold=5, breaker_reset=30):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self._pools = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _pool(self, parts):
+        scheme = parts.scheme or 'https'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = ConnectionPool(scheme, parts.hostname, port, self.pool_size)
+                self._breakers[key] = CircuitBreaker(parts.hostname, self.breaker_threshold, self.breaker_reset)
+            return self._pools[key], self._breakers[key]
+
+    def request(self, method, url, body=None, json=None, headers=None, timeout=None, connect_timeout=None,
+                retries=None, endpoint=None):
+        """
+        Make a request, trying it again as described above; returns the Response.
+
+        json is sent encoded as the body. endpoint names the call in the
+        metrics, by default the method, host and path with ids left out.
+        """
+        method = method.upper()
+        parts = urlsplit(url)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        headers = dict(headers or {})
+        if json is not None:
+            body = jsonlib.dumps(json).encode('utf-8')
+            headers.setdefault('Content-Type', 'application/json')
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
+        endpoint = endpoint or f"{method} {parts.hostname}{_ID_SEGMENT.sub('/{id}', parts.path)}"
+        timeout = self.timeout if timeout is None else timeout
+        connect_timeout = self.connect_timeout if connect_timeout is None else connect_timeout
+        retries = self.retries if retries is None else retries
+
+        pool, breaker = self._pool(parts)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self._record(endpoint, None, error='CircuitOpenError')
+                raise CircuitOpenError(f'Calls to {parts.hostname} are paused after repeated failures')
+
+            started = time.monotonic()
+            connection, reused = None, False
+            try:
+                connection, reused = pool.get(connect_timeout)
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, HTTPException) as exc:
+                if connection is not None:
+                    connection.close()
+                if reused and isinstance(exc, _STALE_CONNECTION_ERRORS):
+                    # Closed by the server while idle, and likely so were the others
+                    pool.clear()
+                    continue
+                breaker.record(False)
+                self._record(endpoint, time.monotonic() - started, error=type(exc).__name__)
+                if attempt < retries and (connection is None or method in IDEMPOTENT_METHODS):
+                    attempt += 1
+                    delay = self._retry_delay(attempt)
+                    logger.info('%s failed (%s), trying again in %.1fs', endpoint, exc, delay)
+                    time.sleep(delay)
+                    continue
+                raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                pool.put(connection)
+            breaker.record(response.status < 500)
+            self._record(endpoint, time.monotonic() - started, status=response.status)
+
+            if (response.status in RETRY_STATUSES and attempt < retries
+                    and (method in IDEMPOTENT_METHODS or response.status in REFUSED_STATUSES)):
+                attempt += 1
+                delay = self._retry_delay(attempt, response.getheader('Retry-After'))
+                logger.info('%s answered %s, trying again in %.1fs', endpoint, response.status, delay)
+                time.sleep(delay)
+                continue
+            return Response(response.status, response.headers, data)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def _retry_delay(self, attempt, retry_after=None):
+        try:
+            return min(max(float(retry_after), 0), RETRY_MAX_DELAY)
+        except (TypeError, ValueError):
+            pass
+        delay = min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY)
+        # Jitter, so callers that failed together don't all come back at once
+        return delay * random.uniform(0.5, 1)
+
+    def _record(self, endpoint, seconds, status=None, error=None):
+        with self._stats_lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = {
+                    'calls': 0, 'errors': 0, 'timed': 0, 'total_seconds': 0.0, 'max_seconds': 0.0,
+                    'outcomes': Counter(), 'latencies': deque(maxlen=LATENCY_SAMPLES),
+                }
+            stats['calls'] += 1
+            stats['outcomes'][error or status] += 1
+            if error or status >= 400:
+                stats['errors'] += 1
+            if seconds is not None:
+                stats['timed'] += 1
+                stats['total_seconds'] += seconds
+                stats['max_seconds'] = max(stats['max_seconds'], seconds)
+                stats['latencies'].append(seconds)
+
+    def metrics(self):
+        """Calls, errors, outcomes and latency in milliseconds per endpoint, and each host's circuit"""
+        endpoints = {}
+        with self._stats_lock:
+            for endpoint, stats in self._stats.items():
+                latencies = sorted(stats['latencies'])
+                endpoints[endpoint] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'outcomes': {str(outcome): count for outcome, count in stats['outcomes'].items()},
+                    'mean_ms': _milliseconds(stats['total_seconds'] / stats['timed']) if stats['timed'] else None,
+                    'p50_ms': _percentile(latencies, 0.5),
+                    'p95_ms': _percentile(latencies, 0.95),
+                    'max_ms': _milliseconds(stats['max_seconds']),
+                }
+        with self._lock:
+            circuits = {f'{scheme}://{host}:{port}': breaker.state
+                        for (scheme, host, port), breaker in self._breakers.items()}
+        return {'endpoints': endpoints, 'circuits': circuits}
+
+    def close(self):
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.clear()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The client every integration shares, configured from settings"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(
+                timeout=getattr(settings, 'INTEGRATION_HTTP_TIMEOUT', 30),
+                connect_timeout=getattr(settings, 'INTEGRATION_HTTP_CONNECT_TIMEOUT', 10),
+                retries=getattr(settings, 'INTEGRATION_HTTP_RETRIES', 2),
+                pool_size=getattr(settings, 'INTEGRATION_HTTP_POOL_SIZE', 4),
+                breaker_threshold=getattr(settings, 'INTEGRATION_HTTP_BREAKER_THRESHOLD', 5),
+                breaker_reset=getattr(settings, 'INTEGRATION_HTTP_BREAKER_RESET', 30),
+            )
+        return _client
+
+
+def reset_client():
+    """Close the shared client's connections and start again from settings, with fresh metrics"""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+def request(method, url, **kwargs):
+    return get_client().request(method, url, **kwargs)
+
+
+def http_metrics():
+    return get_client().metrics()
@@ -0,0 +1,211 @@
+"""
+Resized copies of uploaded images, for srcset.
+
+Uploads are served as they came off the phone camera, often several MB, into
+slots a few hundred pixels wide. When a model registered with
+register_image_field saves a new image, the image is queued (after the
+transaction commits) for a background thread to make WebP and JPEG copies at
+each of DERIVATIVE_WIDTHS. They are rotated upright and saved without EXIF
+data, through the same storage as the original, and their names are
+recorded in the model's <field>_derivatives JSON field against the original's
+name, so a replaced image falls back to the original until its own copies
+are ready. delete_derivatives removes an image's copies once the image itself
+is deleted.
+
+Set IMAGE_PIPELINE_BACKGROUND = False to make the copies in-line instead.
+"""
+import logging
+import mimetypes
+import os
+from dataclasses import dataclass
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .background import BackgroundPool
+from .media_urls import file_url, resolve_url
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (300, 600, 1200)
+DERIVATIVE_DIR = 'derivatives'
+# format: (Pillow format, file extension, save options)
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Sent with pk and field_name once an instance's resized images are recorded
+derivatives_ready = Signal()
+
+# (model, field name) for every registered image field
+REGISTERED_FIELDS = []
+
+_pool = BackgroundPool('image-derivatives', workers=2, workers_setting='IMAGE_PIPELINE_WORKERS')
+
+
+@dataclass(frozen=True)
+class ImageSources:
+    src: str
+    srcset: str = ''
+    webp_srcset: str = ''
+
+
+def derivatives_field(field_name):
+    return f'{field_name}_derivatives'
+
+
+def derivative_name(source_name, width, extension):
+    root, _ = os.path.splitext(source_name)
+    return f'{DERIVATIVE_DIR}/{root}-{width}w.{extension}'
+
+
+def stored_derivative_names(storage, source_name):
+    """Names the resized copies of a stored image would have been saved under"""
+    widths = list(DERIVATIVE_WIDTHS)
+    smallest = derivative_name(source_name, widths[0], DERIVATIVE_FORMATS['jpeg'][1])
+    if (mimetypes.guess_type(source_name)[0] or '').startswith('image/') and not storage.exists(smallest):
+        # An image narrower than every width has its copies at its own width
+        try:
+            with storage.open(source_name, 'rb') as file, Image.open(file) as image:
+                widths.append(ImageOps.exif_transpose(image).width)
+        except Exception:
+            logger.warning('Could not read the size of %s to find its resized images', source_name)
+    return [derivative_name(source_name, width, extension)
+            for width in widths for _, extension, _ in DERIVATIVE_FORMATS.values()]
+
+
+def delete_derivatives(storage, source_name):
+    """Delete the resized copies of a stored image, e.g. when the image is deleted"""
+    for name in stored_derivative_names(storage, source_name):
+        storage.delete(name)
+
+
+def render_derivatives(file):
+    """(width, format, bytes) for each resized copy of an image file"""
+    with Image.open(file) as original:
+        # Apply the EXIF orientation; the copies are saved without any EXIF
+        image = ImageOps.exif_transpose(original)
+        widths = [width for width in DERIVATIVE_WIDTHS if width < image.width] or [image.width]
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+        for width in widths:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            for fmt, (pillow_format, _, options) in DERIVATIVE_FORMATS.items():
+                if fmt == 'webp' and has_alpha:
+                    output = resized.convert('RGBA')
+                else:
+                    output = resized.convert('RGB')
+                buffer = BytesIO()
+                output.save(buffer, pillow_format, **options)
+                yield width, fmt, buffer.getvalue()
+
+
+def generate_derivatives(model, pk, field_name):
+    """Make and record the resized copies of one instance's image, returning whether it had one"""
+    instance = model._default_manager.filter(pk=pk).first()
+    file = getattr(instance, field_name, None) if instance else None
+    if not file:
+        return False
+
+    source = file.name
+    # Copies are named after their source, so on content-addressed storage they go to the storage underneath
+    storage = getattr(file.storage, 'wrapped', file.storage)
+    field = derivatives_field(field_name)
+    previous = getattr(instance, field) or {}
+    others = model._default_manager.exclude(pk=pk)
+
+    shared = others.filter(**{f'{field}__source': source}).values_list(field, flat=True).first()
+    if shared:
+        # Another row has the same file (a deduplicated upload), so its copies are used
+        derivatives = {fmt: shared.get(fmt, []) for fmt in DERIVATIVE_FORMATS}
+    else:
+        derivatives = {fmt: [] for fmt in DERIVATIVE_FORMATS}
+        with file.open('rb'):
+            for width, fmt, data in render_derivatives(file):
+                extension = DERIVATIVE_FORMATS[fmt][1]
+                name = storage.save(derivative_name(source, width, extension), ContentFile(data))
+                derivatives[fmt].append([width, name])
+
+    updates = {field: {'source': source, **derivatives}}
+    if any(f.name == 'updated_at' for f in model._meta.concrete_fields):
+        # Cached fragments are keyed on updated_at, and update() doesn't touch auto_now
+        updates['updated_at'] = timezone.now()
+    # Only record them if the image wasn't replaced while they were being made
+    if model._default_manager.filter(pk=pk, **{field_name: source}).update(**updates):
+        derivatives_ready.send(sender=model, pk=pk, field_name=field_name)
+        stale, kept = previous, derivatives
+    else:
+        stale, kept = ({} if shared else updates[field]), {}
+
+    # Copies another row still shows are kept too
+    if stale.get('source') and others.filter(**{f'{field}__source': stale['source']}).exists():
+        stale = {}
+    kept_names = {name for fmt in DERIVATIVE_FORMATS for _, name in kept.get(fmt, [])}
+    for fmt in DERIVATIVE_FORMATS:
+        for _, name in stale.get(fmt, []):
+            if name not in kept_names:
+                storage.delete(name)
+    return True
+
+
+def _run_job(model, pk, field_name):
+    try:
+        generate_derivatives(model, pk, field_name)
+    except Exception:
+        logger.exception('Failed to make resized images for %s %s', model._meta.label, pk)
+
+
+def queue_derivatives(model, pk, field_name):
+    """Make an instance's resized images on a background thread, or now if the pipeline is synchronous"""
+    if not getattr(settings, 'IMAGE_PIPELINE_BACKGROUND', True):
+        generate_derivatives(model, pk, field_name)
+        return
+    _pool.submit(_run_job, model, pk, field_name)
+
+
+def image_sources(instance, field_name):
+    """URLs of an instance's image and its resized copies, None if it has no image"""
+    file = getattr(instance, field_name)
+    if not file:
+        return None
+    original_url = file_url(instance, field_name)
+    derivatives = getattr(instance, derivatives_field(field_name)) or {}
+    if derivatives.get('source') != file.name:
+        return ImageSources(src=original_url)
+
+    url = partial(resolve_url, file.storage)
+    jpeg = derivatives.get('jpeg', [])
+    return ImageSources(
+        src=url(jpeg[-1][1]) if jpeg else original_url,
+        srcset=', '.join(f'{url(name)} {width}w' for width, name in jpeg),
+        webp_srcset=', '.join(f'{url(name)} {width}w' for width, name in derivatives.get('webp', [])),
+    )
+
+
+def _queue_on_upload(sender, instance, raw=False, field_name=None, **kwargs):
+    file = getattr(instance, field_name)
+    if raw or not file:
+        return
+    if (getattr(instance, derivatives_field(field_name)) or {}).get('source') != file.name:
+        transaction.on_commit(partial(queue_derivatives, sender, instance.pk, field_name))
+
+
+def register_image_field(model, field_name):
+    """Make resized copies of model.field_name whenever a new image is saved"""
+    if (model, field_name) not in REGISTERED_FIELDS:
+        REGISTERED_FIELDS.append((model, field_name))
+    post_save.connect(
+        partial(_queue_on_upload, field_name=field_name),
+        sender=model,
+        weak=False,
+        dispatch_uid=f'image_derivatives:{model._meta.label_lower}:{field_name}',
+    )
@@ -0,0 +1,98 @@
+"""
+Memoized URLs for uploaded files.
+
+Building a file's URL means a call into the storage backend (Cloudinary URL
+building in production), and the image getters on the models are called
+many times per dashboard render. A URL is remembered on the model instance
+for as long as the file name doesn't change, and shared between requests
+and workers through the cache, keyed by the file name and the storage
+backend's version. The static fallback images' URLs are worked out once.
+
+media_url_stats() reports how often each layer answers; the media debug
+endpoint shows it.
+"""
+import hashlib
+import threading
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+MEDIA_URL_CACHE_PREFIX = 'lexit:media-url:'
+MEDIA_URL_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def media_url_stats():
+    """Hits and misses per layer since the process started"""
+    with _stats_lock:
+        stats = dict.fromkeys(('instance_hits', 'shared_hits', 'misses', 'errors'), 0)
+        stats.update(_stats)
+    lookups = stats['instance_hits'] + stats['shared_hits'] + stats['misses']
+    stats['hit_rate'] = round((stats['instance_hits'] + stats['shared_hits']) / lookups, 3) if lookups else None
+    return stats
+
+
+def reset_media_url_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+@lru_cache(maxsize=None)
+def static_image_url(name):
+    """URL of one of the static fallback images"""
+    return f"{settings.STATIC_URL}images/{name}"
+
+
+def storage_version(storage):
+    """Changes when URLs built by the storage would, so the cached ones are no longer used"""
+    backend = f'{type(storage).__module__}.{type(storage).__qualname__}'
+    return f"{backend}:{getattr(storage, 'base_url', '')}:{getattr(settings, 'MEDIA_URL_VERSION', 1)}"
+
+
+def media_url_cache_key(storage, name):
+    digest = hashlib.sha256(f'{storage_version(storage)}\x1f{name}'.encode()).hexdigest()[:40]
+    return f'{MEDIA_URL_CACHE_PREFIX}{digest}'
+
+
+def resolve_url(storage, name):
+    """A stored file's URL from the shared cache, built by the storage on a miss"""
+    key = media_url_cache_key(storage, name)
+    url = cache.get(key)
+    if url is not None:
+        _count('shared_hits')
+        return url
+    _count('misses')
+    url = storage.url(name)
+    cache.set(key, url, MEDIA_URL_CACHE_TIMEOUT)
+    return url
+
+
+def file_url(instance, field_name, fallback=None):
+    """URL of a model instance's file, or fallback if it has none or the URL can't be built"""
+    file = getattr(instance, field_name)
+    if not file or not file.name:
+        return fallback
+
+    memo = instance.__dict__.setdefault('_media_urls', {})
+    name, url = memo.get(field_name, (None, None))
+    if name == file.name:
+        _count('instance_hits')
+        return url
+
+    try:
+        url = resolve_url(file.storage, file.name)
+    except Exception:
+        # Not remembered, so a storage problem that clears up is picked up on the next call
+        _count('errors')
+        return fallback
+    memo[field_name] = (file.name, url)
+    return url
@@ -1,18 +1,149 @@
 """
 Media file serving views for production deployment.
+
+Files are streamed rather than read into memory, byte ranges are supported
+(single ranges for media seeking and resumed downloads, multiple ranges as
+multipart/byteranges), and the ETag is built from the file's size, mtime and
+inode so every worker process gives the same one. When the web server in
+front can send files itself, the response is handed off to it with
+X-Accel-Redirect (nginx) or X-Sendfile (Apache, lighttpd) instead.
 """
 import os
 import mimetypes
-from django.http import HttpResponse, Http404, HttpResponseNotModified
+import re
+import uuid
+from django.http import FileResponse, HttpResponse, Http404, StreamingHttpResponse
 from django.conf import settings
+from django.utils.cache import get_conditional_response
 from django.views.decorators.cache import cache_control
-from django.views.decorators.http import require_GET
-from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.utils.http import http_date, parse_http_date_safe
 from django.views.decorators.vary import vary_on_headers
-import stat
 
+CHUNK_SIZE = 64 * 1024
+# More ranges than this in one request are answered with the whole file
+MAX_RANGES = 16
+
+RANGE_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+def file_etag(file_stat):
+    """Strong ETag from size, mtime and inode, the same in every worker process"""
+    return f'"{file_stat.st_size:x}-{file_stat.st_mtime_ns:x}-{file_stat.st_ino:x}"'
+
+
+def parse_range_header(header, size):
+    """
+    The (start, end) byte ranges a Range header asks for, end inclusive.
+
+    Returns None when the header should be ignored and the whole file sent,
+    and an empty list when none of the ranges can be satisfied.
+    """
+    units, _, range_set = header.partition('=')
+    if units.strip().lower() != 'bytes' or not range_set:
+        return None
+
+    ranges = []
+    for spec in range_set.split(','):
+        match = RANGE_RE.match(spec)
+        if not match or match.groups() == ('', ''):
+            return None
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if last and int(last) < start:
+                return None
+        else:
+            # A suffix range: the last n bytes
+            start, end = max(0, size - int(last)), size - 1
+            if int(last) == 0:
+                continue
+        if start < size:
+            ranges.append((start, end))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    # Merge overlapping and adjacent ranges
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _if_range_matches(request, etag, mtime):
+    """Whether a Range request still applies, given its If-Range validator"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == mtime
+
+
+def _read_ranges(file_path, parts):
+    """Stream the given (prefix, start, end) parts of a file, each preceded by its prefix bytes"""
+    with open(file_path, 'rb') as file:
+        for prefix, start, end in parts:
+            if prefix:
+                yield prefix
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+
+def _range_response(file_path, ranges, size, content_type):
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(_read_ranges(file_path, [(b'', start, end)]),
+                                         status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+        return response
+
+    boundary = uuid.uuid4().hex
+    parts = []
+    length = 0
+    for start, end in ranges:
+        prefix = (f'\r\n--{boundary}\r\nContent-Type: {content_type}\r\n'
+                  f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n').encode()
+        parts.append((prefix, start, end))
+        length += len(prefix) + end - start + 1
+    closing = f'\r\n--{boundary}--\r\n'.encode()
+
+    def body():
+        yield from _read_ranges(file_path, parts)
+        yield closing
 
-@require_GET
+    response = StreamingHttpResponse(body(), status=206,
+                                     content_type=f'multipart/byteranges; boundary={boundary}')
+    response['Content-Length'] = length + len(closing)
+    return response
+
+
+def _sendfile_response(path, file_path, content_type):
+    """Empty response telling the web server to send the file, or None if it isn't configured to"""
+    backend = getattr(settings, 'MEDIA_SENDFILE_BACKEND', '')
+    if not backend:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if backend == 'nginx':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + path
+    else:
+        response['X-Sendfile'] = file_path
+    return response
+
+
+@require_safe
 @cache_control(max_age=86400)  # Cache for 1 day
 @vary_on_headers('Accept-Encoding')
 def serve_media(request, path):
@@ -23,64 +154,67 @@ def serve_media(request, path):
     # Security check: ensure path doesn't contain dangerous characters
     if '..' in path or path.startswith('/') or '\\' in path:
         raise Http404("Invalid path")
-    
+
     # Build the full file path
     file_path = os.path.join(settings.MEDIA_ROOT, path)
-    
+
     # Normalize the path to prevent path traversal attacks
     file_path = os.path.normpath(file_path)
-    
-    # Check if file exists and is within media root
+
+    # Check the file is within media root
     try:
-        if not os.path.exists(file_path) or not os.path.commonpath([settings.MEDIA_ROOT, file_path]) == settings.MEDIA_ROOT:
+        if os.path.commonpath([settings.MEDIA_ROOT, file_path]) != settings.MEDIA_ROOT:
             raise Http404("File not found")
     except ValueError:
         # os.path.commonpath raises ValueError if paths are on different drives
         raise Http404("File not found")
-    
-    # Check if it's actually a file (not a directory)
-    if not os.path.isfile(file_path):
-        raise Http404("File not found")
-    
-    # Get file stats for caching headers
+
+    # Get file stats for caching headers, which also checks it exists and is a file
     try:
         file_stat = os.stat(file_path)
     except OSError:
         raise Http404("File not found")
-    
+    if not os.path.isfile(file_path):
+        raise Http404("File not found")
+
     # Get the MIME type
     content_type, encoding = mimetypes.guess_type(file_path)
     if content_type is None:
         content_type = 'application/octet-stream'
-    
-    # Handle conditional requests (ETags, Last-Modified)
-    mtime = file_stat[stat.ST_MTIME]
-    size = file_stat[stat.ST_SIZE]
-    
-    # Create ETag based on file path, size, and modification time
-    etag = f'"{hash(f"{path}-{size}-{mtime}")}"'
-    
-    # Check if client has cached version
-    if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
-    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
-    
-    if if_none_match == etag or (if_modified_since and 
-                                http_date(mtime) == if_modified_since):
-        return HttpResponseNotModified()
-    
-    # Read and serve the file
-    try:
-        with open(file_path, 'rb') as file:
-            response = HttpResponse(file.read(), content_type=content_type)
-            
-            # Set caching headers
-            response['Last-Modified'] = http_date(mtime)
-            response['ETag'] = etag
-            response['Content-Length'] = size
-            
-            if encoding:
-                response['Content-Encoding'] = encoding
-                
+
+    mtime = int(file_stat.st_mtime)
+    size = file_stat.st_size
+    etag = file_etag(file_stat)
+
+    # Handle conditional requests (If-None-Match, If-Modified-Since and friends)
+    response = get_conditional_response(request, etag=etag, last_modified=mtime)
+    if response is not None:
+        return response
+
+    response = _sendfile_response(path, file_path, content_type)
+    if response is None:
+        ranges = None
+        range_header = request.META.get('HTTP_RANGE')
+        if range_header and _if_range_matches(request, etag, mtime):
+            ranges = parse_range_header(range_header, size)
+
+        if ranges == []:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
             return response
-    except IOError:
-        raise Http404("File not found")
\ No newline at end of file
+        elif ranges:
+            response = _range_response(file_path, ranges, size, content_type)
+        else:
+            try:
+                response = FileResponse(open(file_path, 'rb'), content_type=content_type)
+            except OSError:
+                raise Http404("File not found")
+
+    # Set caching headers
+    response['Last-Modified'] = http_date(mtime)
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response['Content-Encoding'] = encoding
+
+    return response
@@ -0,0 +1,220 @@
+"""
+Full-page cache for anonymous visitors.
+
+Pages are cached by path only. The ?ref= referral code is stored in the
+session by ReferralCodeMiddleware and added back to the register links
+after the cached body is fetched, so one cached copy serves every visitor.
+
+Saving or deleting a model registered with invalidate_on_change bumps a
+generation number, which marks every cached page stale. A stale page keeps
+being served while a single request re-renders it (stale-while-revalidate).
+
+Feeds and sitemaps use cached_document instead: the same for every visitor,
+they are rebuilt as soon as the generation changes and served with a strong
+ETag, gzipped when the client accepts it. Their absolute URLs are built for
+SITE_BASE_URL, whatever Host header the request that rendered them had.
+"""
+import copy
+import hashlib
+import logging
+import re
+import time
+from functools import wraps
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse, QueryDict
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.text import compress_string
+
+logger = logging.getLogger(__name__)
+
+PAGE_CACHE_PREFIX = 'lexit:page:'
+GENERATION_KEY = f'{PAGE_CACHE_PREFIX}generation'
+
+PAGE_CACHE_FRESH_SECONDS = 60 * 5  # serve without revalidating for 5 minutes
+PAGE_CACHE_STALE_SECONDS = 60 * 60 * 24  # keep stale copies for up to a day
+REVALIDATE_LOCK_SECONDS = 30
+
+DOCUMENT_CACHE_PREFIX = 'lexit:document:'
+# The only query parameters a cached document varies on: sitemap pages
+DOCUMENT_QUERY_PARAMS = ('p',)
+DOCUMENT_CACHE_SECONDS = 60 * 60 * 24 * 7  # kept until the generation changes, at most a week
+DOCUMENT_MAX_AGE = 60 * 15  # how long clients and proxies may reuse a copy
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+def _page_key(request):
+    return f'{PAGE_CACHE_PREFIX}{request.path}'
+
+
+def _is_fresh(entry, generation):
+    return (entry['generation'] == generation
+            and time.time() - entry['created_at'] < PAGE_CACHE_FRESH_SECONDS)
+
+
+def _with_referral(content, referral_code):
+    """Add the visitor's referral code back onto the register links"""
+    register_url = reverse('users:register')
+    return content.replace(
+        f'href="{register_url}"'.encode(),
+        f'href="{register_url}?ref={quote(referral_code)}"'.encode(),
+    )
+
+
+def _render_for_cache(view_func, request, args, kwargs, key, generation):
+    """
+    Render the view and cache its body.
+
+    Returns (response, entry); entry is None when the response can't be cached.
+    """
+    # Render without the query string so nothing visitor specific is cached
+    cache_request = copy.copy(request)
+    cache_request.GET = QueryDict()
+    response = view_func(cache_request, *args, **kwargs)
+    if response.status_code != 200 or response.streaming:
+        return response, None
+
+    if hasattr(response, 'render'):
+        response.render()
+    entry = {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'generation': generation,
+        'created_at': time.time(),
+    }
+    cache.set(key, entry, PAGE_CACHE_STALE_SECONDS)
+    return response, entry
+
+
+def anonymous_page_cache(view_func):
+    """Serve a view from the page cache for anonymous GET/HEAD requests"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+
+        key = _page_key(request)
+        cached = cache.get_many([key, GENERATION_KEY])
+        entry = cached.get(key)
+        generation = cached.get(GENERATION_KEY, 0)
+
+        if entry is None:
+            response, entry = _render_for_cache(view_func, request, args, kwargs, key, generation)
+            if entry is None:
+                return response
+        elif not _is_fresh(entry, generation) and cache.add(f'{key}:lock', 1, REVALIDATE_LOCK_SECONDS):
+            # Only the request that wins the lock re-renders, everyone else gets the stale copy
+            try:
+                _, fresh_entry = _render_for_cache(view_func, request, args, kwargs, key, generation)
+                entry = fresh_entry or entry
+            except Exception:
+                logger.exception('Failed to revalidate cached page %s', request.path)
+            finally:
+                cache.delete(f'{key}:lock')
+
+        content = entry['content']
+        referral_code = (request.GET.get('ref') or '').strip().upper()
+        if referral_code:
+            content = _with_referral(content, referral_code)
+        return HttpResponse(content, content_type=entry['content_type'])
+
+    return wrapper
+
+
+def _document_entry(response, generation):
+    content = response.content
+    digest = hashlib.sha256(content).hexdigest()[:32]
+    return {
+        'content': content,
+        'gzip': compress_string(content),
+        'etag': f'"{digest}"',
+        'content_type': response['Content-Type'],
+        'headers': {name: response[name] for name in ('X-Robots-Tag',) if response.has_header(name)},
+        'generation': generation,
+    }
+
+
+def _canonical_request(request, query):
+    """A copy of request for SITE_BASE_URL, with only the given query string"""
+    base = urlsplit(settings.SITE_BASE_URL)
+    canonical = copy.copy(request)
+    canonical.GET = query
+    canonical.META = {**request.META, 'HTTP_HOST': base.netloc, 'wsgi.url_scheme': base.scheme,
+                      'QUERY_STRING': query.urlencode()}
+    canonical.META.pop('HTTP_X_FORWARDED_HOST', None)
+    canonical.__dict__.pop('_current_scheme_host', None)
+    if settings.SECURE_PROXY_SSL_HEADER:
+        header, secure_value = settings.SECURE_PROXY_SSL_HEADER
+        canonical.META[header] = secure_value if base.scheme == 'https' else base.scheme
+    if hasattr(request, 'environ'):
+        canonical.environ = canonical.META
+    return canonical
+
+
+def cached_document(view_func):
+    """
+    Cache a view's output that is the same for everyone, such as a feed or sitemap.
+
+    Query parameters other than DOCUMENT_QUERY_PARAMS are ignored, so bots
+    can't fill the cache with variants.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        query = QueryDict(mutable=True)
+        for name in DOCUMENT_QUERY_PARAMS:
+            if name in request.GET:
+                query.setlist(name, request.GET.getlist(name))
+        query._mutable = False
+        key = f'{DOCUMENT_CACHE_PREFIX}{request.path}?{query.urlencode()}'
+        cached = cache.get_many([key, GENERATION_KEY])
+        entry = cached.get(key)
+        generation = cached.get(GENERATION_KEY, 0)
+
+        if entry is None or entry['generation'] != generation:
+            response = view_func(_canonical_request(request, query), *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+            if hasattr(response, 'render'):
+                response.render()
+            entry = _document_entry(response, generation)
+            cache.set(key, entry, DOCUMENT_CACHE_SECONDS)
+
+        # Each encoding is a different representation, so it gets its own strong ETag
+        if ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            content, etag = entry['gzip'], entry['etag'][:-1] + '-gzip"'
+        else:
+            content, etag = entry['content'], entry['etag']
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=entry['content_type'])
+            if content is entry['gzip']:
+                response['Content-Encoding'] = 'gzip'
+            for name, value in entry['headers'].items():
+                response[name] = value
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+        patch_cache_control(response, public=True, max_age=DOCUMENT_MAX_AGE)
+        return response
+
+    return wrapper
+
+
+def invalidate_page_cache(**kwargs):
+    """Mark every cached page stale"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def invalidate_on_change(model):
+    """Invalidate the page cache whenever an instance of model is saved or deleted"""
+    uid = f'page_cache:{model._meta.label_lower}'
+    post_save.connect(invalidate_page_cache, sender=model, dispatch_uid=f'{uid}:save')
+    post_delete.connect(invalidate_page_cache, sender=model, dispatch_uid=f'{uid}:delete')
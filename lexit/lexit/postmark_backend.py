@@ -1,23 +1,45 @@
+"""
+Django email backend that sends through Postmark's HTTP API.
+
+Messages go to the batch endpoint, up to 500 per call, through the shared
+integration HTTP client (lexit.http_client), so batches reuse its keep-alive
+connections to Postmark. Postmark answers a batch with a result per message,
+so one bad address only fails that message; each message gets its result as
+a postmark_result attribute.
+"""
 import base64
 import json
 import logging
-from urllib import request, error
+from http.client import HTTPException
 
 from django.conf import settings
 from django.core.mail.backends.base import BaseEmailBackend
 
+from . import http_client
+
 
 logger = logging.getLogger(__name__)
 
+# Postmark's limits for one batch call
+MAX_BATCH_MESSAGES = 500
+MAX_BATCH_BYTES = 50 * 1024 * 1024
+# ErrorCode recorded when Postmark couldn't be reached at all; Postmark's own codes are never negative
+CONNECTION_ERROR_CODE = -1
+
 
 class PostmarkBackend(BaseEmailBackend):
     """Django email backend that sends through Postmark's HTTP API."""
 
-    api_url = "https://api.postmarkapp.com/email"
+    api_host = "api.postmarkapp.com"
+    batch_path = "/email/batch"
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    def __init__(self, fail_silently=False, timeout=None, connect_timeout=None, **kwargs):
+        super().__init__(fail_silently=fail_silently, **kwargs)
         self.server_token = getattr(settings, "POSTMARK_SERVER_TOKEN", "")
+        # Seconds to wait for each read of a response, and to open the connection
+        self.timeout = getattr(settings, "EMAIL_TIMEOUT", 30) if timeout is None else timeout
+        self.connect_timeout = (getattr(settings, "POSTMARK_CONNECT_TIMEOUT", 10)
+                                if connect_timeout is None else connect_timeout)
 
     def send_messages(self, email_messages):
         if not email_messages:
@@ -27,42 +49,73 @@ class PostmarkBackend(BaseEmailBackend):
             logger.error("Postmark server token is not configured")
             return 0
 
-        sent_count = 0
-        for message in email_messages:
-            if self._send_message(message):
-                sent_count += 1
-        return sent_count
-
-    def _send_message(self, email_message):
-        payload = self._build_payload(email_message)
+        return sum(self._send_batch(batch) for batch in self._batches(email_messages))
 
-        req = request.Request(
-            self.api_url,
-            data=json.dumps(payload).encode("utf-8"),
+    def _batches(self, email_messages):
+        """(message, encoded payload) lists within Postmark's per-call limits"""
+        batch, size = [], 0
+        for message in email_messages:
+            payload = json.dumps(self._build_payload(message)).encode("utf-8")
+            if batch and (len(batch) >= MAX_BATCH_MESSAGES or size + len(payload) + 2 > MAX_BATCH_BYTES):
+                yield batch
+                batch, size = [], 0
+            batch.append((message, payload))
+            size += len(payload) + 1
+        if batch:
+            yield batch
+
+    def _post(self, body):
+        """POST a batch; the client only sends it again if it can't have reached Postmark"""
+        response = http_client.request(
+            "POST",
+            f"https://{self.api_host}{self.batch_path}",
+            body=body,
             headers={
                 "Accept": "application/json",
                 "Content-Type": "application/json",
                 "X-Postmark-Server-Token": self.server_token,
             },
-            method="POST",
+            timeout=self.timeout,
+            connect_timeout=self.connect_timeout,
         )
+        return response.status, response.text
 
+    def _send_batch(self, batch):
+        body = b"[" + b",".join(payload for _, payload in batch) + b"]"
         try:
-            with request.urlopen(req, timeout=getattr(settings, "EMAIL_TIMEOUT", 30)) as response:
-                response_body = response.read().decode("utf-8") if response else ""
-                if 200 <= response.status < 300:
-                    logger.info("Email sent successfully via Postmark to %s", payload.get("To"))
-                    return True
-
-                logger.error("Postmark API error: status=%s body=%s", response.status, response_body)
-                return False
-        except error.HTTPError as exc:
-            body = exc.read().decode("utf-8") if hasattr(exc, "read") else ""
-            logger.error("Postmark HTTP error: status=%s body=%s", exc.code, body)
-            return False
-        except Exception as exc:
-            logger.error("Failed to send email via Postmark: %s", str(exc))
-            return False
+            status, response_body = self._post(body)
+        except (OSError, HTTPException) as exc:
+            logger.error("Failed to send %s emails via Postmark: %s", len(batch), str(exc))
+            self._record_failure(batch, CONNECTION_ERROR_CODE, str(exc))
+            return 0
+
+        if not 200 <= status < 300:
+            logger.error("Postmark API error: status=%s body=%s", status, response_body)
+            self._record_failure(batch, status, response_body)
+            return 0
+
+        try:
+            results = json.loads(response_body)
+        except ValueError:
+            logger.error("Postmark returned an unreadable batch response: %s", response_body[:500])
+            self._record_failure(batch, status, response_body)
+            return 0
+
+        sent_count = 0
+        for (message, _), result in zip(batch, results):
+            message.postmark_result = result
+            if result.get("ErrorCode", 0) == 0:
+                sent_count += 1
+            else:
+                logger.error("Postmark rejected email to %s: %s (%s)",
+                             result.get("To", ",".join(message.to or [])), result.get("Message"),
+                             result.get("ErrorCode"))
+        logger.info("Sent %s of %s emails via Postmark", sent_count, len(batch))
+        return sent_count
+
+    def _record_failure(self, batch, status, detail):
+        for message, _ in batch:
+            message.postmark_result = {"ErrorCode": status, "Message": detail}
 
     def _build_payload(self, email_message):
         text_body = email_message.body or ""
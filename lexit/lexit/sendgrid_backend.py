@@ -4,12 +4,13 @@ This custom backend uses SendGrid's API instead of SMTP, which works better with
 """
 
 from django.core.mail.backends.base import BaseEmailBackend
-from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, ClickTracking, OpenTracking, TrackingSettings, Attachment, FileContent, FileName, FileType, Disposition
 from django.conf import settings
 import logging
 import base64
 
+from . import http_client
+
 logger = logging.getLogger(__name__)
 
 class SendGridBackend(BaseEmailBackend):
@@ -20,17 +21,13 @@ class SendGridBackend(BaseEmailBackend):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.api_key = getattr(settings, 'SENDGRID_API_KEY', None)
-        self.client = None
-        
-        if self.api_key:
-            self.client = SendGridAPIClient(api_key=self.api_key)
     
     def send_messages(self, email_messages):
         """
         Send one or more EmailMessage objects and return the number of email
         messages sent.
         """
-        if not self.client:
+        if not self.api_key:
             logger.error("SendGrid API key not configured")
             return 0
             
@@ -101,19 +98,24 @@ class SendGridBackend(BaseEmailBackend):
             
             print(f"DEBUG: Mail object created successfully with click tracking disabled")
             
-            # Send the email
-            response = self.client.send(mail)
-            print(f"DEBUG: SendGrid response status: {response.status_code}")
-            print(f"DEBUG: SendGrid response body: {response.body}")
+            # Send the email through the shared integration client
+            response = http_client.request(
+                'POST',
+                'https://api.sendgrid.com/v3/mail/send',
+                json=mail.get(),
+                headers={'Authorization': f'Bearer {self.api_key}'},
+            )
+            print(f"DEBUG: SendGrid response status: {response.status}")
+            print(f"DEBUG: SendGrid response body: {response.text}")
             
             # Check if successful (status code 202 indicates accepted)
-            if response.status_code == 202:
+            if response.status == 202:
                 logger.info(f"Email sent successfully to {email_message.to}")
                 print(f"DEBUG: Email sent successfully!")
                 return True
             else:
-                logger.error(f"SendGrid API error: {response.status_code}, Response: {response.body}")
-                print(f"DEBUG: SendGrid error - Status: {response.status_code}, Body: {response.body}")
+                logger.error(f"SendGrid API error: {response.status}, Response: {response.text}")
+                print(f"DEBUG: SendGrid error - Status: {response.status}, Body: {response.text}")
                 return False
                 
         except Exception as e:
@@ -2,7 +2,8 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 import json
-from urllib import request as urllib_request, error as urllib_error
+
+from . import http_client
 
 # Direct Postmark test without Django's send_mail
 @csrf_exempt
@@ -32,36 +33,24 @@ def direct_postmark_test(request):
             'MessageStream': 'outbound',
         }
 
-        req = urllib_request.Request(
+        response = http_client.request(
+            'POST',
             'https://api.postmarkapp.com/email',
-            data=json.dumps(payload).encode('utf-8'),
+            json=payload,
             headers={
                 'Accept': 'application/json',
-                'Content-Type': 'application/json',
                 'X-Postmark-Server-Token': server_token,
             },
-            method='POST',
+            timeout=getattr(settings, 'EMAIL_TIMEOUT', 30),
         )
-
-        with urllib_request.urlopen(req, timeout=getattr(settings, 'EMAIL_TIMEOUT', 30)) as response:
-            response_body = response.read().decode('utf-8') if response else ''
-            return JsonResponse({
-                'success': 200 <= response.status < 300,
-                'status_code': response.status,
-                'message': 'Direct Postmark test completed',
-                'from_email': from_email,
-                'to_email': to_email,
-                'postmark_server_token': 'Configured',
-                'response_body': response_body,
-            })
-    except urllib_error.HTTPError as http_error:
-        body = http_error.read().decode('utf-8') if hasattr(http_error, 'read') else ''
         return JsonResponse({
-            'success': False,
-            'error': str(http_error),
-            'error_type': type(http_error).__name__,
-            'status_code': http_error.code,
-            'response_body': body,
+            'success': response.ok,
+            'status_code': response.status,
+            'message': 'Direct Postmark test completed',
+            'from_email': from_email,
+            'to_email': to_email,
+            'postmark_server_token': 'Configured',
+            'response_body': response.text,
         })
         
     except Exception as e:
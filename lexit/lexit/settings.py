@@ -105,6 +105,8 @@ env = Env()
 Env.read_env(os.path.join(os.path.dirname(__file__), '.env'))
 ENVIRONMENT = env('ENVIRONMENT', default='production')
 REFERRAL_BASE_URL = env('REFERRAL_BASE_URL', default='https://www.lexit.tech')
+# Scheme and host of the absolute URLs in cached feeds and sitemaps (lexit.page_cache)
+SITE_BASE_URL = env('SITE_BASE_URL', default=REFERRAL_BASE_URL)
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -177,6 +179,7 @@ INSTALLED_APPS = [
     'cloudinary_storage',
     'cloudinary',
     'django.contrib.humanize',
+    'django.contrib.sitemaps',
     'django_ckeditor_5',
     'honeypot',
     'news',
@@ -282,6 +285,23 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Let the web server send media files served by lexit.media_views: 'nginx' (X-Accel-Redirect),
+# 'apache' or 'lighttpd' (X-Sendfile), or blank to stream them from Django
+MEDIA_SENDFILE_BACKEND = env('MEDIA_SENDFILE_BACKEND', default='')
+# nginx internal location that maps onto MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = env('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+
+# Resized copies of uploaded images are made on background threads (lexit.image_derivatives)
+IMAGE_PIPELINE_BACKGROUND = env.bool('IMAGE_PIPELINE_BACKGROUND', default=True)
+IMAGE_PIPELINE_WORKERS = env.int('IMAGE_PIPELINE_WORKERS', default=2)
+
+# Text is pulled out of property documents for search on background threads (user_home.utils.document_search)
+DOCUMENT_EXTRACTION_BACKGROUND = env.bool('DOCUMENT_EXTRACTION_BACKGROUND', default=True)
+DOCUMENT_EXTRACTION_WORKERS = env.int('DOCUMENT_EXTRACTION_WORKERS', default=1)
+# Local directory for the parts of chunked document uploads (user_home.utils.uploads). Keep it outside
+# MEDIA_ROOT, which is served publicly
+DOCUMENT_UPLOAD_STAGING_ROOT = env('DOCUMENT_UPLOAD_STAGING_ROOT', default=os.path.join(BASE_DIR, 'upload_staging'))
+
 # Cloudinary Configuration for Production Media Storage
 import os
 CLOUDINARY_STORAGE = {
@@ -296,6 +316,10 @@ if ENVIRONMENT == 'production' and CLOUDINARY_STORAGE['CLOUD_NAME']:
         "default": {
             "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
         },
+        # Content-addressed images and documents, saved under exactly their hash (user_home.storage)
+        "blobs": {
+            "BACKEND": "user_home.cloudinary_blobs.ExactNameCloudinaryStorage",
+        },
         "staticfiles": {
             "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
         },
@@ -332,14 +356,30 @@ USERNAME_BLACKLIST = [
     'proptechpioneer', 'proptech', 'propertytech', 'realestate', 'real.estate', 'jaime.moreno', 'jaime.moreano'
 ]
 
+# Outbound HTTP calls to Postmark, ActiveCampaign and SendGrid (lexit.http_client)
+INTEGRATION_HTTP_CONNECT_TIMEOUT = env.float('INTEGRATION_HTTP_CONNECT_TIMEOUT', default=10)
+INTEGRATION_HTTP_TIMEOUT = env.float('INTEGRATION_HTTP_TIMEOUT', default=30)
+INTEGRATION_HTTP_RETRIES = env.int('INTEGRATION_HTTP_RETRIES', default=2)
+# Idle keep-alive connections kept per host
+INTEGRATION_HTTP_POOL_SIZE = env.int('INTEGRATION_HTTP_POOL_SIZE', default=4)
+# Failures in a row that pause calls to a host, and for how many seconds
+INTEGRATION_HTTP_BREAKER_THRESHOLD = env.int('INTEGRATION_HTTP_BREAKER_THRESHOLD', default=5)
+INTEGRATION_HTTP_BREAKER_RESET = env.float('INTEGRATION_HTTP_BREAKER_RESET', default=30)
+
 # Honeypot Configuration
 HONEYPOT_FIELD_NAME = 'email_address'  # Hidden field name (should be different from real fields)
 HONEYPOT_VALUE = ''  # Expected value (usually empty)
 
 # Email Configuration
 # Always use Postmark for transactional email sending
-EMAIL_BACKEND = 'lexit.postmark_backend.PostmarkBackend'
+# Emails are stored in an outbox (users.outbox) and sent from there through OUTBOUND_EMAIL_BACKEND
+EMAIL_BACKEND = 'users.outbox.OutboxEmailBackend'
+OUTBOUND_EMAIL_BACKEND = 'lexit.postmark_backend.PostmarkBackend'
+# Drain the outbox on a background thread after each commit; turn off when a worker runs dispatch_outbound_email
+OUTBOUND_EMAIL_DISPATCH_THREAD = env.bool('OUTBOUND_EMAIL_DISPATCH_THREAD', default=True)
 POSTMARK_SERVER_TOKEN = env('POSTMARK_SERVER_TOKEN', default='')
+# Seconds to open the connection to Postmark; EMAIL_TIMEOUT bounds each wait for a response
+POSTMARK_CONNECT_TIMEOUT = env.int('POSTMARK_CONNECT_TIMEOUT', default=10)
 
 # if ENVIRONMENT == 'development':
 #     # Development: Print emails to console
@@ -388,6 +428,13 @@ ACTIVECAMPAIGN_REFERRER_CODE_FIELD_NAME = env(
     'ACTIVECAMPAIGN_REFERRER_CODE_FIELD_NAME',
     default='Latest Referral Code Used',
 )
+# Seconds tag and custom field IDs looked up by name are cached for
+ACTIVECAMPAIGN_LOOKUP_CACHE_TTL = env.int('ACTIVECAMPAIGN_LOOKUP_CACHE_TTL', default=60 * 60)
+# Requests a second this process makes to ActiveCampaign, shared by every thread (the API allows 5 per account)
+ACTIVECAMPAIGN_RATE_LIMIT = env.float('ACTIVECAMPAIGN_RATE_LIMIT', default=5)
+# Run queued ActiveCampaign updates (users.crm_queue) on a background thread after each commit;
+# turn off when a worker runs process_crm_sync_queue
+ACTIVECAMPAIGN_SYNC_THREAD = env.bool('ACTIVECAMPAIGN_SYNC_THREAD', default=True)
 
 # Logging Configuration
 if ENVIRONMENT == 'production':
@@ -0,0 +1,459 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from http.client import RemoteDisconnected
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.http import Http404
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from PIL import Image
+
+from user_home.models import Blob, Property, PropertyImage, Testimonial
+from user_home.storage import collect_garbage
+from . import background, http_client, image_derivatives, media_urls
+from .http_client import CircuitOpenError
+from .media_views import parse_range_header, serve_media
+from .postmark_backend import PostmarkBackend
+
+
+class ServeMediaTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.content = bytes(range(256)) * 40
+        os.makedirs(os.path.join(self.media_root, 'property_documents'))
+        with open(os.path.join(self.media_root, 'property_documents', 'lease.pdf'), 'wb') as file:
+            file.write(self.content)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE_BACKEND='')
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.factory = RequestFactory()
+
+    def get(self, path='property_documents/lease.pdf', **headers):
+        return serve_media(self.factory.get('/media/' + path, headers=headers), path)
+
+    def test_streams_whole_file_with_stable_etag(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], self.get()['ETag'])
+
+        response = self.get(if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_single_and_suffix_ranges(self):
+        response = self.get(range='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+        response = self.get(range='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+
+    def test_multiple_ranges(self):
+        response = self.get(range='bytes=0-9, 50-59')
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        self.assertIn(self.content[0:10], body)
+        self.assertIn(self.content[50:60], body)
+        self.assertIn(f'Content-Range: bytes 50-59/{len(self.content)}'.encode(), body)
+
+    def test_unsatisfiable_and_stale_ranges(self):
+        response = self.get(range=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+        response = self.get(range='bytes=0-9', if_range='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_parse_range_header(self):
+        self.assertEqual(parse_range_header('bytes=0-4,3-9,20-', 30), [(0, 9), (20, 29)])
+        self.assertIsNone(parse_range_header('items=0-4', 30))
+        self.assertIsNone(parse_range_header('bytes=5-1', 30))
+
+    def test_hands_off_to_web_server(self):
+        with self.settings(MEDIA_SENDFILE_BACKEND='nginx', MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            response = self.get()
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/property_documents/lease.pdf')
+        self.assertEqual(response.content, b'')
+
+        with self.settings(MEDIA_SENDFILE_BACKEND='apache'):
+            response = self.get()
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.media_root, 'property_documents', 'lease.pdf'))
+
+    def test_rejects_paths_outside_media_root(self):
+        for path in ('../settings.py', 'property_documents', 'missing.pdf'):
+            with self.subTest(path=path):
+                with self.assertRaises(Http404):
+                    self.get(path)
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_PIPELINE_BACKGROUND=False)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.user = User.objects.create_user(username='photographer', password='safe-password-123')
+
+    def upload(self, name='house.jpg', size=(2000, 1000)):
+        exif = Image.Exif()
+        exif[0x0110] = 'Phone Camera'  # Model
+        exif[0x0112] = 6  # Orientation: rotate 90° clockwise
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def create_property(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Property.objects.create(
+                owner=self.user, property_name='Photo House', city='Bristol', postcode='BS11AA',
+                purchase_price=300000, weekly_rent=350, date_of_purchase=date(2021, 1, 1),
+                property_image=self.upload(),
+            )
+
+    def test_upload_makes_upright_copies_without_exif(self):
+        property_obj = self.create_property()
+        property_obj.refresh_from_db()
+
+        derivatives = property_obj.property_image_derivatives
+        self.assertEqual(derivatives['source'], property_obj.property_image.name)
+        # Rotated upright, the 1000px wide image only needs the smaller two widths
+        self.assertEqual([width for width, _ in derivatives['webp']], [300, 600])
+        self.assertEqual([width for width, _ in derivatives['jpeg']], [300, 600])
+
+        with Image.open(os.path.join(self.media_root, derivatives['jpeg'][0][1])) as image:
+            self.assertEqual(image.size, (300, 600))
+            self.assertEqual(len(image.getexif()), 0)
+        with Image.open(os.path.join(self.media_root, derivatives['webp'][1][1])) as image:
+            self.assertEqual(image.format, 'WEBP')
+
+    def test_sources_and_card_markup(self):
+        property_obj = self.create_property()
+        property_obj.refresh_from_db()
+
+        sources = property_obj.property_image_sources
+        self.assertIn('-300w.webp 300w', sources.webp_srcset)
+        self.assertIn('-600w.jpg 600w', sources.srcset)
+        self.assertTrue(sources.src.endswith('-600w.jpg'))
+
+        card = render_to_string('user_home/partials/property_card.html', {'property': property_obj})
+        self.assertIn('type="image/webp"', card)
+        self.assertIn('sizes="384px"', card)
+
+    def test_replaced_image_falls_back_until_resized(self):
+        property_obj = self.create_property()
+        property_obj.refresh_from_db()
+        old_copies = [name for _, name in property_obj.property_image_derivatives['jpeg']]
+
+        property_obj.property_image = self.upload('new.jpg', (800, 400))
+        property_obj.save()
+        self.assertEqual(property_obj.property_image_sources.srcset, '')
+
+        image_derivatives.generate_derivatives(Property, property_obj.pk, 'property_image')
+        property_obj.refresh_from_db()
+        self.assertEqual([width for width, _ in property_obj.property_image_derivatives['jpeg']], [300])
+        for name in old_copies:
+            self.assertFalse(os.path.exists(os.path.join(self.media_root, name)))
+
+    def test_backfill_command(self):
+        property_obj = self.create_property()
+        Property.objects.filter(pk=property_obj.pk).update(property_image_derivatives={})
+
+        call_command('generate_image_derivatives', stdout=StringIO())
+        property_obj.refresh_from_db()
+        self.assertEqual(property_obj.property_image_derivatives['source'], property_obj.property_image.name)
+
+    def test_duplicate_gallery_images_share_their_copies(self):
+        property_obj = self.create_property()
+        data = self.upload().read()
+        images = []
+        for name in ('front.jpg', 'front (1).jpg'):
+            with self.captureOnCommitCallbacks(execute=True):
+                images.append(PropertyImage.objects.create(
+                    property=property_obj, image=SimpleUploadedFile(name, data, content_type='image/jpeg')))
+        first, second = (PropertyImage.objects.get(pk=image.pk) for image in images)
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('blobs/'))
+        self.assertEqual(first.image_derivatives, second.image_derivatives)
+
+        # The copies stay while the other image still shows them
+        first.delete()
+        for _, name in second.image_derivatives['jpeg']:
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+
+    def test_garbage_collection_deletes_resized_copies(self):
+        property_obj = self.create_property()
+        copies = []
+        for name, size in (('front.jpg', (2000, 1000)), ('icon.jpg', (200, 120))):
+            with self.captureOnCommitCallbacks(execute=True):
+                image = PropertyImage.objects.create(property=property_obj, image=self.upload(name, size))
+            image.refresh_from_db()
+            copies += [name for fmt in image_derivatives.DERIVATIVE_FORMATS
+                       for _, name in image.image_derivatives[fmt]]
+            image.delete()
+        # The narrow image's copies are at its own (upright) width
+        self.assertIn(120, [int(name.rsplit('-', 1)[1].split('w.')[0]) for name in copies])
+        self.assertTrue(all(os.path.exists(os.path.join(self.media_root, name)) for name in copies))
+
+        Blob.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(collect_garbage(), 2)
+        self.assertFalse(any(os.path.exists(os.path.join(self.media_root, name)) for name in copies))
+        # Images that aren't blobs keep theirs
+        property_obj.refresh_from_db()
+        for _, name in property_obj.property_image_derivatives['jpeg']:
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+
+
+@override_settings(TEST_QUEUE_THREAD=True)
+class QueueWorkerTests(SimpleTestCase):
+    def setUp(self):
+        self.drain = Mock()
+        self.next_due = Mock(return_value=None)
+        self.worker = background.QueueWorker('test-queue', self.drain, self.next_due, 'TEST_QUEUE_THREAD')
+        self.addCleanup(self.worker.cancel_timer)
+
+    def test_wakes_queue_one_drain_that_sets_the_next_timer(self):
+        due = timezone.now() + timedelta(minutes=2)
+        self.next_due.return_value = due
+        with patch.object(self.worker._pool, 'submit') as submit, \
+                patch.object(background.threading, 'Timer') as timer:
+            self.worker.wake()
+            self.worker.wake()
+            submit.assert_called_once_with(self.worker._drain)
+
+            self.worker._drain()
+            self.drain.assert_called_once_with()
+            self.worker.wake()
+            self.assertEqual(submit.call_count, 2)
+        delay, callback = timer.call_args.args
+        self.assertAlmostEqual(delay, 120, delta=2)
+        self.assertEqual(callback, self.worker.wake)
+
+    def test_timer_is_at_least_a_second_away_and_off_with_the_setting(self):
+        self.next_due.return_value = timezone.now() - timedelta(minutes=1)
+        with patch.object(background.threading, 'Timer') as timer:
+            self.assertGreater(self.worker.schedule_next_wake(), timezone.now())
+            self.assertGreaterEqual(timer.call_args.args[0], 0.9)
+            with self.settings(TEST_QUEUE_THREAD=False), patch.object(self.worker._pool, 'submit') as submit:
+                self.assertIsNone(self.worker.schedule_next_wake())
+                self.worker.wake()
+            submit.assert_not_called()
+
+    def test_pool_jobs_close_their_database_connection(self):
+        pool = background.BackgroundPool('test-pool')
+        with patch.object(background, 'connection') as connection, self.assertLogs('lexit.background', 'ERROR'):
+            self.assertEqual(pool.submit(lambda x: x * 2, 21).result(), 42)
+            pool.submit(lambda: 1 / 0).result()
+        self.assertEqual(connection.close.call_count, 2)
+        pool._executor.shutdown()
+
+    def test_backoff_grows_and_is_capped(self):
+        with patch.object(background.random, 'uniform', return_value=1):
+            self.assertEqual(background.backoff_delay(3, timedelta(minutes=1), timedelta(hours=1)), timedelta(minutes=4))
+            self.assertEqual(background.backoff_delay(20, timedelta(minutes=1), timedelta(hours=1)), timedelta(hours=1))
+
+
+class MediaUrlTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_urls.reset_media_url_stats()
+        self.user = User.objects.create_user(username='urls', password='safe-password-123')
+        self.property = Property.objects.create(
+            owner=self.user, property_name='Url House', city='Derby', postcode='DE11AA',
+            purchase_price=200000, weekly_rent=250, date_of_purchase=date(2021, 1, 1),
+            property_image='property_images/url-house.jpg',
+        )
+
+    def test_url_is_memoized_per_instance_and_shared(self):
+        with patch.object(FileSystemStorage, 'url', autospec=True, side_effect=lambda self, name: f'/media/{name}') as url:
+            for _ in range(3):
+                self.assertEqual(self.property.get_property_image_url, '/media/property_images/url-house.jpg')
+            Property.objects.get(pk=self.property.pk).get_property_image_url
+            self.assertEqual(url.call_count, 1)
+
+            self.property.property_image = 'property_images/replaced.jpg'
+            self.assertEqual(self.property.get_property_image_url, '/media/property_images/replaced.jpg')
+            self.assertEqual(url.call_count, 2)
+
+        stats = media_urls.media_url_stats()
+        self.assertEqual((stats['misses'], stats['instance_hits'], stats['shared_hits']), (2, 2, 1))
+        self.assertEqual(stats['hit_rate'], 0.6)
+
+    def test_fallbacks(self):
+        with patch.object(FileSystemStorage, 'url', side_effect=RuntimeError('storage unavailable')):
+            self.assertEqual(self.property.get_property_image_url, '/static/images/lexit_image.png')
+        self.assertEqual(media_urls.media_url_stats()['errors'], 1)
+
+        self.property.property_image = None
+        self.assertEqual(self.property.get_property_image_url, '/static/images/lexit_image.png')
+        testimonial = Testimonial(quote='Great', description='Great', author_name='James Chen', author_role='Landlord')
+        self.assertEqual(testimonial.get_author_image_url, '/static/images/testimonial_2.png')
+        self.assertEqual(self.user.profile.get_display_image_url(), '/static/images/lexit_image.png')
+
+
+class FakeConnection:
+    """Stands in for HTTPSConnection, answering each request with the next of responses"""
+    instances = []
+    responses = []
+
+    def __init__(self, host, port=None, timeout=None):
+        self.host = host
+        self.timeout = timeout
+        self.requests = []
+        self.sock = type('Sock', (), {'settimeout': lambda sock, value: setattr(self, 'read_timeout', value)})()
+        self.closed = False
+        FakeConnection.instances.append(self)
+
+    def connect(self):
+        if FakeConnection.responses and isinstance(FakeConnection.responses[0], ConnectionRefusedError):
+            raise FakeConnection.responses.pop(0)
+
+    def request(self, method, path, body=None, headers=None):
+        self.requests.append((method, path, body, headers))
+        self.response = FakeConnection.responses.pop(0)
+        if isinstance(self.response, Exception):
+            raise self.response
+
+    def getresponse(self):
+        status, body, headers = (self.response + ({},))[:3]
+        if body is None:
+            body = json.dumps([{'ErrorCode': 0, 'Message': 'OK', 'To': message['To']}
+                               for message in json.loads(self.requests[-1][2])])
+        return type('Response', (), {
+            'status': status,
+            'headers': headers,
+            'will_close': False,
+            'read': lambda response: body.encode(),
+            'getheader': lambda response, name, default=None: headers.get(name, default),
+        })()
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnectionMixin:
+    def setUp(self):
+        super().setUp()
+        http_client.reset_client()
+        FakeConnection.instances = []
+        patcher = patch('lexit.http_client.HTTPSConnection', FakeConnection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(http_client.reset_client)
+
+
+@override_settings(POSTMARK_SERVER_TOKEN='token', EMAIL_TIMEOUT=12, POSTMARK_CONNECT_TIMEOUT=3)
+class PostmarkBackendTests(FakeConnectionMixin, SimpleTestCase):
+    def messages(self, count):
+        return [EmailMessage('Digest', 'Body', 'hello@lexit.co.uk', [f'user{i}@example.com']) for i in range(count)]
+
+    def test_messages_are_batched_on_one_connection(self):
+        FakeConnection.responses = [(200, None), (200, None), (200, None)]
+        self.assertEqual(PostmarkBackend().send_messages(self.messages(1200)), 1200)
+
+        connection, = FakeConnection.instances
+        self.assertEqual([len(json.loads(body)) for _, _, body, _ in connection.requests], [500, 500, 200])
+        self.assertEqual({path for _, path, _, _ in connection.requests}, {'/email/batch'})
+        self.assertEqual((connection.host, connection.timeout, connection.read_timeout), ('api.postmarkapp.com', 3, 12))
+
+    def test_partial_failure_is_reported_per_message(self):
+        messages = self.messages(3)
+        FakeConnection.responses = [(200, json.dumps([
+            {'ErrorCode': 0, 'Message': 'OK', 'MessageID': 'a'},
+            {'ErrorCode': 406, 'Message': 'Inactive recipient'},
+            {'ErrorCode': 0, 'Message': 'OK', 'MessageID': 'c'},
+        ]))]
+        with self.assertLogs('lexit.postmark_backend', 'ERROR'):
+            self.assertEqual(PostmarkBackend().send_messages(messages), 2)
+        self.assertEqual(messages[1].postmark_result['ErrorCode'], 406)
+        self.assertEqual(messages[2].postmark_result['MessageID'], 'c')
+
+    def test_failed_batch_does_not_stop_the_next(self):
+        messages = self.messages(600)
+        FakeConnection.responses = [(500, 'Internal error'), (200, None)]
+        with self.assertLogs('lexit.postmark_backend', 'ERROR'):
+            self.assertEqual(PostmarkBackend().send_messages(messages), 100)
+        self.assertEqual(messages[0].postmark_result, {'ErrorCode': 500, 'Message': 'Internal error'})
+
+    def test_connection_is_kept_and_reconnected_when_dropped(self):
+        FakeConnection.responses = [(200, None), RemoteDisconnected('idle'), (200, None)]
+        self.assertEqual(PostmarkBackend().send_messages(self.messages(2)), 2)
+        self.assertEqual(len(FakeConnection.instances), 1)
+        # Postmark closed the idle connection, so the batch goes again on a new one
+        self.assertEqual(PostmarkBackend().send_messages(self.messages(2)), 2)
+        self.assertEqual(len(FakeConnection.instances), 2)
+        self.assertTrue(FakeConnection.instances[0].closed)
+
+
+@override_settings(INTEGRATION_HTTP_RETRIES=2, INTEGRATION_HTTP_BREAKER_THRESHOLD=3, INTEGRATION_HTTP_BREAKER_RESET=30)
+@patch('lexit.http_client.time.sleep')
+class HttpClientTests(FakeConnectionMixin, SimpleTestCase):
+    def test_idempotent_requests_are_retried_with_backoff(self, sleep):
+        FakeConnection.responses = [(503, 'busy'), TimeoutError('slow'), (200, '{"ok": true}')]
+        response = http_client.request('GET', 'https://api.example.com/api/3/contacts/42')
+        self.assertEqual(response.json(), {'ok': True})
+        self.assertEqual(sleep.call_count, 2)
+        first, second = (call.args[0] for call in sleep.call_args_list)
+        self.assertTrue(0.25 <= first <= 0.5 and 0.5 <= second <= 1)
+
+    def test_posts_are_only_retried_when_they_cannot_have_been_acted_on(self, sleep):
+        FakeConnection.responses = [(429, 'slow down', {'Retry-After': '3'}), (500, 'oops')]
+        response = http_client.request('POST', 'https://api.example.com/api/3/notes', json={'note': 'hi'})
+        self.assertEqual(response.status, 500)
+        sleep.assert_called_once_with(3.0)
+
+        FakeConnection.responses = [TimeoutError('slow')]
+        with self.assertRaises(TimeoutError):
+            http_client.request('POST', 'https://api.example.com/api/3/notes', json={'note': 'hi'})
+
+        FakeConnection.responses = [ConnectionRefusedError('down'), (201, '{}')]
+        self.assertEqual(http_client.request('POST', 'https://other.example.com/api/3/notes').status, 201)
+
+    def test_circuit_opens_after_repeated_failures(self, sleep):
+        FakeConnection.responses = [(500, 'down')] * 3
+        for _ in range(3):
+            self.assertEqual(http_client.request('POST', 'https://api.example.com/email').status, 500)
+        with self.assertRaises(CircuitOpenError):
+            http_client.request('POST', 'https://api.example.com/email')
+        # Other hosts are unaffected
+        FakeConnection.responses = [(200, '{}')]
+        self.assertEqual(http_client.request('GET', 'https://other.example.com/').status, 200)
+
+        breaker = http_client.get_client()._breakers[('https', 'api.example.com', 443)]
+        breaker.opened_at -= 31
+        FakeConnection.responses = [(200, '{}')]
+        self.assertEqual(http_client.request('POST', 'https://api.example.com/email').status, 200)
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_metrics_are_kept_per_endpoint(self, sleep):
+        FakeConnection.responses = [(200, '{}'), (200, '{}'), (404, '{}')]
+        for contact in (1, 2, 3):
+            http_client.request('GET', f'https://api.example.com/api/3/contacts/{contact}/fieldValues?limit=5')
+
+        metrics = http_client.http_metrics()
+        stats = metrics['endpoints']['GET api.example.com/api/3/contacts/{id}/fieldValues']
+        self.assertEqual((stats['calls'], stats['errors'], stats['outcomes']), (3, 1, {'200': 2, '404': 1}))
+        self.assertIsNotNone(stats['p95_ms'])
+        self.assertEqual(metrics['circuits'], {'https://api.example.com:443': 'closed'})
+        # One kept-alive connection served every call
+        self.assertEqual(len(FakeConnection.instances), 1)
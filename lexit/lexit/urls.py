@@ -15,6 +15,7 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
+from django.contrib.sitemaps.views import sitemap
 from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
@@ -22,8 +23,17 @@ from django.http import HttpResponse
 from django.views.generic import RedirectView
 from . import views
 from .media_views import serve_media
+from .media_urls import media_url_stats
 from .email_test_views import test_email
 from .sendgrid_direct_test import direct_postmark_test
+from .page_cache import cached_document
+from news.sitemaps import NewsArticleSitemap
+from rra_guide.sitemaps import RRAGuideSitemap
+
+SITEMAPS = {
+    'news': NewsArticleSitemap,
+    'rra-guide': RRAGuideSitemap,
+}
 
 def favicon_view(request):
     # Return a redirect to the static favicon
@@ -68,6 +78,8 @@ def debug_media_view(request):
             'cloud_name': settings.CLOUDINARY_STORAGE.get('CLOUD_NAME', '')[:10] + '...' if settings.CLOUDINARY_STORAGE.get('CLOUD_NAME') else ''
         }
     
+    response_data['media_url_cache'] = media_url_stats()
+
     # Check storage backend
     try:
         from django.core.files.storage import default_storage
@@ -163,6 +175,7 @@ urlpatterns = [
     path('test-postmark-direct/', direct_postmark_test, name='test_postmark_direct'),  # Direct Postmark API test
     path('test-sendgrid-direct/', direct_postmark_test, name='test_sendgrid_direct_legacy'),  # Legacy alias for compatibility
     path('', views.landing_page, name='landing_page'),
+    path('sitemap.xml', cached_document(sitemap), {'sitemaps': SITEMAPS}, name='sitemap'),
     path('r/<str:ref_code>/', views.referral_entry, name='referral_entry'),
     path('rrb/', views.rrb_home, name='rrb_home'),
     path('terms-of-service/', views.terms_of_service, name='terms_of_service'),
@@ -177,8 +190,10 @@ urlpatterns = [
 ]
 
 # Serve media files in all environments
-# Use Django's static file serving for media files
+# Use Django's static file serving for media files in development, which static() only does with DEBUG on
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if not settings.DEBUG:
+    urlpatterns += [re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='serve_media')]
 
 # Also add explicit static file serving for completeness
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -5,6 +5,8 @@ from django.urls import reverse
 from user_home.models import Testimonial
 from news.models import NewsArticle
 
+from .page_cache import anonymous_page_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,23 +17,23 @@ def referral_entry(request, ref_code):
         return redirect(f"{reverse('users:register')}?ref={referral_code}")
     return redirect('users:register')
 
+@anonymous_page_cache
 def landing_page(request):
-    referral_code = (request.GET.get('ref') or '').strip().upper()
-    if referral_code:
-        request.session['referral_code'] = referral_code
+    # ?ref= is stored in the session by ReferralCodeMiddleware, before the page cache
 
     # Get active testimonials ordered by display_order
     testimonials = Testimonial.objects.filter(is_active=True).order_by('display_order', '-created_at')
     
     # Get featured articles first, then recent articles as fallback
-    featured_articles = NewsArticle.objects.filter(is_featured=True).order_by('-published_date')[:4]
+    featured_articles = list(NewsArticle.objects.only(*NewsArticle.LISTING_FIELDS)
+                             .filter(is_featured=True).order_by('-published_date')[:4])
     
     # If we don't have enough featured articles, fill with recent articles
-    if featured_articles.count() < 4:
-        recent_articles = NewsArticle.objects.exclude(
-            id__in=featured_articles.values_list('id', flat=True)
-        ).order_by('-published_date')[:4-featured_articles.count()]
-        recent_articles = list(featured_articles) + list(recent_articles)
+    if len(featured_articles) < 4:
+        recent_articles = NewsArticle.objects.only(*NewsArticle.LISTING_FIELDS).exclude(
+            id__in=[article.id for article in featured_articles]
+        ).order_by('-published_date')[:4 - len(featured_articles)]
+        recent_articles = featured_articles + list(recent_articles)
     else:
         recent_articles = featured_articles
     
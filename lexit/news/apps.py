@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from lexit.page_cache import invalidate_on_change
+        from .article_cache import invalidate_article
+        from .models import NewsArticle
+        from .search import remove_from_search_index, update_search_index
+
+        # The landing page shows featured and recent articles
+        invalidate_on_change(NewsArticle)
+
+        post_save.connect(update_search_index, sender=NewsArticle, dispatch_uid='news_search:save')
+        post_delete.connect(remove_from_search_index, sender=NewsArticle, dispatch_uid='news_search:delete')
+        post_save.connect(invalidate_article, sender=NewsArticle, dispatch_uid='news_article_cache:save')
+        post_delete.connect(invalidate_article, sender=NewsArticle, dispatch_uid='news_article_cache:delete')
@@ -0,0 +1,37 @@
+"""
+Cache of article pages' data, keyed by slug.
+
+An article is cached as a model instance with the raw body deferred, so a
+page view (or a 304 answer) costs one cache lookup and no queries. Saving or
+deleting the article drops its entry, under the old slug too if it changed.
+"""
+from django.core.cache import cache
+
+from .models import NewsArticle
+
+ARTICLE_CACHE_PREFIX = 'news:article:'
+ARTICLE_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+
+def article_cache_key(slug):
+    return f'{ARTICLE_CACHE_PREFIX}{slug}'
+
+
+def get_article(slug):
+    """The newest article with this slug, from the cache when possible; None if there isn't one"""
+    key = article_cache_key(slug)
+    article = cache.get(key)
+    if article is None:
+        article = (NewsArticle.objects.defer('body')
+                   .filter(slug=slug)
+                   .order_by('-published_date', '-id')
+                   .first())
+        if article is not None:
+            cache.set(key, article, ARTICLE_CACHE_TIMEOUT)
+    return article
+
+
+def invalidate_article(sender, instance, **kwargs):
+    """post_save/post_delete receiver dropping the cached article"""
+    slugs = {instance.slug, getattr(instance, '_loaded_slug', None)}
+    cache.delete_many([article_cache_key(slug) for slug in slugs if slug])
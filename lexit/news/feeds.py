@@ -0,0 +1,69 @@
+from datetime import datetime, time
+
+from django.contrib.syndication.views import Feed
+from django.http import Http404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+
+from .models import NewsArticle
+
+FEED_ITEMS = 30
+
+
+class LatestArticlesFeed(Feed):
+    """RSS feed of the newest articles, optionally for one category"""
+
+    def get_object(self, request, category=None):
+        if category is not None and category not in dict(NewsArticle.CATEGORY_CHOICES):
+            raise Http404('Unknown category')
+        return category
+
+    def title(self, category):
+        if category:
+            return f'LEXIT | {dict(NewsArticle.CATEGORY_CHOICES)[category]}'
+        return 'LEXIT | Latest News for Landlords'
+
+    def link(self, category):
+        url = reverse('news:news_home')
+        return f'{url}?category={category}' if category else url
+
+    def description(self, category):
+        return 'News and insights for Buy-to-Let landlords in England.'
+
+    def items(self, category):
+        # Served by the (category,) published_date, id indexes; bodies are never loaded
+        articles = NewsArticle.objects.only(*NewsArticle.LISTING_FIELDS, 'updated_at')
+        if category:
+            articles = articles.filter(category=category)
+        return articles.order_by('-published_date', '-id')[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.summary
+
+    def item_link(self, item):
+        return reverse('news:news_article', kwargs={'slug': item.slug})
+
+    def item_guid(self, item):
+        return f'lexit-news-{item.pk}'
+
+    item_guid_is_permalink = False
+
+    def item_pubdate(self, item):
+        return timezone.make_aware(datetime.combine(item.published_date, time.min))
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_categories(self, item):
+        return [item.get_category_display()]
+
+
+class LatestArticlesAtomFeed(LatestArticlesFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, category):
+        return self.description(category)
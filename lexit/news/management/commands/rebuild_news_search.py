@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from news.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the news full-text search index from every article'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Articles indexed per batch (default 200)')
+
+    def handle(self, *args, **options):
+        if get_backend() is None:
+            self.stdout.write(self.style.WARNING('This database has no full-text search support, nothing to do'))
+            return
+
+        count = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} news articles'))
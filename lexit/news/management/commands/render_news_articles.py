@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from news.models import NewsArticle
+
+
+class Command(BaseCommand):
+    help = 'Render every article body again, after the sanitiser or heading anchors change'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Articles loaded per batch (default 200)')
+
+    def handle(self, *args, **options):
+        count = 0
+        for article in NewsArticle.objects.all().iterator(chunk_size=options['batch_size']):
+            article.save(update_fields=['body'])
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rendered {count} news articles'))
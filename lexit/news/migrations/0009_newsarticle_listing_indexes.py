@@ -0,0 +1,25 @@
+# Generated by Django 5.1.14 on 2026-10-19 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_alter_newsarticle_body'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['-published_date', '-id'], name='news_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['category', '-published_date', '-id'], name='news_category_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['is_featured', '-published_date'], name='news_featured_published_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+
+# The DDL as it was when this migration was written; news.search may change later
+CREATE_SQL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS news_search_index "
+        "USING fts5(title, summary, body, tokenize='porter unicode61')",
+    ],
+    'postgresql': [
+        "CREATE TABLE IF NOT EXISTS news_search_index ("
+        "article_id bigint PRIMARY KEY REFERENCES news_newsarticle (id) "
+        "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        "content text NOT NULL, "
+        "document tsvector NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS news_search_document_gin ON news_search_index USING gin (document)",
+    ],
+}
+DROP_SQL = {
+    'sqlite': ["DROP TABLE IF EXISTS news_search_index"],
+    'postgresql': ["DROP TABLE IF EXISTS news_search_index"],
+}
+
+
+def create_search_index(apps, schema_editor):
+    for sql in CREATE_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    for sql in DROP_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    """
+    Full-text search table for news articles: tsvector + GIN index on
+    Postgres, FTS5 on SQLite. Run the rebuild_news_search command afterwards
+    to index existing articles.
+    """
+
+    dependencies = [
+        ('news', '0009_newsarticle_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.14 on 2026-10-19 18:43
+
+from django.db import migrations, models
+
+
+def render_existing_articles(apps, schema_editor):
+    from news.rendering import article_content_hash, render_article_body
+
+    NewsArticle = apps.get_model('news', 'NewsArticle')
+    for article in NewsArticle.objects.all().iterator():
+        for field, value in render_article_body(article.body).items():
+            setattr(article, field, value)
+        article.content_hash = article_content_hash(article)
+        article.save(update_fields=['rendered_body', 'table_of_contents', 'reading_time', 'content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0010_news_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsarticle',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='newsarticle',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='newsarticle',
+            name='rendered_body',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='newsarticle',
+            name='table_of_contents',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='newsarticle',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(render_existing_articles, migrations.RunPython.noop),
+    ]
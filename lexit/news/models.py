@@ -1,6 +1,8 @@
 from django.db import models
 from django_ckeditor_5.fields import CKEditor5Field
 
+from .rendering import article_content_hash, render_article_body
+
 # Create your models here.
 class NewsArticle(models.Model):
     CATEGORY_CHOICES = [
@@ -22,13 +24,54 @@ class NewsArticle(models.Model):
     alt_text = models.CharField(max_length=100, default='News Article Image')
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='news')
     is_featured = models.BooleanField(default=False, help_text="Show this article on the landing page")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Worked out from the body on save, so article pages never process it
+    rendered_body = models.TextField(blank=True, editable=False)
+    table_of_contents = models.JSONField(default=list, blank=True, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=1, editable=False, help_text="Minutes")
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+
+    # Fields the listing pages render, so the CKEditor body is never loaded for them
+    LISTING_FIELDS = ('id', 'title', 'summary', 'slug', 'banner', 'alt_text', 'category',
+                      'published_date', 'is_featured')
 
     class Meta:
         ordering = ['-published_date']
+        indexes = [
+            # Keyset pagination on (published_date, id), overall and per category
+            models.Index(fields=['-published_date', '-id'], name='news_published_idx'),
+            models.Index(fields=['category', '-published_date', '-id'], name='news_category_published_idx'),
+            # Featured articles on the landing page
+            models.Index(fields=['is_featured', '-published_date'], name='news_featured_published_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a cached page under the old slug can be dropped when it changes
+        instance._loaded_slug = instance.__dict__.get('slug')
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        derived = {'content_hash', 'updated_at'}
+        if update_fields is None or 'body' in update_fields:
+            self.render_body()
+            derived |= {'rendered_body', 'table_of_contents', 'reading_time'}
+        self.content_hash = article_content_hash(self)
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | derived
+        super().save(*args, **kwargs)
+
+    def render_body(self):
+        """Store the sanitised body, table of contents and reading time"""
+        for field, value in render_article_body(self.body).items():
+            setattr(self, field, value)
+
     def get_category_display_class(self):
         """Return CSS class for category badge"""
         category_colors = {
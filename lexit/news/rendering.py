@@ -0,0 +1,158 @@
+"""
+Rendering of CKEditor article bodies.
+
+Articles are rendered once when they are saved, not on every page view: the
+body is sanitised against an allow-list (CKEditor's source editing mode
+accepts any HTML), headings get anchors for a table of contents, and the
+reading time is worked out from the text. The results are stored on the
+article alongside a hash of everything the article page shows, which the
+view uses as its ETag.
+"""
+import hashlib
+import math
+import re
+
+from bs4 import BeautifulSoup, Comment
+from django.utils.text import slugify
+
+# Bump when the sanitiser or heading anchors change, so every ETag changes too, and run
+# render_news_articles to render the stored bodies again
+RENDER_VERSION = 2
+
+WORDS_PER_MINUTE = 200
+TOC_HEADINGS = ('h1', 'h2', 'h3')
+
+# Everything the 'extends' CKEditor toolbar can produce
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'blockquote', 'pre', 'code',
+    'strong', 'b', 'em', 'i', 'u', 's', 'sub', 'sup', 'mark', 'span', 'a',
+    'ul', 'ol', 'li', 'label', 'input', 'figure', 'figcaption', 'img', 'oembed',
+    'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'colgroup', 'col',
+}
+# Dropped together with their contents rather than unwrapped
+REMOVED_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'form', 'button',
+                'textarea', 'select', 'svg', 'math', 'template', 'noscript'}
+
+GLOBAL_ATTRIBUTES = {'class', 'style'}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title', 'target', 'rel'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'oembed': {'url'},
+    'ol': {'start', 'reversed'},
+    'input': {'type', 'checked', 'disabled'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'col': {'span'},
+}
+URL_ATTRIBUTES = {'href', 'src', 'url'}
+ALLOWED_URL_SCHEMES = ('http', 'https', 'mailto', 'tel')
+
+# Inline styles come from the font, colour, image and table toolbars
+ALLOWED_STYLES = {
+    'color', 'background-color', 'font-size', 'font-family', 'font-weight', 'font-style',
+    'text-align', 'text-decoration', 'width', 'height', 'float', 'vertical-align',
+    'border', 'border-color', 'border-style', 'border-width', 'border-collapse',
+    'padding', 'margin', 'list-style-type',
+}
+# Browsers drop tabs and newlines anywhere in a URL and control characters around it, so none
+# of them count when the scheme is checked
+URL_CONTROL_CHARACTERS = re.compile(r'[\x00-\x1f\x7f]')
+UNSAFE_STYLE_VALUE = re.compile(r'url\s*\(|expression\s*\(|javascript:|[\\<>]', re.IGNORECASE)
+
+
+def _is_safe_url(url):
+    url = URL_CONTROL_CHARACTERS.sub('', url).lstrip()
+    scheme = re.match(r'^([a-zA-Z][a-zA-Z0-9+.-]*):', url)
+    return scheme is None or scheme.group(1).lower() in ALLOWED_URL_SCHEMES
+
+
+def _clean_style(style):
+    declarations = []
+    for declaration in style.split(';'):
+        name, _, value = declaration.partition(':')
+        name, value = name.strip().lower(), value.strip()
+        if name in ALLOWED_STYLES and value and not UNSAFE_STYLE_VALUE.search(value):
+            declarations.append(f'{name}:{value}')
+    return ';'.join(declarations)
+
+
+def _clean_attributes(tag):
+    allowed = GLOBAL_ATTRIBUTES | ALLOWED_ATTRIBUTES.get(tag.name, set())
+    for name, value in list(tag.attrs.items()):
+        if isinstance(value, list):
+            value = ' '.join(value)
+        if name not in allowed:
+            del tag[name]
+        elif name in URL_ATTRIBUTES and not _is_safe_url(value):
+            del tag[name]
+        elif name == 'style':
+            style = _clean_style(value)
+            if style:
+                tag[name] = style
+            else:
+                del tag[name]
+
+    if tag.name == 'input' and tag.get('type') != 'checkbox':
+        tag.decompose()
+    elif tag.name == 'a' and tag.get('target') == '_blank':
+        tag['rel'] = 'noopener noreferrer'
+
+
+def sanitise_html(soup):
+    """Strip everything outside the allow-list from a parsed body, in place"""
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    for tag in soup.find_all(REMOVED_TAGS):
+        tag.decompose()
+    for tag in soup.find_all(True):
+        if tag.decomposed:
+            continue
+        if tag.name not in ALLOWED_TAGS:
+            tag.unwrap()
+        else:
+            _clean_attributes(tag)
+
+
+def add_heading_anchors(soup):
+    """Give each heading a unique id and return the table of contents"""
+    toc = []
+    used = set()
+    for heading in soup.find_all(TOC_HEADINGS):
+        title = heading.get_text(' ', strip=True)
+        if not title:
+            continue
+        anchor = base = slugify(title) or 'section'
+        suffix = 2
+        while anchor in used:
+            anchor = f'{base}-{suffix}'
+            suffix += 1
+        used.add(anchor)
+        heading['id'] = anchor
+        toc.append({'level': int(heading.name[1]), 'title': title, 'anchor': anchor})
+    return toc
+
+
+def reading_time(text):
+    """Whole minutes to read the text, at least one"""
+    return max(1, math.ceil(len(text.split()) / WORDS_PER_MINUTE))
+
+
+def render_article_body(html):
+    """Sanitised HTML, table of contents and reading time for a CKEditor body"""
+    soup = BeautifulSoup(html or '', 'html.parser')
+    sanitise_html(soup)
+    toc = add_heading_anchors(soup)
+    return {
+        'rendered_body': str(soup),
+        'table_of_contents': toc,
+        'reading_time': reading_time(soup.get_text(' ', strip=True)),
+    }
+
+
+def article_content_hash(article):
+    """Hash of everything the article page shows"""
+    parts = [
+        RENDER_VERSION, article.title, article.summary, article.body, article.category,
+        article.banner.name if article.banner else '', article.alt_text,
+    ]
+    return hashlib.sha256('\x1f'.join(str(part) for part in parts).encode()).hexdigest()
@@ -0,0 +1,229 @@
+"""
+Full-text search over news articles.
+
+The index lives in its own table, news_search_index, holding plain text
+extracted from the CKEditor body, so a search never reads or scans the
+article HTML. On Postgres the table has a weighted tsvector column with a
+GIN index; in development on SQLite it is an FTS5 virtual table keyed by
+the article id. Migration 0010 creates whichever one the database needs, so
+changing the table takes a new migration.
+
+Articles are re-indexed one at a time when saved (see NewsConfig.ready) and
+in bulk by the rebuild_news_search management command.
+"""
+import re
+
+from bs4 import BeautifulSoup
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+SEARCH_TABLE = 'news_search_index'
+SEARCH_RESULTS_LIMIT = 20
+MAX_QUERY_TERMS = 8
+
+# Private-use characters mark matches in snippets, so the snippet can be
+# escaped before the markers are swapped for <mark> tags
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_END = '\ue001'
+
+# Fields the index is built from; saves that touch none of them are skipped
+INDEXED_FIELDS = {'title', 'summary', 'body'}
+
+
+def html_to_text(html):
+    """Plain text of a CKEditor body"""
+    if not html:
+        return ''
+    return BeautifulSoup(html, 'html.parser').get_text(' ', strip=True)
+
+
+def highlight(snippet):
+    """Escape a snippet and turn its match markers into <mark> tags"""
+    html = escape(snippet)
+    html = html.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+    return mark_safe(html)
+
+
+class SQLiteSearchBackend:
+    """FTS5 index used in development"""
+
+    def index_rows(self, cursor, rows):
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, summary, body) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+    def remove(self, cursor, article_id):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [article_id])
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    def optimise(self, cursor):
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+
+    def query(self, cursor, text, limit):
+        terms = re.findall(r'\w+', text.lower())[:MAX_QUERY_TERMS]
+        if not terms:
+            return []
+        # Quote every term so FTS5 never sees operators, and prefix match as you type
+        match = ' '.join(f'"{term}"*' for term in terms)
+        # bm25 is lower-is-better and weighted title > summary > body
+        cursor.execute(
+            f"SELECT rowid, -bm25({SEARCH_TABLE}, 10.0, 4.0, 1.0) AS rank, "
+            f"snippet({SEARCH_TABLE}, -1, %s, %s, '…', 24) "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+            f"ORDER BY rank DESC LIMIT %s",
+            [HIGHLIGHT_START, HIGHLIGHT_END, match, limit],
+        )
+        return cursor.fetchall()
+
+
+class PostgresSearchBackend:
+    """Weighted tsvector with a GIN index, used in production"""
+
+    def index_rows(self, cursor, rows):
+        # content keeps the summary and body text for ts_headline snippets
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (article_id, content, document) "
+            f"VALUES (%s, %s || ' ' || %s, "
+            f"setweight(to_tsvector('english', %s), 'A') || "
+            f"setweight(to_tsvector('english', %s), 'B') || "
+            f"setweight(to_tsvector('english', %s), 'C')) "
+            f"ON CONFLICT (article_id) DO UPDATE "
+            f"SET content = EXCLUDED.content, document = EXCLUDED.document",
+            [(article_id, summary, body, title, summary, body)
+             for article_id, title, summary, body in rows],
+        )
+
+    def remove(self, cursor, article_id):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE article_id = %s", [article_id])
+
+    def clear(self, cursor):
+        cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+
+    def optimise(self, cursor):
+        cursor.execute(f"ANALYZE {SEARCH_TABLE}")
+
+    def query(self, cursor, text, limit):
+        if not text.strip():
+            return []
+        # Rank and limit first so ts_headline only runs on the rows returned
+        cursor.execute(
+            f"SELECT hits.article_id, hits.rank, "
+            f"ts_headline('english', hits.content, hits.query, %s) "
+            f"FROM (SELECT s.article_id, s.content, q.query, ts_rank_cd(s.document, q.query) AS rank "
+            f"      FROM {SEARCH_TABLE} s, websearch_to_tsquery('english', %s) AS q(query) "
+            f"      WHERE s.document @@ q.query ORDER BY rank DESC LIMIT %s) AS hits "
+            f"ORDER BY hits.rank DESC",
+            [f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_END}", MaxWords=35, MinWords=15',
+             text, limit],
+        )
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend(),
+    'postgresql': PostgresSearchBackend(),
+}
+
+
+def get_backend(using=None):
+    """Search backend for the connection's database, None if it has no full-text support"""
+    return BACKENDS.get((using or connection).vendor)
+
+
+def _index_row(article):
+    return (article.pk, article.title, article.summary, html_to_text(article.body))
+
+
+def index_article(article):
+    """Add or refresh one article in the search index"""
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.index_rows(cursor, [_index_row(article)])
+
+
+def remove_article(article_id):
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.remove(cursor, article_id)
+
+
+def rebuild_index(batch_size=200):
+    """Re-index every article in batches; returns the number indexed"""
+    from .models import NewsArticle
+
+    backend = get_backend()
+    if backend is None:
+        return 0
+
+    articles = NewsArticle.objects.only('id', 'title', 'summary', 'body').order_by('id')
+    count = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        backend.clear(cursor)
+        batch = []
+        for article in articles.iterator(chunk_size=batch_size):
+            batch.append(_index_row(article))
+            if len(batch) >= batch_size:
+                backend.index_rows(cursor, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            backend.index_rows(cursor, batch)
+            count += len(batch)
+        backend.optimise(cursor)
+    return count
+
+
+def search_articles(text, limit=SEARCH_RESULTS_LIMIT):
+    """
+    Best matching articles for a query, most relevant first.
+
+    Each article only has its listing fields loaded, plus search_rank and a
+    search_snippet with the matching words wrapped in <mark>.
+    """
+    from .models import NewsArticle
+
+    text = (text or '').strip()
+    backend = get_backend()
+    if not text:
+        return []
+    if backend is None:
+        # No full-text index on this database, fall back to the short fields
+        return list(
+            NewsArticle.objects.only(*NewsArticle.LISTING_FIELDS)
+            .filter(Q(title__icontains=text) | Q(summary__icontains=text))[:limit]
+        )
+
+    with connection.cursor() as cursor:
+        hits = backend.query(cursor, text, limit)
+
+    articles = NewsArticle.objects.only(*NewsArticle.LISTING_FIELDS).in_bulk([hit[0] for hit in hits])
+    results = []
+    for article_id, rank, snippet in hits:
+        article = articles.get(article_id)
+        if article is None:
+            continue
+        article.search_rank = rank
+        article.search_snippet = highlight(snippet or '')
+        results.append(article)
+    return results
+
+
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """post_save receiver that re-indexes an article when its text changes"""
+    if update_fields is not None and not INDEXED_FIELDS.intersection(update_fields):
+        return
+    index_article(instance)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_article(instance.pk)
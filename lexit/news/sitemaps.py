@@ -0,0 +1,18 @@
+from django.contrib.sitemaps import Sitemap
+from django.urls import reverse
+
+from .models import NewsArticle
+
+
+class NewsArticleSitemap(Sitemap):
+    changefreq = 'weekly'
+    priority = 0.6
+
+    def items(self):
+        return NewsArticle.objects.only('id', 'slug', 'updated_at').order_by('-published_date', '-id')
+
+    def location(self, item):
+        return reverse('news:news_article', kwargs={'slug': item.slug})
+
+    def lastmod(self, item):
+        return item.updated_at
@@ -1,3 +1,343 @@
-from django.test import TestCase
+import gzip
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from lexit import page_cache
+
+from . import search
+from .models import NewsArticle
+from .rendering import render_article_body
+from .views import NEWS_PAGE_SIZE
+
+
+class LandingPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('landing_page')
+
+    def create_article(self, title):
+        return NewsArticle.objects.create(
+            title=title,
+            summary='Summary',
+            body='<p>Body</p>',
+            slug=title.lower().replace(' ', '-'),
+            is_featured=True,
+        )
+
+    def test_anonymous_hits_are_served_without_queries(self):
+        self.create_article('First Story')
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'First Story')
+
+    def test_article_change_invalidates_cached_page(self):
+        self.client.get(self.url)
+        self.create_article('Breaking Story')
+
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Breaking Story')
+
+    def test_referral_code_is_applied_outside_the_cached_body(self):
+        self.client.get(self.url)
+
+        response = self.client.get(self.url, {'ref': 'abc123'})
+        register_url = reverse('users:register')
+        self.assertContains(response, f'href="{register_url}?ref=ABC123"')
+        self.assertEqual(self.client.session['referral_code'], 'ABC123')
+
+        response = self.client.get(self.url)
+        self.assertNotContains(response, '?ref=ABC123')
+
+    def test_stale_page_is_served_while_one_request_revalidates(self):
+        self.client.get(self.url)
+        page_cache.invalidate_page_cache()
+
+        # Another request already holds the revalidation lock
+        cache.add(f'{page_cache.PAGE_CACHE_PREFIX}{self.url}:lock', 1)
+        self.create_article('Late Story')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertNotContains(response, 'Late Story')
+
+    def test_authenticated_users_bypass_the_cache(self):
+        User.objects.create_user(username='member', password='safe-password-123')
+        self.client.login(username='member', password='safe-password-123')
+
+        with patch.object(page_cache.cache, 'set') as cache_set:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        cache_set.assert_not_called()
+
+
+class NewsListingTests(TestCase):
+    def setUp(self):
+        self.url = reverse('news:news_home')
+        # All published today, so paging relies on the id tie-break
+        for number in range(NEWS_PAGE_SIZE + 3):
+            NewsArticle.objects.create(
+                title=f'Story {number}',
+                summary='Summary',
+                body='<p>Body</p>',
+                slug=f'story-{number}',
+                category='market' if number % 3 == 0 else 'news',
+            )
+
+    def test_keyset_pages_cover_every_article_once(self):
+        first = self.client.get(self.url)
+        self.assertEqual(len(first.context['articles']), NEWS_PAGE_SIZE)
+        self.assertIsNotNone(first.context['next_cursor'])
+
+        second = self.client.get(self.url, {'after': first.context['next_cursor']})
+        self.assertIsNone(second.context['next_cursor'])
+
+        titles = [a.title for a in first.context['articles']] + [a.title for a in second.context['articles']]
+        self.assertEqual(len(titles), NEWS_PAGE_SIZE + 3)
+        self.assertEqual(len(set(titles)), len(titles))
+
+    def test_listing_never_loads_article_bodies(self):
+        response = self.client.get(self.url)
+        for article in response.context['articles']:
+            self.assertIn('body', article.get_deferred_fields())
+
+    def test_category_filter_and_invalid_input(self):
+        response = self.client.get(self.url, {'category': 'market'})
+        self.assertEqual(len(response.context['articles']), 5)
+        self.assertTrue(all(a.category == 'market' for a in response.context['articles']))
+
+        response = self.client.get(self.url, {'category': 'nonsense', 'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['articles']), NEWS_PAGE_SIZE)
+
+
+class NewsSearchTests(TestCase):
+    def setUp(self):
+        self.url = reverse('news:news_search')
+        self.tax = NewsArticle.objects.create(
+            title='Section 24 explained',
+            summary='How mortgage interest relief works now',
+            body='<p>Landlords can claim a <strong>basic rate</strong> tax credit on finance costs.</p>',
+            slug='section-24',
+        )
+        self.rent = NewsArticle.objects.create(
+            title='Rent reviews under the new Act',
+            summary='What changes for rent increases',
+            body='<p>Increases are limited to once a year. Finance is not covered.</p>',
+            slug='rent-reviews',
+        )
+
+    def test_matches_body_text_with_highlighted_snippet(self):
+        response = self.client.get(self.url, {'q': 'credit'})
+        results = response.context['results']
+        self.assertEqual([a.slug for a in results], ['section-24'])
+        self.assertIn('<mark>credit</mark>', results[0].search_snippet)
+        self.assertContains(response, '<mark>credit</mark>', html=False)
+
+    def test_title_matches_rank_above_body_matches(self):
+        self.rent.title = 'Finance and rent reviews'
+        self.rent.save()
+        results = search.search_articles('finance')
+        self.assertEqual([a.slug for a in results], ['rent-reviews', 'section-24'])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.tax.body = '<p>Now about stamp duty surcharges.</p>'
+        self.tax.save()
+        self.assertEqual(search.search_articles('credit'), [])
+        self.assertEqual([a.slug for a in search.search_articles('surcharge')], ['section-24'])
+
+        self.tax.delete()
+        self.assertEqual(search.search_articles('surcharge'), [])
+
+    def test_search_does_not_load_article_bodies(self):
+        for article in search.search_articles('rent'):
+            self.assertIn('body', article.get_deferred_fields())
+
+    def test_markup_and_operators_in_queries_are_harmless(self):
+        self.assertEqual(search.search_articles('"credit*'), search.search_articles('credit'))
+        self.assertEqual(search.search_articles('NEAR( tax OR'), [])
+        response = self.client.get(self.url, {'q': '<em>stamp</em>'})
+        self.assertEqual(response.context['results'], [])
+        self.assertContains(response, '&lt;em&gt;stamp&lt;/em&gt;', html=False)
+
+    def test_rebuild_command_backfills_the_index(self):
+        with connection.cursor() as cursor:
+            search.get_backend().clear(cursor)
+        self.assertEqual(search.search_articles('credit'), [])
+
+        call_command('rebuild_news_search', batch_size=1, stdout=StringIO())
+        self.assertEqual([a.slug for a in search.search_articles('credit')], ['section-24'])
+
+
+class ArticleRenderingTests(TestCase):
+    def test_body_is_sanitised_with_anchored_headings(self):
+        rendered = render_article_body(
+            '<h2>Rent rules</h2><p onclick="steal()">Fair <a href="javascript:alert(1)">rent</a></p>'
+            '<script>alert(1)</script><h2>Rent rules</h2>'
+            '<p><span style="color:red;background:url(x)">Note</span></p>'
+        )
+        html = rendered['rendered_body']
+        self.assertNotIn('script', html)
+        self.assertNotIn('onclick', html)
+        self.assertNotIn('javascript', html)
+        self.assertIn('<span style="color:red">Note</span>', html)
+        self.assertIn('<h2 id="rent-rules">', html)
+        self.assertEqual([h['anchor'] for h in rendered['table_of_contents']], ['rent-rules', 'rent-rules-2'])
+        self.assertEqual(rendered['reading_time'], 1)
+
+    def test_scripts_hidden_with_control_characters_are_removed(self):
+        for href in ('java&#9;script:alert(1)', 'java&#10;script:alert(1)', ' \x01javascript:alert(1)',
+                     'JaVa\r\nScRiPt:alert(1)'):
+            with self.subTest(href=href):
+                html = render_article_body(f'<p><a href="{href}">rent</a></p>')['rendered_body']
+                self.assertEqual(html, '<p><a>rent</a></p>')
+        html = render_article_body('<p><a href=" https://example.com/rent">rent</a></p>')['rendered_body']
+        self.assertIn('href=" https://example.com/rent"', html)
+
+    def test_stored_bodies_are_rendered_again(self):
+        article = NewsArticle.objects.create(title='Old', summary='Summary', slug='old', body='<p>Body</p>')
+        NewsArticle.objects.filter(pk=article.pk).update(rendered_body='<a href="java\tscript:x">stale</a>')
+        call_command('render_news_articles', stdout=StringIO())
+        article.refresh_from_db()
+        self.assertEqual(article.rendered_body, '<p>Body</p>')
+
+    def test_rendered_fields_are_stored_on_save(self):
+        article = NewsArticle.objects.create(
+            title='Long read', summary='Summary', slug='long-read',
+            body='<h2>Part one</h2><p>' + 'word ' * 450 + '</p>',
+        )
+        self.assertEqual(article.reading_time, 3)
+        self.assertEqual(article.table_of_contents[0]['title'], 'Part one')
+        original_hash = article.content_hash
+
+        article.body = '<p>Short now</p>'
+        article.save(update_fields=['body'])
+        article.refresh_from_db()
+        self.assertEqual(article.reading_time, 1)
+        self.assertEqual(article.rendered_body, '<p>Short now</p>')
+        self.assertNotEqual(article.content_hash, original_hash)
+
+
+class ArticlePageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.article = NewsArticle.objects.create(
+            title='Shared Story', summary='Summary', slug='shared-story',
+            body='<h2>Intro</h2><p>Hello</p><h2>Details</h2><p>More</p>',
+        )
+        self.url = reverse('news:news_article', kwargs={'slug': 'shared-story'})
+
+    def test_repeat_views_cost_no_queries(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, '<h2 id="intro">', html=False)
+        self.assertContains(response, 'href="#details"', html=False)
+
+    def test_conditional_requests_get_304(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(etag, f'"{self.article.content_hash}"')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_editing_the_article_changes_etag_and_content(self):
+        etag = self.client.get(self.url)['ETag']
+        self.article.body = '<p>Corrected</p>'
+        self.article.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Corrected')
+
+    def test_renamed_and_deleted_articles_leave_the_cache(self):
+        self.client.get(self.url)
+        article = NewsArticle.objects.get(pk=self.article.pk)
+        article.slug = 'renamed-story'
+        article.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        article.delete()
+        response = self.client.get(reverse('news:news_article', kwargs={'slug': 'renamed-story'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_signed_in_users_are_not_sent_validators(self):
+        User.objects.create_user(username='reader', password='safe-password-123')
+        self.client.login(username='reader', password='safe-password-123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class FeedAndSitemapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        NewsArticle.objects.create(title='Market update', summary='Prices rise', body='<p>Body</p>',
+                                   slug='market-update', category='market')
+        NewsArticle.objects.create(title='Tax changes', summary='New rates', body='<p>Body</p>',
+                                   slug='tax-changes', category='taxes')
+
+    def test_rss_and_atom_feeds_by_category(self):
+        response = self.client.get(reverse('news:feed'))
+        self.assertContains(response, '<rss')
+        self.assertContains(response, 'Market update')
+        self.assertContains(response, 'Tax changes')
+
+        response = self.client.get(reverse('news:category_atom_feed', kwargs={'category': 'market'}))
+        self.assertContains(response, 'http://www.w3.org/2005/Atom')
+        self.assertContains(response, 'Market update')
+        self.assertNotContains(response, 'Tax changes')
+
+        response = self.client.get(reverse('news:category_feed', kwargs={'category': 'nonsense'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_sitemap_lists_articles_and_guide_sections(self):
+        response = self.client.get(reverse('sitemap'))
+        self.assertContains(response, reverse('news:news_article', kwargs={'slug': 'tax-changes'}))
+        self.assertContains(response, reverse('rra_guide:section_detail', kwargs={'section_id': 'pets'}))
+        self.assertContains(response, '<lastmod>')
+
+    def test_cached_until_the_next_article_save(self):
+        url = reverse('news:feed')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url, {'utm_source': 'bot'})
+
+        NewsArticle.objects.create(title='Fresh story', summary='Summary', body='<p>Body</p>', slug='fresh')
+        self.assertContains(self.client.get(url), 'Fresh story')
+
+    @override_settings(SITE_BASE_URL='https://www.lexit.tech')
+    def test_urls_use_the_site_host_whatever_the_request_host(self):
+        for url in (reverse('news:feed'), reverse('sitemap')):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_HOST='attacker.example', HTTP_X_FORWARDED_HOST='attacker.example')
+                self.assertNotContains(response, 'attacker.example')
+                self.assertContains(response, 'https://www.lexit.tech/news/')
+
+    def test_sitemap_pages_are_cached_separately(self):
+        self.assertEqual(self.client.get(reverse('sitemap')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('sitemap'), {'p': 2}).status_code, 404)
+
+    def test_strong_etags_and_gzip(self):
+        url = reverse('sitemap')
+        plain = self.client.get(url)
+        self.assertFalse(plain['ETag'].startswith('W/'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        zipped = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(zipped['Content-Encoding'], 'gzip')
+        self.assertNotEqual(zipped['ETag'], plain['ETag'])
+        self.assertEqual(gzip.decompress(zipped.content), plain.content)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=zipped['ETag'])
+        self.assertEqual(response.status_code, 304)
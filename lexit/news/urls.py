@@ -1,9 +1,17 @@
 from django.urls import path
+
+from lexit.page_cache import cached_document
 from . import views
+from .feeds import LatestArticlesAtomFeed, LatestArticlesFeed
 
 app_name = 'news'
 
 urlpatterns = [
     path('news/', views.news_home, name='news_home'),
+    path('news/search/', views.news_search, name='news_search'),
     path('article/<slug:slug>/', views.news_article, name='news_article'),
-]
\ No newline at end of file
+    path('feed/', cached_document(LatestArticlesFeed()), name='feed'),
+    path('feed/atom/', cached_document(LatestArticlesAtomFeed()), name='atom_feed'),
+    path('feed/<slug:category>/', cached_document(LatestArticlesFeed()), name='category_feed'),
+    path('feed/<slug:category>/atom/', cached_document(LatestArticlesAtomFeed()), name='category_atom_feed'),
+]
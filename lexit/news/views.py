@@ -1,12 +1,91 @@
-from django.shortcuts import render, get_object_or_404
+from datetime import date
+
+from django.db.models import Q
+from django.http import Http404
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from .article_cache import get_article
 from .models import NewsArticle
+from .search import search_articles
+
+NEWS_PAGE_SIZE = 12
+
+
+def _parse_cursor(cursor):
+    """Turn an 'after' cursor of the form YYYY-MM-DD.id into (date, id), None if invalid"""
+    try:
+        published, article_id = cursor.rsplit('.', 1)
+        return date.fromisoformat(published), int(article_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _keyset_page(queryset, cursor, page_size=NEWS_PAGE_SIZE):
+    """
+    One page of articles newest first, starting after the cursor.
+
+    Filters on (published_date, id) instead of using OFFSET, so every page
+    costs the same however deep into the archive it is.
+    """
+    position = _parse_cursor(cursor)
+    if position:
+        published, article_id = position
+        queryset = queryset.filter(
+            Q(published_date__lt=published) | Q(published_date=published, id__lt=article_id)
+        )
+
+    articles = list(queryset.order_by('-published_date', '-id')[:page_size + 1])
+    next_cursor = None
+    if len(articles) > page_size:
+        articles = articles[:page_size]
+        last = articles[-1]
+        next_cursor = f"{last.published_date.isoformat()}.{last.id}"
+    return articles, next_cursor
 
-# Create your views here.
 
 def news_home(request):
-    news_articles = NewsArticle.objects.all().order_by('-published_date')
-    return render(request, 'news/news_home.html', {'articles': news_articles})
+    category = request.GET.get('category')
+    if category not in dict(NewsArticle.CATEGORY_CHOICES):
+        category = None
+
+    news_articles = NewsArticle.objects.only(*NewsArticle.LISTING_FIELDS)
+    if category:
+        news_articles = news_articles.filter(category=category)
+
+    articles, next_cursor = _keyset_page(news_articles, request.GET.get('after'))
+    context = {
+        'articles': articles,
+        'categories': NewsArticle.CATEGORY_CHOICES,
+        'current_category': category,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('after'),
+    }
+    return render(request, 'news/news_home.html', context)
+
+def news_search(request):
+    query = request.GET.get('q', '').strip()
+    context = {
+        'query': query,
+        'results': search_articles(query) if query else [],
+    }
+    return render(request, 'news/news_search.html', context)
 
 def news_article(request, slug):
-    article = get_object_or_404(NewsArticle, slug=slug)
-    return render(request, 'news/news_article.html', {'article': article})
\ No newline at end of file
+    article = get_article(slug)
+    if article is None:
+        raise Http404('No article found')
+
+    # The navigation differs for signed in users, so only anonymous pages are validated
+    if not request.user.is_authenticated:
+        etag = f'"{article.content_hash}"'
+        last_modified = int(article.updated_at.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render(request, 'news/news_article.html', {'article': article})
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    return render(request, 'news/news_article.html', {'article': article})
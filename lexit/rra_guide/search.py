@@ -0,0 +1,157 @@
+"""
+Search over the RRA guide sections and FAQs.
+
+The guide content is static, so an inverted index over it is built once when
+this module is imported and queries are answered from memory with BM25
+ranking, without touching the database.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+from .content import FAQS, SECTION_CONTENT
+
+# BM25 parameters, the usual defaults
+K1 = 1.5
+B = 0.75
+
+# Title words count this many times over body words
+TITLE_WEIGHT = 3
+
+SNIPPET_LENGTH = 200
+MAX_RESULTS = 10
+
+STOP_WORDS = frozenset(
+    'a an and are as at be by can do does for from has have how i if in into is it its '
+    'my no not of on or so than that the their them then there these they this to was '
+    'what when which who will with you your'.split()
+)
+
+WORD_RE = re.compile(r"[a-z0-9£]+(?:'[a-z]+)?")
+
+
+def stem(word):
+    """Light suffix stripping, so 'tenancies' finds 'tenancy' and 'pets' finds 'pet'"""
+    if word.endswith("'s"):
+        word = word[:-2]
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    return [stem(word) for word in WORD_RE.findall(text.lower()) if word not in STOP_WORDS]
+
+
+@dataclass(frozen=True)
+class Document:
+    kind: str  # 'section' or 'faq'
+    key: str  # section id, or the FAQ's position
+    title: str
+    category: str
+    passages: tuple  # plain text paragraphs, searched for the snippet
+
+
+class GuideIndex:
+    """Inverted index with BM25 scoring over a fixed set of documents"""
+
+    def __init__(self, documents):
+        self.documents = tuple(documents)
+        self.postings = defaultdict(list)  # term -> [(document index, term frequency)]
+        self.lengths = []
+        self.passage_terms = []  # per document, the set of terms in each passage
+
+        for index, document in enumerate(self.documents):
+            terms = tokenize(document.title) * TITLE_WEIGHT
+            passage_terms = []
+            for passage in document.passages:
+                tokens = tokenize(passage)
+                terms.extend(tokens)
+                passage_terms.append(frozenset(tokens))
+            self.passage_terms.append(tuple(passage_terms))
+            self.lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                self.postings[term].append((index, frequency))
+
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+        count = len(self.documents)
+        self.idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+        self.postings = dict(self.postings)
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Best matching documents as (document, score, snippet), highest score first"""
+        terms = set(tokenize(query))
+        scores = defaultdict(float)
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for index, frequency in self.postings[term]:
+                norm = K1 * (1 - B + B * self.lengths[index] / self.average_length)
+                scores[index] += idf * frequency * (K1 + 1) / (frequency + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(self.documents[index], score, self.snippet(index, terms)) for index, score in ranked]
+
+    def snippet(self, index, terms):
+        """The passage with most query terms, trimmed around the first match and highlighted"""
+        passages = self.documents[index].passages
+        if not passages:
+            return ''
+        hits = [len(terms & passage_terms) for passage_terms in self.passage_terms[index]]
+        return highlight(passages[hits.index(max(hits))], terms)
+
+
+def highlight(passage, terms):
+    """About SNIPPET_LENGTH characters of the passage, from just before its first match, matches in <mark>"""
+    words = passage.split()
+    matched = [bool(terms.intersection(tokenize(word))) for word in words]
+    start = max(0, matched.index(True) - 8) if True in matched else 0
+
+    parts, length = ['…'] if start else [], 0
+    for word, is_match in zip(words[start:], matched[start:]):
+        if length + len(word) > SNIPPET_LENGTH:
+            parts.append('…')
+            break
+        length += len(word) + 1
+        parts.append(f'<mark>{escape(word)}</mark>' if is_match else escape(word))
+    return mark_safe(' '.join(parts))
+
+
+def _plain(html):
+    return re.sub(r'\s+', ' ', strip_tags(html.replace('<br>', ' '))).strip()
+
+
+def guide_documents():
+    """A document per guide section and per FAQ"""
+    for section_id, section in SECTION_CONTENT.items():
+        passages = [section['explainer']['title'], *section['explainer']['content'],
+                    section['impact']['title'], *section['impact']['content']]
+        yield Document(
+            kind='section',
+            key=section_id,
+            title=section['title'],
+            category="Renters' Rights Act Guide",
+            passages=tuple(_plain(passage) for passage in passages),
+        )
+
+    for index, faq in enumerate(FAQS):
+        yield Document(
+            kind='faq',
+            key=str(index),
+            title=faq['question'],
+            category=faq['category'],
+            passages=(_plain(faq['answer']),),
+        )
+
+
+GUIDE_INDEX = GuideIndex(guide_documents())
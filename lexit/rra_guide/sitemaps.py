@@ -0,0 +1,17 @@
+from django.contrib.sitemaps import Sitemap
+from django.urls import reverse
+
+from .content import GUIDE_SECTIONS
+
+
+class RRAGuideSitemap(Sitemap):
+    changefreq = 'monthly'
+    priority = 0.7
+
+    def items(self):
+        return ['home', 'faqs'] + [section['id'] for section in GUIDE_SECTIONS]
+
+    def location(self, item):
+        if item in ('home', 'faqs'):
+            return reverse(f'rra_guide:{item}')
+        return reverse('rra_guide:section_detail', kwargs={'section_id': item})
@@ -1,3 +1,100 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from user_home.models import Property
+
+from . import views
+from .content import SECTION_CONTENT, SECTION_IDS
+from .search import GUIDE_INDEX, highlight
+
+
+class GuideContentStoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='landlord', password='safe-password-123')
+        self.client.login(username='landlord', password='safe-password-123')
+        self.url = reverse('rra_guide:section_detail', kwargs={'section_id': 'pets'})
+
+    def test_content_is_immutable(self):
+        with self.assertRaises(TypeError):
+            SECTION_CONTENT['pets']['title'] = 'Changed'
+        self.assertIsInstance(SECTION_CONTENT['pets']['impact']['content'], tuple)
+
+    def test_section_page_is_served_from_the_store(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, SECTION_CONTENT['pets']['explainer']['title'])
+        self.assertEqual(response.context['prev_section'], 'discrimination')
+        self.assertEqual(response.context['next_section'], 'database')
+
+        last = self.client.get(reverse('rra_guide:section_detail', kwargs={'section_id': SECTION_IDS[-1]}))
+        self.assertIsNone(last.context['next_section'])
+
+        missing = self.client.get(reverse('rra_guide:section_detail', kwargs={'section_id': 'nope'}))
+        self.assertTemplateUsed(missing, 'rra_guide/section_not_found.html')
+
+    def test_sections_are_rendered_once(self):
+        views.section_html.cache_clear()
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(views.section_html.cache_info().misses, 1)
+
+    def test_unchanged_pages_get_304(self):
+        # The first page view issues the CSRF cookie, which the ETag covers
+        self.client.get(self.url)
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        faqs = self.client.get(reverse('rra_guide:faqs'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(faqs.status_code, 200)
+
+    def test_etag_changes_with_the_users_properties(self):
+        self.client.get(self.url)
+        etag = self.client.get(self.url)['ETag']
+        Property.objects.create(owner=self.user, property_name='New Flat')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'New Flat')
+
+
+class GuideSearchTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='landlord', password='safe-password-123')
+        self.client.login(username='landlord', password='safe-password-123')
+        self.url = reverse('rra_guide:search')
+
+    def test_ranks_sections_and_faqs_with_highlighted_snippets(self):
+        with self.assertNumQueries(2):  # session and user only
+            response = self.client.get(self.url, {'q': 'Can I refuse pets?'})
+        data = response.json()
+        self.assertTrue(data['success'])
+
+        titles = [result['title'] for result in data['results']]
+        self.assertIn('Pets', titles[:3])
+        self.assertEqual(data['results'][0]['type'], 'faq')
+        self.assertRegex(data['results'][0]['url'], r'/faqs/#faq-\d+$')
+        self.assertIn('<mark>', data['results'][0]['snippet'])
+
+        section = next(result for result in data['results'] if result['type'] == 'section')
+        self.assertEqual(section['url'], reverse('rra_guide:section_detail', kwargs={'section_id': 'pets'}))
+
+    def test_plurals_match_and_scores_descend(self):
+        results = GUIDE_INDEX.search('tenancies evictions')
+        self.assertTrue(results)
+        scores = [score for _, score, _ in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_snippets_are_escaped(self):
+        snippet = highlight('Use <b>section 8</b> notices', {'section'})
+        self.assertIn('&lt;b&gt;', snippet)
+        self.assertIn('<mark>', snippet)
+
+    def test_empty_and_unknown_queries(self):
+        response = self.client.get(self.url, {'q': '  '})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+        response = self.client.get(self.url, {'q': 'zzqx'})
+        self.assertEqual(response.json()['results'], [])
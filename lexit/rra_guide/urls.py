@@ -7,4 +7,5 @@ urlpatterns = [
     path('', views.rra_guide_home, name='home'),
     path('section/<str:section_id>/', views.rra_section_detail, name='section_detail'),
     path('faqs/', views.rra_faqs, name='faqs'),
+    path('search/', views.rra_search, name='search'),
 ]
\ No newline at end of file
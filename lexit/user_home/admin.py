@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Property, PropertyImage, PropertyDocument, Testimonial
+from .models import Property, PropertyImage, PropertyDocument, RentReview, Testimonial
 
 @admin.register(Property)
 class PropertyAdmin(admin.ModelAdmin):
@@ -53,6 +53,13 @@ class PropertyDocumentAdmin(admin.ModelAdmin):
     list_filter = ['document_type', 'date_uploaded']
     search_fields = ['property__property_name', 'title', 'description']
 
+@admin.register(RentReview)
+class RentReviewAdmin(admin.ModelAdmin):
+    list_display = ['property', 'current_weekly_rent', 'proposed_weekly_rent', 'effective_date', 'status']
+    list_filter = ['status', 'effective_date']
+    search_fields = ['property__property_name', 'property__owner__username']
+    readonly_fields = ['created_at', 'updated_at']
+
 
 @admin.register(Testimonial)
 class TestimonialAdmin(admin.ModelAdmin):
@@ -4,3 +4,27 @@ from django.apps import AppConfig
 class UserHomeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'user_home'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from lexit.image_derivatives import derivatives_ready, register_image_field
+        from lexit.page_cache import invalidate_on_change, invalidate_page_cache
+        from .models import Property, PropertyDocument, PropertyImage, Testimonial
+        from .storage import track_blob_references
+        from .utils.document_search import queue_on_save, remove_from_search_index
+
+        # The landing page shows active testimonials
+        invalidate_on_change(Testimonial)
+        derivatives_ready.connect(invalidate_page_cache, sender=Testimonial, dispatch_uid='page_cache:testimonial:images')
+
+        register_image_field(Property, 'property_image')
+        register_image_field(PropertyImage, 'image')
+        register_image_field(Testimonial, 'author_image')
+
+        # Images and documents are stored once per distinct file, and shared
+        track_blob_references(PropertyImage, 'image')
+        track_blob_references(PropertyDocument, 'file')
+
+        post_save.connect(queue_on_save, sender=PropertyDocument, dispatch_uid='document_search:save')
+        post_delete.connect(remove_from_search_index, sender=PropertyDocument, dispatch_uid='document_search:delete')
@@ -0,0 +1,39 @@
+"""
+Cloudinary storage for content-addressed files (user_home.storage).
+
+MediaCloudinaryStorage uploads with use_filename, so Cloudinary adds a random
+suffix to every name, and images lose their extension. A content-addressed
+file has to be found again under the name worked out from its hash, so this
+storage uploads to exactly that public id, doesn't overwrite a file that is
+already there, and returns the name it was given.
+
+Everything is stored as a raw resource: Cloudinary won't take a DOCX as an
+image, and a raw public id keeps its extension, so the WebP and JPEG copies
+of an image don't end up with the same id.
+"""
+import cloudinary.uploader
+from cloudinary_storage.storage import RESOURCE_TYPES, MediaCloudinaryStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ExactNameCloudinaryStorage(MediaCloudinaryStorage):
+    RESOURCE_TYPE = RESOURCE_TYPES['RAW']
+
+    def _save(self, name, content):
+        name = self._normalise_name(name)
+        cloudinary.uploader.upload(
+            UploadedFile(content, name),
+            public_id=self._prepend_prefix(name),
+            resource_type=self.RESOURCE_TYPE,
+            tags=self.TAG,
+            overwrite=False,
+            unique_filename=False,
+        )
+        return name
+
+    def delete(self, name):
+        response = cloudinary.uploader.destroy(self._prepend_prefix(self._normalise_name(name)), invalidate=True,
+                                               resource_type=self.RESOURCE_TYPE)
+        return response['result'] == 'ok'
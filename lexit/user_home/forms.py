@@ -115,6 +115,20 @@ class PropertyForm(forms.ModelForm):
             'uk_taxfree_allowance': forms.CheckboxInput(attrs={
                 'class': 'w-4 h-4 text-pink-600 bg-gray-100 border-gray-300 rounded focus:ring-pink-500 focus:ring-2'
             }),
+            'prs_registered': forms.CheckboxInput(attrs={
+                'class': 'w-4 h-4 text-pink-600 bg-gray-100 border-gray-300 rounded focus:ring-pink-500 focus:ring-2'
+            }),
+            'decent_homes_compliant': forms.NullBooleanSelect(attrs={
+                'class': 'w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-pink-500 focus:border-pink-500 transition-colors'
+            }),
+            'open_hazard_reports': forms.NumberInput(attrs={
+                'class': 'w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-pink-500 focus:border-pink-500 transition-colors',
+                'min': '0'
+            }),
+            'last_rent_increase_date': forms.DateInput(attrs={
+                'class': 'w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-pink-500 focus:border-pink-500 transition-colors',
+                'type': 'date'
+            }),
             'property_image': forms.ClearableFileInput(attrs={
                 'class': 'w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-pink-500 focus:border-pink-500 transition-colors'
             }),
@@ -130,6 +144,10 @@ class PropertyForm(forms.ModelForm):
         self.fields['number_bedrooms'].required = True
         self.fields['number_bathrooms'].required = True
         self.fields['purchase_price'].required = True
+        self.fields['open_hazard_reports'].required = False
+
+    def clean_open_hazard_reports(self):
+        return self.cleaned_data.get('open_hazard_reports') or 0
 
 
 class PropertyImageForm(forms.ModelForm):
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from user_home.storage import BLOB_GRACE_PERIOD, GC_BATCH_SIZE, collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Delete stored image and document files that no property image or document uses any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=int(BLOB_GRACE_PERIOD.total_seconds() // 3600),
+                            help='Only delete files unused for longer than this')
+        parser.add_argument('--batch-size', type=int, default=GC_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Count the files without deleting them')
+
+    def handle(self, *args, **options):
+        count = collect_garbage(timedelta(hours=options['hours']), options['batch_size'], options['dry_run'])
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {count} unused stored files'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from lexit.image_derivatives import REGISTERED_FIELDS, derivatives_field, generate_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Make resized copies of uploaded images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Remake the copies of every image')
+
+    def handle(self, *args, **options):
+        for model, field_name in REGISTERED_FIELDS:
+            rows = (model._default_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                    .order_by('pk').values_list('pk', field_name, derivatives_field(field_name)))
+            made = failed = 0
+            for pk, name, derivatives in rows.iterator():
+                if not options['force'] and (derivatives or {}).get('source') == name:
+                    continue
+                try:
+                    made += generate_derivatives(model, pk, field_name)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'{model._meta.label} {pk}: {e}')
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}.{field_name}: {made} images resized, {failed} failed'
+            ))
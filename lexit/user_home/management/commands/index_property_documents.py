@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from user_home.models import PropertyDocument
+from user_home.utils.document_search import extract_document, get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Extract the text of property documents not yet extracted, and index them for search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Rebuild the whole search index from the extracted text afterwards')
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Documents indexed per batch when rebuilding (default 200)')
+
+    def handle(self, *args, **options):
+        if get_backend() is None:
+            self.stdout.write(self.style.WARNING('This database has no full-text search support, nothing to do'))
+            return
+
+        pending = (PropertyDocument.objects.exclude(extracted_text__source=F('file'))
+                   .order_by('pk').values_list('pk', flat=True))
+        extracted = 0
+        for pk in pending.iterator():
+            extracted += extract_document(pk)
+        self.stdout.write(f'Extracted the text of {extracted} documents')
+
+        if options['rebuild']:
+            count = rebuild_index(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Indexed {count} documents'))
@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from user_home.utils.uploads import STALE_UPLOAD_AGE, purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Abandon chunked document uploads that have stopped receiving chunks, deleting their parts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=int(STALE_UPLOAD_AGE.total_seconds() // 3600),
+                            help='Abandon uploads idle for longer than this')
+
+    def handle(self, *args, **options):
+        count = purge_stale_uploads(timedelta(hours=options['hours']))
+        self.stdout.write(self.style.SUCCESS(f'Abandoned {count} stale document uploads'))
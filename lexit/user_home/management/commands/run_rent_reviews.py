@@ -0,0 +1,32 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from user_home.utils.cashflow import RENTAL_GROWTH_RATE
+from user_home.utils.rent_review import REVIEW_BATCH_SIZE, run_rent_reviews
+
+
+class Command(BaseCommand):
+    help = 'Apply approved rent reviews that have taken effect and propose reviews for properties now due one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--growth-rate', type=str, default=str(RENTAL_GROWTH_RATE),
+                            help='Annual growth rate or market index change for suggested rents, e.g. 0.035')
+        parser.add_argument('--date', type=str, help='Run as of this date (YYYY-MM-DD) instead of today')
+        parser.add_argument('--batch-size', type=int, default=REVIEW_BATCH_SIZE, help='Reviews written per batch')
+
+    def handle(self, *args, **options):
+        try:
+            growth_rate = Decimal(options['growth_rate'])
+        except InvalidOperation:
+            raise CommandError(f"Invalid growth rate '{options['growth_rate']}'")
+        try:
+            today = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError(f"Invalid date '{options['date']}'")
+
+        result = run_rent_reviews(today, growth_rate, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Applied {result['applied']} approved rent reviews and proposed {result['proposed']} new ones"
+        ))
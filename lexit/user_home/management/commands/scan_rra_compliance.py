@@ -0,0 +1,41 @@
+import csv
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from user_home.models import Property
+from user_home.utils.compliance import RRA_COMPLIANCE, SCAN_BATCH_SIZE, portfolio_compliance
+
+
+class Command(BaseCommand):
+    help = "Scan properties against the Renters' Rights Act compliance rules"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Only scan this username\'s portfolio, and cache the report for them')
+        parser.add_argument('--csv', type=str, help='Also write the compliance matrix to this CSV file')
+        parser.add_argument('--batch-size', type=int, default=SCAN_BATCH_SIZE, help='Properties evaluated per batch')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+            report = portfolio_compliance(user)
+        else:
+            report = RRA_COMPLIANCE.scan(Property.objects.all(), batch_size=options['batch_size'])
+
+        for rule in report['rules']:
+            self.stdout.write(f"{rule['title']}: {rule['pass']} pass, {rule['warn']} warn, {rule['fail']} fail")
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {len(report['properties'])} properties: {report['non_compliant']} with a breach, "
+            f"estimated exposure £{report['total_exposure']:,}"
+        ))
+
+        if options['csv']:
+            with open(options['csv'], 'w', newline='') as output:
+                writer = csv.writer(output)
+                writer.writerow(['id', 'property_name', *(rule['code'] for rule in report['rules']), 'exposure'])
+                for row in report['properties']:
+                    writer.writerow([row['id'], row['property_name'], *row['statuses'], row['exposure']])
+            self.stdout.write(f"Wrote {options['csv']}")
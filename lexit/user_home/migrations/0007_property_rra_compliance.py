@@ -0,0 +1,33 @@
+# Generated by Django 5.1.14 on 2026-10-19 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_home', '0006_alter_property_city_alter_property_street_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='decent_homes_compliant',
+            field=models.BooleanField(blank=True, help_text='Property meets the Decent Homes Standard (blank if not assessed)', null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='last_rent_increase_date',
+            field=models.DateField(blank=True, help_text='Date the rent was last increased', null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='open_hazard_reports',
+            field=models.PositiveIntegerField(default=0, help_text="Unresolved hazard reports such as damp and mould (Awaab's Law)"),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='prs_registered',
+            field=models.BooleanField(default=False, help_text='Landlord and property are registered on the PRS database'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.14 on 2026-10-19 18:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_home', '0007_property_rra_compliance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RentReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('current_weekly_rent', models.DecimalField(decimal_places=0, help_text='Weekly rent when the review was proposed', max_digits=5)),
+                ('proposed_weekly_rent', models.DecimalField(decimal_places=0, help_text='Suggested new weekly rent', max_digits=5)),
+                ('growth_rate', models.DecimalField(decimal_places=4, help_text='Annual growth rate the suggestion is based on', max_digits=6)),
+                ('effective_date', models.DateField(help_text='Earliest date the new rent can take effect')),
+                ('status', models.CharField(choices=[('proposed', 'Proposed'), ('approved', 'Approved'), ('applied', 'Applied'), ('declined', 'Declined')], default='proposed', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rent_reviews', to='user_home.property')),
+            ],
+            options={
+                'ordering': ['effective_date', 'id'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['proposed', 'approved'])), fields=('property',), name='one_open_rent_review_per_property')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.14 on 2026-10-19 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_home', '0008_rent_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='property_image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the property image'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the image'),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='author_image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the author image'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.14 on 2026-10-19 19:03
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_home', '0009_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertydocument',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the file contents', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='propertydocument',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, help_text='File size in bytes', null=True),
+        ),
+        migrations.CreateModel(
+            name='DocumentUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('document_type', models.CharField(choices=[('deed', 'Property Deed'), ('survey', 'Survey Report'), ('epc', 'Energy Performance Certificate'), ('insurance', 'Insurance Document'), ('lease', 'Lease Agreement'), ('mortgage', 'Mortgage Document'), ('other', 'Other Document')], max_length=20)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, max_length=500)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Total size of the file in bytes')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Bytes received so far')),
+                ('parts', models.JSONField(blank=True, default=list, help_text='Storage names of the chunks received, in order')),
+                ('expected_sha256', models.CharField(blank=True, help_text='SHA-256 the client says the file has, checked when it completes', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_uploads', to='user_home.property')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
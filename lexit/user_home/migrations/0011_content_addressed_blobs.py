@@ -0,0 +1,38 @@
+# Generated by Django 5.1.14 on 2026-10-19 19:06
+
+import user_home.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_home', '0010_chunked_document_uploads'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='propertydocument',
+            name='file',
+            field=models.FileField(storage=user_home.storage.blob_storage, upload_to='property_documents/%Y/%m/'),
+        ),
+        migrations.AlterField(
+            model_name='propertyimage',
+            name='image',
+            field=models.ImageField(storage=user_home.storage.blob_storage, upload_to='property_images/%Y/%m/'),
+        ),
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'updated_at'], name='user_home_b_ref_cou_66c925_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.14 on 2026-10-19 19:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# The DDL as it was when this migration was written; user_home.utils.document_search may change later
+CREATE_SQL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS user_home_document_search_index "
+        "USING fts5(title, description, body, owner_id UNINDEXED, tokenize='porter unicode61')",
+    ],
+    'postgresql': [
+        "CREATE TABLE IF NOT EXISTS user_home_document_search_index ("
+        "document_id bigint PRIMARY KEY REFERENCES user_home_propertydocument (id) "
+        "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        "owner_id integer NOT NULL, "
+        "content text NOT NULL, "
+        "document tsvector NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS user_home_document_search_gin ON user_home_document_search_index USING gin (document)",
+        "CREATE INDEX IF NOT EXISTS user_home_document_search_owner ON user_home_document_search_index (owner_id)",
+    ],
+}
+DROP_SQL = {
+    'sqlite': ["DROP TABLE IF EXISTS user_home_document_search_index"],
+    'postgresql': ["DROP TABLE IF EXISTS user_home_document_search_index"],
+}
+
+
+def create_search_index(apps, schema_editor):
+    for sql in CREATE_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    for sql in DROP_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    """
+    Text extracted from property documents, and the full-text search table
+    over it: tsvector + GIN index on Postgres, FTS5 on SQLite. Run the
+    index_property_documents command afterwards to extract and index
+    existing documents.
+    """
+
+    dependencies = [
+        ('user_home', '0011_content_addressed_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentText',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='extracted_text', serialize=False, to='user_home.propertydocument')),
+                ('source', models.CharField(db_index=True, help_text='Name of the file the text came from', max_length=100)),
+                ('status', models.CharField(choices=[('extracted', 'Extracted'), ('unsupported', 'Unsupported file type'), ('failed', 'Failed')], max_length=12)),
+                ('text', models.TextField(blank=True)),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
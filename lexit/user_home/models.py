@@ -4,6 +4,10 @@ from django.urls import reverse
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
 from datetime import date
+import uuid
+from lexit.image_derivatives import image_sources
+from lexit.media_urls import file_url, static_image_url
+from .storage import blob_storage
 
 class Property(models.Model):
     PROPERTY_TYPES = [
@@ -38,6 +42,7 @@ class Property(models.Model):
 
     # Property Image
     property_image = models.ImageField(upload_to='property_images/', blank=True, null=True)
+    property_image_derivatives = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of the property image")
 
     # Address Information
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='properties')
@@ -81,6 +86,12 @@ class Property(models.Model):
     uk_resident = models.BooleanField(default=True, help_text="Is the property owner a UK resident?")
     uk_taxfree_allowance = models.BooleanField(default=True, help_text="Is the property owner eligible for UK tax-free allowance?")
 
+    # Renters' Rights Act Compliance
+    prs_registered = models.BooleanField(default=False, help_text="Landlord and property are registered on the PRS database")
+    decent_homes_compliant = models.BooleanField(null=True, blank=True, help_text="Property meets the Decent Homes Standard (blank if not assessed)")
+    open_hazard_reports = models.PositiveIntegerField(default=0, help_text="Unresolved hazard reports such as damp and mould (Awaab's Law)")
+    last_rent_increase_date = models.DateField(blank=True, null=True, help_text="Date the rent was last increased")
+
     # Management
     slug = models.SlugField(unique=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -142,44 +153,51 @@ class Property(models.Model):
             # Default fallback
             return 'uk_individual'
     
+    @property
+    def property_image_sources(self):
+        """URLs of the property image and its resized copies for srcset, None if there is no image"""
+        return image_sources(self, 'property_image')
+
     @property
     def get_property_image_url(self):
         """Return the property image URL or default image if none uploaded"""
-        if self.property_image and hasattr(self.property_image, 'url') and self.property_image.name:
-            try:
-                return self.property_image.url
-            except Exception:
-                # If there's any error accessing the image URL, return default
-                from django.conf import settings
-                return f"{settings.STATIC_URL}images/lexit_image.png"
-        else:
-            # Return default image from static folder
-            from django.conf import settings
-            return f"{settings.STATIC_URL}images/lexit_image.png"
+        return file_url(self, 'property_image', fallback=static_image_url('lexit_image.png'))
     
     class Meta:
         verbose_name_plural = "Properties"
         ordering = ['-created_at']
 
 
+class Blob(models.Model):
+    """A file in content-addressed storage, with the number of rows that use it"""
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['ref_count', 'updated_at'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+
 class PropertyImage(models.Model):
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='property_images/%Y/%m/')
+    image = models.ImageField(upload_to='property_images/%Y/%m/', storage=blob_storage)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of the image")
     caption = models.CharField(max_length=200, blank=True)
     is_main_image = models.BooleanField(default=False, help_text="Is this the main property image?")
     date_uploaded = models.DateTimeField(auto_now_add=True)
     
+    def image_sources(self):
+        """URLs of the image and its resized copies for srcset"""
+        return image_sources(self, 'image')
+
     def get_image_url(self):
         """Return the image URL with error handling"""
-        if self.image and hasattr(self.image, 'url') and self.image.name:
-            try:
-                return self.image.url
-            except Exception:
-                from django.conf import settings
-                return f"{settings.STATIC_URL}images/lexit_image.png"
-        else:
-            from django.conf import settings
-            return f"{settings.STATIC_URL}images/lexit_image.png"
+        return file_url(self, 'image', fallback=static_image_url('lexit_image.png'))
     
     class Meta:
         ordering = ['-is_main_image', 'date_uploaded']
@@ -208,8 +226,10 @@ class PropertyDocument(models.Model):
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='documents')
     document_type = models.CharField(max_length=20, choices=DOCUMENT_TYPES)
     title = models.CharField(max_length=200)
-    file = models.FileField(upload_to='property_documents/%Y/%m/')
+    file = models.FileField(upload_to='property_documents/%Y/%m/', storage=blob_storage)
     description = models.TextField(max_length=500, blank=True)
+    size = models.PositiveBigIntegerField(blank=True, null=True, help_text="File size in bytes")
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 of the file contents")
     date_uploaded = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -219,6 +239,84 @@ class PropertyDocument(models.Model):
         return f"{self.title} - {self.property.property_name}"
 
 
+class DocumentText(models.Model):
+    """Text pulled out of a PropertyDocument's file for search, see utils/document_search.py"""
+    EXTRACTED = 'extracted'
+    UNSUPPORTED = 'unsupported'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (EXTRACTED, 'Extracted'),
+        (UNSUPPORTED, 'Unsupported file type'),
+        (FAILED, 'Failed'),
+    ]
+
+    document = models.OneToOneField(PropertyDocument, on_delete=models.CASCADE, primary_key=True,
+                                    related_name='extracted_text')
+    source = models.CharField(max_length=100, db_index=True, help_text="Name of the file the text came from")
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES)
+    text = models.TextField(blank=True)
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Text of {self.document_id} ({self.get_status_display()})"
+
+
+class DocumentUpload(models.Model):
+    """A PropertyDocument being uploaded in chunks, which becomes the document once every byte has arrived"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='document_uploads')
+    document_type = models.CharField(max_length=20, choices=PropertyDocument.DOCUMENT_TYPES)
+    title = models.CharField(max_length=200)
+    description = models.TextField(max_length=500, blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Total size of the file in bytes")
+    offset = models.PositiveBigIntegerField(default=0, help_text="Bytes received so far")
+    parts = models.JSONField(default=list, blank=True, help_text="Storage names of the chunks received, in order")
+    expected_sha256 = models.CharField(max_length=64, blank=True, help_text="SHA-256 the client says the file has, checked when it completes")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size} bytes) - {self.property.property_name}"
+
+
+class RentReview(models.Model):
+    """A proposed Section 13 rent increase, applied once the landlord approves it"""
+    PROPOSED = 'proposed'
+    APPROVED = 'approved'
+    APPLIED = 'applied'
+    DECLINED = 'declined'
+    STATUS_CHOICES = [
+        (PROPOSED, 'Proposed'),
+        (APPROVED, 'Approved'),
+        (APPLIED, 'Applied'),
+        (DECLINED, 'Declined'),
+    ]
+    OPEN_STATUSES = (PROPOSED, APPROVED)
+
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='rent_reviews')
+    current_weekly_rent = models.DecimalField(max_digits=5, decimal_places=0, help_text="Weekly rent when the review was proposed")
+    proposed_weekly_rent = models.DecimalField(max_digits=5, decimal_places=0, help_text="Suggested new weekly rent")
+    growth_rate = models.DecimalField(max_digits=6, decimal_places=4, help_text="Annual growth rate the suggestion is based on")
+    effective_date = models.DateField(help_text="Earliest date the new rent can take effect")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PROPOSED)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['effective_date', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['property'], condition=models.Q(status__in=['proposed', 'approved']),
+                                    name='one_open_rent_review_per_property'),
+        ]
+
+    def __str__(self):
+        return f"{self.property.property_name}: £{self.current_weekly_rent} to £{self.proposed_weekly_rent} from {self.effective_date}"
+
+
 class Testimonial(models.Model):
     """Model for storing customer testimonials"""
     quote = models.CharField(max_length=500, help_text="The main testimonial quote")
@@ -226,12 +324,20 @@ class Testimonial(models.Model):
     author_name = models.CharField(max_length=100, help_text="Name of the person giving the testimonial")
     author_role = models.CharField(max_length=100, help_text="Job title or role of the testimonial author")
     author_image = models.ImageField(upload_to='testimonials/', blank=True, null=True, help_text="Photo of the testimonial author")
+    author_image_derivatives = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of the author image")
     social_media_link = models.URLField(blank=True, null=True, help_text="LinkedIn, Twitter, or other social media profile")
     is_active = models.BooleanField(default=True, help_text="Whether this testimonial should be displayed")
     display_order = models.PositiveIntegerField(default=0, help_text="Order in which testimonials should be displayed")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Static images for specific authors without an uploaded one
+    AUTHOR_IMAGES = {
+        'Rebecca Harris': 'testimonial_1.png',
+        'James Chen': 'testimonial_2.png',
+        'Sarah Mitchell': 'testimonial_3.png',
+    }
+
     class Meta:
         ordering = ['display_order', '-created_at']
         verbose_name = "Testimonial"
@@ -240,35 +346,14 @@ class Testimonial(models.Model):
     def __str__(self):
         return f"{self.author_name} - {self.quote[:50]}..."
     
+    @property
+    def author_image_sources(self):
+        """URLs of the author image and its resized copies for srcset, None if there is no image"""
+        return image_sources(self, 'author_image')
+
     @property
     def get_author_image_url(self):
         """Return the author image URL or default image if none uploaded"""
-        # Use uploaded image if available
-        if self.author_image and hasattr(self.author_image, 'url') and self.author_image.name:
-            try:
-                return self.author_image.url
-            except Exception:
-                # If there's any error accessing the image URL, continue to fallback
-                pass
-        
-        # Fallback: Try to use a specific static image based on author name
-        from django.conf import settings
-        
-        # Map specific authors to specific testimonial images
-        author_image_map = {
-            'Rebecca Harris': 'testimonial_1.png',
-            'James Chen': 'testimonial_2.png', 
-            'Sarah Mitchell': 'testimonial_3.png'
-        }
-        
-        try:
-            if self.author_name in author_image_map:
-                return f"{settings.STATIC_URL}images/{author_image_map[self.author_name]}"
-        except Exception:
-            pass
-        
-        # Final fallback to default image
-        try:
-            return f"{settings.STATIC_URL}images/tesitimonial_girl.png"
-        except Exception:
-            return "/static/images/tesitimonial_girl.png"
+        # Use uploaded image if available, else a specific static image for the author
+        author_image = self.AUTHOR_IMAGES.get(self.author_name, 'tesitimonial_girl.png')
+        return file_url(self, 'author_image', fallback=static_image_url(author_image))
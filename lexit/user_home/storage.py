@@ -0,0 +1,241 @@
+"""
+Content-addressed storage for property images and documents.
+
+Files are stored under the SHA-256 of their contents, so the same EPC
+certificate or photo uploaded to several properties, or uploaded again after
+an edit, is kept once; the second upload just points at the first one's
+file. Each stored file has a Blob row counting the rows that use it, kept up
+to date by the signal receivers connected with track_blob_references, and
+collect_garbage deletes files nobody has used for a while, with their
+resized copies.
+
+Files go to the storage called 'blobs' in settings.STORAGES, or the default
+storage if there isn't one. It has to save a file under exactly the name it
+is given, which FileSystemStorage does for a name that isn't taken but
+MediaCloudinaryStorage never does; production uses ExactNameCloudinaryStorage.
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import Storage, default_storage, storages
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from lexit.image_derivatives import delete_derivatives
+
+BLOB_PREFIX = 'blobs'
+BLOB_STORAGE_ALIAS = 'blobs'
+# An unused file is only deleted after this long, in case an upload of the same bytes is on its way
+BLOB_GRACE_PERIOD = timedelta(days=1)
+GC_BATCH_SIZE = 500
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def blob_name(digest, extension):
+    return f'{BLOB_PREFIX}/{digest[:2]}/{digest}{extension.lower()}'
+
+
+def normalize_name(name):
+    """A stored name without the prefix Cloudinary's storages put in front of it"""
+    prefix = ((getattr(settings, 'CLOUDINARY_STORAGE', None) or {}).get('PREFIX') or settings.MEDIA_URL or '').strip('/')
+    if prefix and name.startswith(f'{prefix}/'):
+        return name[len(prefix) + 1:]
+    return name
+
+
+def is_blob(name):
+    return bool(name) and normalize_name(name).startswith(f'{BLOB_PREFIX}/')
+
+
+def file_sha256(content):
+    hasher = hashlib.sha256()
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """
+    Saves files under the hash of their contents in the wrapped storage, and
+    doesn't write them again if that file already exists.
+
+    A file that already knows its SHA-256 (a chunked upload) can set a sha256
+    attribute, and is then read only once.
+    """
+
+    def __init__(self, wrapped=None):
+        self._wrapped = wrapped
+
+    @property
+    def wrapped(self):
+        if self._wrapped is not None:
+            return self._wrapped
+        if BLOB_STORAGE_ALIAS in settings.STORAGES:
+            return storages[BLOB_STORAGE_ALIAS]
+        return default_storage
+
+    def get_available_name(self, name, max_length=None):
+        # Names are worked out from the contents in _save
+        return name
+
+    def _save(self, name, content):
+        from .models import Blob
+
+        digest = getattr(content, 'sha256', None) or file_sha256(content)
+        name = blob_name(digest, os.path.splitext(name)[1])
+        # Keep the garbage collector off a file that is about to be used again
+        Blob.objects.filter(name=name).update(updated_at=timezone.now())
+        if self.wrapped.exists(name):
+            return name
+        if hasattr(content, 'seek') and content.seekable():
+            content.seek(0)
+        saved = self.wrapped.save(name, content)
+        if normalize_name(saved) == name:
+            return name
+        if self.wrapped.exists(name):
+            # The same bytes were saved under that name meanwhile, so this copy isn't needed
+            self.wrapped.delete(saved)
+            return name
+        self.wrapped.delete(saved)
+        raise ImproperlyConfigured(
+            f'{type(self.wrapped).__name__} saved {name} as {saved}; content-addressed files need a '
+            f'storage that keeps the names it is given, see STORAGES[{BLOB_STORAGE_ALIAS!r}]')
+
+    def _open(self, name, mode='rb'):
+        return self.wrapped.open(name, mode)
+
+    def delete(self, name):
+        self.wrapped.delete(name)
+
+    def exists(self, name):
+        return self.wrapped.exists(name)
+
+    def url(self, name):
+        return self.wrapped.url(name)
+
+    def size(self, name):
+        return self.wrapped.size(name)
+
+    def path(self, name):
+        return self.wrapped.path(name)
+
+    def listdir(self, path):
+        return self.wrapped.listdir(path)
+
+    def get_accessed_time(self, name):
+        return self.wrapped.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.wrapped.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.wrapped.get_modified_time(name)
+
+
+_blob_storage = ContentAddressedStorage()
+
+
+def blob_storage():
+    return _blob_storage
+
+
+def add_reference(name):
+    from .models import Blob
+
+    if not is_blob(name):
+        return
+    if Blob.objects.filter(name=name).update(ref_count=F('ref_count') + 1, updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            Blob.objects.create(name=name, sha256=os.path.basename(name).split('.')[0], ref_count=1)
+    except IntegrityError:
+        # Created by another request in the meantime
+        Blob.objects.filter(name=name).update(ref_count=F('ref_count') + 1, updated_at=timezone.now())
+
+
+def release_reference(name):
+    from .models import Blob
+
+    if is_blob(name):
+        Blob.objects.filter(name=name).update(ref_count=F('ref_count') - 1, updated_at=timezone.now())
+
+
+def _file_name(instance, field_name):
+    """The field's file name, without loading it if the field was deferred"""
+    value = instance.__dict__.get(field_name)
+    return getattr(value, 'name', value) or None
+
+
+def _remember_names(sender, instance, field_names=(), **kwargs):
+    instance._blob_names = {field_name: _file_name(instance, field_name)
+                            for field_name in field_names if field_name in instance.__dict__}
+
+
+def _update_references(sender, instance, raw=False, update_fields=None, field_names=(), **kwargs):
+    loaded = getattr(instance, '_blob_names', {})
+    for field_name in field_names:
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        if field_name not in loaded and field_name not in instance.__dict__:
+            continue
+        name = _file_name(instance, field_name)
+        if name != loaded.get(field_name):
+            add_reference(name)
+            release_reference(loaded.get(field_name))
+    _remember_names(sender, instance, field_names)
+
+
+def _release_references(sender, instance, field_names=(), **kwargs):
+    for field_name in field_names:
+        release_reference(_file_name(instance, field_name))
+
+
+def track_blob_references(model, *field_names):
+    """Count the rows of model using each stored file through field_names"""
+    uid = f'blob_references:{model._meta.label_lower}'
+    for signal, receiver in ((post_init, _remember_names), (post_save, _update_references),
+                             (post_delete, _release_references)):
+        signal.connect(_with_fields(receiver, field_names), sender=model, weak=False,
+                       dispatch_uid=f'{uid}:{receiver.__name__}')
+
+
+def _with_fields(receiver, field_names):
+    def wrapper(sender, instance, **kwargs):
+        receiver(sender, instance, field_names=field_names, **kwargs)
+    return wrapper
+
+
+def collect_garbage(grace_period=BLOB_GRACE_PERIOD, batch_size=GC_BATCH_SIZE, dry_run=False):
+    """Delete stored files no row has used for grace_period, in batches, returning how many were deleted"""
+    from .models import Blob
+
+    cutoff = timezone.now() - grace_period
+    deleted = 0
+    last_pk = 0
+    while True:
+        batch = list(Blob.objects.filter(pk__gt=last_pk, ref_count__lte=0, updated_at__lt=cutoff)
+                     .order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        last_pk = batch[-1]
+        if dry_run:
+            deleted += len(batch)
+            continue
+        with transaction.atomic():
+            # Checked again under the lock, in case something started using one since
+            blobs = list(Blob.objects.select_for_update()
+                         .filter(pk__in=batch, ref_count__lte=0, updated_at__lt=cutoff))
+            for blob in blobs:
+                # Resized copies are named after the blob, in the storage underneath
+                delete_derivatives(_blob_storage.wrapped, blob.name)
+                _blob_storage.wrapped.delete(blob.name)
+            Blob.objects.filter(pk__in=[blob.pk for blob in blobs]).delete()
+        deleted += len(blobs)
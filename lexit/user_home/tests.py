@@ -1,10 +1,29 @@
-from datetime import date
+import hashlib
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
 
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
-from .models import Property
+from .models import Blob, DocumentText, DocumentUpload, Property, PropertyDocument, RentReview
+from .storage import ContentAddressedStorage, collect_garbage, is_blob
+from .utils import compliance, document_search, fragments, portfolio, rent_review, uploads
+from .utils.dealgraph import DEAL_GRAPH, DEAL_GRAPH_INPUTS
+from .utils.refinance import refinance_optimiser
+from .views import _deal_data_from_post
 
 
 class PropertyAnalysisRegressionTests(TestCase):
@@ -62,3 +81,786 @@ class PropertyAnalysisRegressionTests(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Uploaded Test Property')
+
+
+class PortfolioWhatIfTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='investor',
+            email='investor@example.com',
+            password='safe-password-123',
+        )
+        self.client.login(username='investor', password='safe-password-123')
+        self.property = Property.objects.create(
+            owner=self.user,
+            property_name='Existing Flat',
+            city='Leeds',
+            postcode='LS11AA',
+            purchase_price=180000,
+            deposit_paid=45000,
+            estimated_market_value=200000,
+            weekly_rent=250,
+            annual_income=40000,
+            has_mortgage=True,
+            mortgage_type='principal_and_interest',
+            outstanding_mortgage_balance=120000,
+            mortgage_interest_rate=5,
+            mortgage_years_remaining=20,
+            date_of_purchase=date(2023, 1, 1),
+        )
+        self.property.refresh_from_db()
+
+    def test_projection_is_cached_until_property_changes(self):
+        with patch.object(portfolio, 'project_property_cashflow', wraps=portfolio.project_property_cashflow) as project:
+            portfolio.get_property_projection(self.property)
+            portfolio.get_property_projection(self.property)
+            self.assertEqual(project.call_count, 1)
+
+            self.property.weekly_rent = 300
+            self.property.save()
+            self.property.refresh_from_db()
+            portfolio.get_property_projection(self.property)
+            self.assertEqual(project.call_count, 2)
+
+    def test_what_if_combines_deal_with_existing_holdings(self):
+        response = self.client.post(reverse('user_home:analyse_deal_portfolio'), {
+            'deal_name': 'Candidate',
+            'purchase_price': '220000',
+            'deposit_paid': '55000',
+            'current_market_value': '220000',
+            'weekly_rent': '300',
+            'ownership_status': 'individual',
+            'is_uk_resident': 'on',
+            'has_mortgage': 'on',
+            'mortgage_type': 'repayment',
+            'mortgage_interest_rate': '5',
+            'mortgage_years_remaining': '25',
+            'annual_income': '40000',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['portfolio']['property_count'], 1)
+        self.assertEqual(data['with_deal']['property_count'], 2)
+        self.assertGreater(data['with_deal']['total_cash_deployed'], data['portfolio']['total_cash_deployed'])
+        self.assertAlmostEqual(
+            data['marginal']['year_1_net_cash_flow_after_tax'],
+            data['with_deal']['year_1_net_cash_flow_after_tax'] - data['portfolio']['year_1_net_cash_flow_after_tax'],
+        )
+
+
+class RefinanceOptimiserTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='refi',
+            email='refi@example.com',
+            password='safe-password-123',
+        )
+        self.client.login(username='refi', password='safe-password-123')
+        self.property = Property.objects.create(
+            owner=self.user,
+            property_name='Reset Flat',
+            city='York',
+            postcode='YO11AA',
+            purchase_price=200000,
+            deposit_paid=50000,
+            estimated_market_value=260000,
+            weekly_rent=280,
+            annual_income=45000,
+            has_mortgage=True,
+            mortgage_type='principal_and_interest',
+            outstanding_mortgage_balance=140000,
+            mortgage_interest_rate=5,
+            mortgage_years_remaining=20,
+            date_of_purchase=date(2022, 6, 1),
+        )
+        self.property.refresh_from_db()
+
+    def test_like_for_like_product_matches_current_mortgage(self):
+        candidate = {
+            'rate': Decimal('5'),
+            'term': 20,
+            'mortgage_type': 'principal_and_interest',
+            'arrangement_fee': Decimal('0'),
+            'ltv': None,
+        }
+        result = refinance_optimiser.optimise(self.property, [candidate])
+
+        self.assertEqual(result['candidates_evaluated'], 1)
+        best = result['results'][0]
+        self.assertEqual(best['equity_released'], 0)
+        self.assertAlmostEqual(best['ten_year_cash_vs_current'], Decimal('0'), places=2)
+        self.assertAlmostEqual(best['closing_mortgage_balance'],
+                               result['current']['closing_mortgage_balance'], places=2)
+
+    def test_unbounded_nrat_only_ranks_first_when_it_pays(self):
+        def candidate(rate, ltv):
+            return {'rate': Decimal(rate), 'term': 25, 'mortgage_type': 'interest_only',
+                    'arrangement_fee': Decimal('0'), 'ltv': ltv}
+
+        result = refinance_optimiser.optimise(
+            self.property, [candidate('12', Decimal('90')), candidate('5', None), candidate('1', Decimal('90'))],
+            rank_by='nrat',
+        )
+        ranked = [(r['rate'], r['nrat'], r['year_1_net_cash_flow_after_tax'] > 0) for r in result['results']]
+        # All the cash comes out at 90% LTV: worth it at 1%, losing money every year at 12%
+        self.assertEqual([rate for rate, _, _ in ranked], [Decimal('1'), Decimal('5'), Decimal('12')])
+        self.assertEqual(ranked[0][1:], (None, True))
+        self.assertIsNotNone(ranked[1][1])
+        self.assertEqual(ranked[2][1:], (None, False))
+
+    def test_endpoint_ranks_grid_by_ten_year_cash(self):
+        response = self.client.get(
+            reverse('user_home:property_refinance', kwargs={'slug': self.property.slug}),
+            {'rates': '4,6', 'terms': '20,25', 'fees': '0,999', 'ltvs': 'current,75', 'limit': '0'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['candidates_evaluated'], 32)
+        cash = [r['ten_year_after_tax_cash'] for r in data['results']]
+        self.assertEqual(cash, sorted(cash, reverse=True))
+        released = {r['ltv']: r['equity_released'] for r in data['results']}
+        self.assertEqual(released[None], 0)
+        self.assertEqual(released[75], 55000)
+
+    def test_endpoint_rejects_invalid_grid(self):
+        response = self.client.get(
+            reverse('user_home:property_refinance', kwargs={'slug': self.property.slug}),
+            {'rates': 'abc'},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+        response = self.client.get(
+            reverse('user_home:property_refinance', kwargs={'slug': self.property.slug}),
+            {'limit': '-3'},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class DealGraphTests(TestCase):
+    deal_form = {
+        'deal_name': 'Live Edit',
+        'purchase_price': '200000',
+        'deposit_paid': '50000',
+        'weekly_rent': '275',
+        'ownership_status': 'individual',
+        'is_uk_resident': 'on',
+        'has_mortgage': 'on',
+        'mortgage_type': 'repayment',
+        'mortgage_interest_rate': '5',
+        'mortgage_years_remaining': '25',
+        'management_fees': '10',
+        'annual_income': '40000',
+    }
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='editor', password='safe-password-123')
+        self.client.login(username='editor', password='safe-password-123')
+
+    def inputs(self, **overrides):
+        deal_data = _deal_data_from_post({**self.deal_form, **overrides})
+        return {name: deal_data[name] for name in DEAL_GRAPH_INPUTS}
+
+    def test_rate_change_only_recomputes_downstream_nodes(self):
+        values = DEAL_GRAPH.evaluate(self.inputs())
+        changed, recomputed = DEAL_GRAPH.update(values, self.inputs(mortgage_interest_rate='4'))
+
+        self.assertIn('financing', recomputed)
+        self.assertNotIn('operating', recomputed)
+        self.assertNotIn('total_cash_deployed', recomputed)
+        self.assertIn('annual_interest_payment', changed)
+        self.assertNotIn('gross_rent', changed)
+        self.assertEqual(DEAL_GRAPH.output_values(values),
+                         DEAL_GRAPH.output_values(DEAL_GRAPH.evaluate(self.inputs(mortgage_interest_rate='4'))))
+
+    def test_endpoint_returns_only_changed_outputs(self):
+        url = reverse('user_home:analyse_deal_recalculate')
+        first = self.client.post(url, self.deal_form).json()
+        self.assertTrue(first['success'])
+        self.assertEqual(set(first['outputs']), set(DEAL_GRAPH.outputs))
+
+        second = self.client.post(url, {**self.deal_form, 'weekly_rent': '300'}).json()
+        self.assertIn('gross_rent', second['outputs'])
+        self.assertNotIn('total_cash_deployed', second['outputs'])
+        self.assertNotIn('annual_interest_payment', second['outputs'])
+
+        unchanged = self.client.post(url, {**self.deal_form, 'weekly_rent': '300'}).json()
+        self.assertEqual(unchanged['outputs'], {})
+        self.assertEqual(unchanged['recomputed'], [])
+
+
+class PropertySectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='sections', password='safe-password-123')
+        self.client.login(username='sections', password='safe-password-123')
+        self.property = Property.objects.create(
+            owner=self.user,
+            property_name='Lazy House',
+            city='Bath',
+            postcode='BA11AA',
+            purchase_price=250000,
+            deposit_paid=60000,
+            estimated_market_value=0,
+            weekly_rent=320,
+            annual_income=50000,
+            date_of_purchase=date(2021, 3, 1),
+        )
+
+    def section_url(self, section):
+        return reverse('user_home:property_section', args=[self.property.slug, section])
+
+    def test_detail_page_defers_heavy_sections(self):
+        response = self.client.get(reverse('user_home:property_detail', args=[self.property.slug]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('cashflow_projection', response.context)
+        for section in ('cashflow', 'capital-growth', 'investment-summary'):
+            self.assertContains(response, self.section_url(section))
+
+    def test_sections_render_and_are_cached(self):
+        for section, heading in (('cashflow', 'Cash Flow Forecast'),
+                                 ('capital-growth', 'Capital Growth Analysis'),
+                                 ('investment-summary', 'Investment Summary')):
+            response = self.client.get(self.section_url(section), {'v': '1'})
+            self.assertContains(response, heading)
+            self.assertIn('max-age', response['Cache-Control'])
+
+        with patch('user_home.views.capital_growth_scenarios') as scenarios:
+            response = self.client.get(self.section_url('capital-growth'))
+        self.assertEqual(response.status_code, 200)
+        scenarios.assert_not_called()
+
+    def test_template_version_invalidates_cached_sections(self):
+        self.client.get(self.section_url('cashflow'))
+
+        with patch('user_home.views.PROPERTY_SECTION_TEMPLATE_VERSION', 99), \
+                patch('user_home.views.render_to_string', return_value='new markup') as render:
+            response = self.client.get(self.section_url('cashflow'))
+            detail = self.client.get(reverse('user_home:property_detail', args=[self.property.slug]))
+
+        render.assert_called_once()
+        self.assertEqual(response.content, b'new markup')
+        self.assertTrue(detail.context['section_version'].startswith('t99-'))
+
+    def test_unknown_section_and_other_owner_are_not_found(self):
+        self.assertEqual(self.client.get(self.section_url('everything')).status_code, 404)
+
+        User.objects.create_user(username='intruder', password='safe-password-123')
+        self.client.login(username='intruder', password='safe-password-123')
+        self.assertEqual(self.client.get(self.section_url('cashflow')).status_code, 404)
+
+
+class PropertyCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='landlord', password='safe-password-123')
+        self.client.login(username='landlord', password='safe-password-123')
+        self.properties = [
+            Property.objects.create(
+                owner=self.user,
+                property_name=f'Card {number}',
+                city='Hull',
+                postcode='HU11AA',
+                purchase_price=150000,
+                estimated_market_value=165000,
+                weekly_rent=200,
+                date_of_purchase=date(2020, 1, 1),
+            )
+            for number in range(3)
+        ]
+
+    def test_cards_render_from_cache_until_property_changes(self):
+        with patch.object(fragments, 'render_to_string', wraps=fragments.render_to_string) as render:
+            first = fragments.render_property_cards(self.properties)
+            second = fragments.render_property_cards(self.properties)
+            self.assertEqual(render.call_count, 3)
+            self.assertEqual(first, second)
+
+            self.properties[1].estimated_market_value = 170000
+            self.properties[1].save()
+            cards = fragments.render_property_cards(self.properties)
+            self.assertEqual(render.call_count, 4)
+            self.assertIn('170,000', cards[1])
+
+    def test_property_list_and_dashboard_render_cards(self):
+        response = self.client.get(reverse('user_home:property_list'))
+        self.assertEqual(response.status_code, 200)
+        for property_obj in self.properties:
+            self.assertContains(response, reverse('user_home:property_detail', args=[property_obj.slug]))
+
+        response = self.client.get(reverse('user_home:user_home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'property-card-wrapper', count=3)
+
+
+class ComplianceScannerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='agency', password='safe-password-123')
+        self.client.login(username='agency', password='safe-password-123')
+        self.compliant = Property.objects.create(
+            owner=self.user,
+            property_name='Good House',
+            city='York',
+            postcode='YO11AA',
+            purchase_price=200000,
+            weekly_rent=300,
+            date_of_purchase=date(2020, 1, 1),
+            epc_rating='B',
+            prs_registered=True,
+            decent_homes_compliant=True,
+            last_rent_increase_date=date(2024, 1, 1),
+        )
+        self.breaching = Property.objects.create(
+            owner=self.user,
+            property_name='Damp Flat',
+            city='York',
+            postcode='YO12AA',
+            purchase_price=150000,
+            weekly_rent=240,
+            date_of_purchase=date(2020, 1, 1),
+            epc_rating='F',
+            decent_homes_compliant=False,
+            open_hazard_reports=2,
+            last_rent_increase_date=date(2025, 3, 1),
+        )
+
+    def test_statuses_and_exposure(self):
+        report = compliance.RRA_COMPLIANCE.scan(Property.objects.all(), today=date(2025, 6, 1))
+        rows = {row['property_name']: row for row in report['properties']}
+
+        self.assertEqual(rows['Good House']['statuses'], (compliance.PASS,) * 5)
+        self.assertEqual(rows['Good House']['exposure'], 0)
+        self.assertEqual(rows['Damp Flat']['statuses'], (compliance.FAIL,) * 4 + (compliance.WARN,))
+        # EPC penalty, three civil penalties and 24 months' rent for the missing registration
+        self.assertEqual(rows['Damp Flat']['exposure'], Decimal('5000') + 3 * Decimal('7000') + Decimal('24960'))
+        self.assertEqual(report['properties'][0]['property_name'], 'Damp Flat')
+        self.assertEqual(report['non_compliant'], 1)
+        self.assertEqual(report['rules'][0]['fail'], 1)
+
+    def test_scan_is_one_query_in_batches(self):
+        for number in range(5):
+            Property.objects.create(owner=self.user, property_name=f'Batch {number}', city='York',
+                                    postcode='YO13AA', purchase_price=100000, weekly_rent=200,
+                                    date_of_purchase=date(2020, 1, 1))
+        with self.assertNumQueries(1):
+            report = compliance.RRA_COMPLIANCE.scan(Property.objects.all(), batch_size=3)
+        self.assertEqual(len(report['properties']), 7)
+
+    def test_report_cached_until_a_property_changes(self):
+        first = compliance.portfolio_compliance(self.user)
+        with patch.object(compliance.RRA_COMPLIANCE, 'scan') as scan:
+            compliance.portfolio_compliance(self.user)
+        scan.assert_not_called()
+
+        self.breaching.open_hazard_reports = 0
+        self.breaching.save()
+        second = compliance.portfolio_compliance(self.user)
+        self.assertLess(second['total_exposure'], first['total_exposure'])
+
+    def test_report_page(self):
+        response = self.client.get(reverse('user_home:compliance_report'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Damp Flat')
+        self.assertContains(response, reverse('rra_guide:section_detail', args=['database']))
+
+        response = self.client.get(reverse('user_home:property_list'))
+        self.assertContains(response, reverse('user_home:compliance_report'))
+
+
+class RentReviewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reviewer', password='safe-password-123')
+        self.client.login(username='reviewer', password='safe-password-123')
+        self.due = Property.objects.create(
+            owner=self.user, property_name='Due House', city='Leeds', postcode='LS11AA',
+            purchase_price=200000, weekly_rent=300, date_of_purchase=date(2020, 1, 1),
+            last_rent_increase_date=date(2024, 7, 15),
+        )
+        self.recent = Property.objects.create(
+            owner=self.user, property_name='Recent House', city='Leeds', postcode='LS12AA',
+            purchase_price=200000, weekly_rent=250, date_of_purchase=date(2020, 1, 1),
+            last_rent_increase_date=date(2025, 3, 1),
+        )
+
+    def test_next_permitted_increase(self):
+        today = date(2025, 6, 1)
+        self.assertEqual(rent_review.next_permitted_increase(None, today), date(2025, 8, 1))
+        self.assertEqual(rent_review.next_permitted_increase(date(2025, 3, 1), today), date(2026, 2, 28))
+        self.assertEqual(rent_review.add_months(date(2025, 12, 31), 2), date(2026, 2, 28))
+        self.assertEqual(rent_review.suggested_rent(Decimal('300'), Decimal('0.0371')), Decimal('311'))
+
+    def test_proposes_once_and_applies_approved_reviews(self):
+        self.assertEqual(rent_review.propose_rent_reviews(date(2025, 6, 1), batch_size=1), 1)
+        self.assertEqual(rent_review.propose_rent_reviews(date(2025, 6, 1)), 0)
+
+        review = RentReview.objects.get()
+        self.assertEqual(review.property, self.due)
+        self.assertEqual(review.effective_date, date(2025, 8, 1))
+        self.assertEqual(review.proposed_weekly_rent, Decimal('311'))
+
+        # Not applied until approved and in effect
+        self.assertEqual(rent_review.apply_rent_reviews(date(2025, 8, 1)), 0)
+        review.status = RentReview.APPROVED
+        review.save()
+        self.assertEqual(rent_review.apply_rent_reviews(date(2025, 7, 31)), 0)
+
+        updated_at = Property.objects.get(pk=self.due.pk).updated_at
+        self.assertEqual(rent_review.apply_rent_reviews(date(2025, 8, 1)), 1)
+        self.due.refresh_from_db()
+        self.assertEqual(self.due.weekly_rent, 311)
+        self.assertEqual(self.due.last_rent_increase_date, date(2025, 8, 1))
+        self.assertGreater(self.due.updated_at, updated_at)
+        self.assertEqual(RentReview.objects.get().status, RentReview.APPLIED)
+
+    def test_declined_review_is_not_proposed_again_for_a_year(self):
+        rent_review.propose_rent_reviews(date(2025, 6, 1))
+        response = self.client.post(reverse('user_home:rent_reviews'),
+                                    {'review_id': RentReview.objects.get().pk, 'action': 'decline'})
+        self.assertRedirects(response, reverse('user_home:rent_reviews'))
+
+        # Neither before the declined review's effective date nor within a year of declining it
+        self.assertEqual(rent_review.propose_rent_reviews(date(2025, 6, 2)), 0)
+        self.assertEqual(rent_review.run_rent_reviews(date(2025, 9, 1))['proposed'], 0)
+
+        RentReview.objects.update(updated_at=timezone.now() - timedelta(weeks=53))
+        rent_review.propose_rent_reviews(timezone.localdate())
+        self.assertTrue(RentReview.objects.filter(property=self.due, status=RentReview.PROPOSED).exists())
+
+    def test_landlord_approves_from_review_page(self):
+        rent_review.propose_rent_reviews(date(2025, 6, 1))
+        review = RentReview.objects.get()
+
+        response = self.client.get(reverse('user_home:rent_reviews'))
+        self.assertContains(response, 'Due House')
+        self.assertContains(response, '£311 pw')
+
+        response = self.client.post(reverse('user_home:rent_reviews'), {'review_id': review.pk, 'action': 'approve'})
+        self.assertRedirects(response, reverse('user_home:rent_reviews'))
+        review.refresh_from_db()
+        self.assertEqual(review.status, RentReview.APPROVED)
+
+        User.objects.create_user(username='stranger', password='safe-password-123')
+        self.client.login(username='stranger', password='safe-password-123')
+        response = self.client.post(reverse('user_home:rent_reviews'), {'review_id': review.pk, 'action': 'decline'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ChunkedDocumentUploadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.staging_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.staging_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, DOCUMENT_UPLOAD_STAGING_ROOT=self.staging_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.user = User.objects.create_user(username='uploader', password='safe-password-123')
+        self.client.login(username='uploader', password='safe-password-123')
+        self.property = Property.objects.create(
+            owner=self.user, property_name='Lease House', city='Exeter', postcode='EX11AA',
+            purchase_price=250000, weekly_rent=280, date_of_purchase=date(2021, 1, 1),
+        )
+        self.content = os.urandom(25000)
+
+    def start(self, **data):
+        data = {'filename': 'lease.pdf', 'size': len(self.content), 'document_type': 'lease',
+                'title': 'Lease', **data}
+        response = self.client.post(reverse('user_home:start_document_upload', args=[self.property.slug]),
+                                    data, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def send(self, url, offset, chunk):
+        return self.client.patch(url, chunk, content_type='application/offset+octet-stream',
+                                 headers={'Upload-Offset': str(offset)})
+
+    def test_chunks_become_a_document_with_its_sha256(self):
+        upload = self.start(sha256=hashlib.sha256(self.content).hexdigest())
+        for offset in range(0, 20000, 10000):
+            response = self.send(upload['upload_url'], offset, self.content[offset:offset + 10000])
+            self.assertEqual(response.json()['offset'], offset + 10000)
+
+        # Another worker picks up the last chunk, and hashes the stored parts to catch up
+        uploads._hashers.clear()
+        response = self.send(upload['upload_url'], 20000, self.content[20000:])
+        self.assertEqual(response.status_code, 201)
+
+        document = PropertyDocument.objects.get()
+        self.assertEqual(response.json()['document']['id'], document.pk)
+        self.assertEqual(document.sha256, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(document.size, len(self.content))
+        with document.file.open('rb') as file:
+            self.assertEqual(file.read(), self.content)
+        self.assertFalse(DocumentUpload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.staging_root, uploads.UPLOAD_PARTS_DIR, upload['upload_id'])), [])
+
+    def test_parts_stay_in_local_staging(self):
+        upload = self.start()
+        with patch('django.core.files.storage.default_storage.save', wraps=default_storage.save) as save:
+            self.send(upload['upload_url'], 0, self.content[:10000])
+            parts_dir = os.path.join(self.staging_root, uploads.UPLOAD_PARTS_DIR, upload['upload_id'])
+            self.assertEqual(len(os.listdir(parts_dir)), 1)
+            self.assertFalse(os.path.exists(os.path.join(self.media_root, uploads.UPLOAD_PARTS_DIR)))
+
+            response = self.send(upload['upload_url'], 10000, self.content[10000:])
+            self.assertEqual(response.status_code, 201)
+
+        # Only the assembled document goes to the field's storage
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(os.listdir(parts_dir), [])
+        with PropertyDocument.objects.get().file.open('rb') as file:
+            self.assertEqual(file.read(), self.content)
+
+    def test_resume_after_wrong_offset(self):
+        upload = self.start()
+        self.send(upload['upload_url'], 0, self.content[:5000])
+
+        response = self.send(upload['upload_url'], 8000, self.content[8000:9000])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 5000)
+
+        response = self.client.get(upload['upload_url'])
+        self.assertEqual(response.json()['offset'], 5000)
+        response = self.send(upload['upload_url'], 5000, self.content[5000:])
+        self.assertEqual(response.status_code, 201)
+
+    def test_checksum_mismatch_discards_upload(self):
+        upload = self.start(sha256='0' * 64)
+        response = self.send(upload['upload_url'], 0, self.content)
+        self.assertEqual(response.status_code, 422)
+        self.assertFalse(DocumentUpload.objects.exists())
+        self.assertFalse(PropertyDocument.objects.exists())
+
+    def test_other_users_cannot_touch_upload(self):
+        upload = self.start()
+        User.objects.create_user(username='snoop', password='safe-password-123')
+        self.client.login(username='snoop', password='safe-password-123')
+        self.assertEqual(self.client.get(upload['upload_url']).status_code, 404)
+        self.assertEqual(self.send(upload['upload_url'], 0, self.content).status_code, 404)
+
+    def test_duplicate_upload_shares_the_stored_file(self):
+        for _ in range(2):
+            upload = self.start()
+            self.assertEqual(self.send(upload['upload_url'], 0, self.content).status_code, 201)
+
+        first, second = PropertyDocument.objects.order_by('pk')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(Blob.objects.get(name=first.file.name).ref_count, 2)
+
+
+@override_settings(IMAGE_PIPELINE_BACKGROUND=False)
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        user = User.objects.create_user(username='hoarder', password='safe-password-123')
+        self.property = Property.objects.create(
+            owner=user, property_name='Copy House', city='Bath', postcode='BA11AA',
+            purchase_price=200000, weekly_rent=250, date_of_purchase=date(2020, 1, 1),
+        )
+
+    def document(self, content, name='epc.pdf'):
+        document = PropertyDocument(property=self.property, document_type='epc', title='EPC')
+        document.file.save(name, ContentFile(content), save=False)
+        document.save()
+        return document
+
+    def test_identical_files_are_stored_once(self):
+        first = self.document(b'same certificate')
+        second = self.document(b'same certificate', name='EPC copy.PDF')
+        other = self.document(b'another certificate')
+
+        digest = hashlib.sha256(b'same certificate').hexdigest()
+        self.assertEqual(first.file.name, f'blobs/{digest[:2]}/{digest}.pdf')
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertNotEqual(other.file.name, first.file.name)
+        self.assertEqual(Blob.objects.get(name=first.file.name).ref_count, 2)
+        with second.file.open('rb') as file:
+            self.assertEqual(file.read(), b'same certificate')
+
+    def test_replacing_and_deleting_release_references(self):
+        first = self.document(b'old lease')
+        second = self.document(b'old lease')
+        old_name = first.file.name
+
+        first.file.save('lease.pdf', ContentFile(b'new lease'))
+        self.assertEqual(Blob.objects.get(name=old_name).ref_count, 1)
+        self.assertEqual(Blob.objects.get(name=first.file.name).ref_count, 1)
+
+        # Loaded again, as a deferred field, and saved without touching the file
+        PropertyDocument.objects.defer('file').get(pk=second.pk).save()
+        self.assertEqual(Blob.objects.get(name=old_name).ref_count, 1)
+
+        PropertyDocument.objects.get(pk=second.pk).delete()
+        self.assertEqual(Blob.objects.get(name=old_name).ref_count, 0)
+
+    def test_garbage_collection_deletes_only_unused_files_after_grace_period(self):
+        kept = self.document(b'still used')
+        gone = self.document(b'no longer used')
+        name = gone.file.name
+        gone.delete()
+        path = os.path.join(self.media_root, name)
+        self.assertTrue(os.path.exists(path))
+
+        self.assertEqual(collect_garbage(), 0)
+        self.assertTrue(os.path.exists(path))
+
+        Blob.objects.filter(name=name).update(updated_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(collect_garbage(dry_run=True), 1)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(collect_garbage(batch_size=1), 1)
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(Blob.objects.filter(name=name).exists())
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, kept.file.name)))
+
+
+    def test_a_storage_that_renames_files_is_refused(self):
+        class RenamingStorage(FileSystemStorage):
+            """Puts a prefix and a random suffix on every name, as MediaCloudinaryStorage does"""
+            def _save(self, name, content):
+                root, extension = os.path.splitext(name)
+                return super()._save(f'media/{root}_k3j9x{extension}', content)
+
+        storage = ContentAddressedStorage(RenamingStorage(location=self.media_root))
+        with self.assertRaises(ImproperlyConfigured):
+            storage.save('epc.pdf', ContentFile(b'renamed certificate'))
+        self.assertFalse(any(files for _, _, files in os.walk(self.media_root)))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_the_same_file_saved_at_once_is_kept_under_its_hash(self):
+        storage = ContentAddressedStorage(FileSystemStorage(location=self.media_root))
+        digest = hashlib.sha256(b'raced certificate').hexdigest()
+        name = f'blobs/{digest[:2]}/{digest}.pdf'
+        storage.wrapped.save(name, ContentFile(b'raced certificate'))
+
+        # Not there when checked, but saved by another upload before this one was
+        exists = FileSystemStorage.exists
+        checks = []
+
+        def exists_after_the_first_check(storage_self, checked):
+            checks.append(checked)
+            return len(checks) > 1 and exists(storage_self, checked)
+
+        with patch.object(FileSystemStorage, 'exists', autospec=True, side_effect=exists_after_the_first_check):
+            self.assertEqual(storage.save('epc.pdf', ContentFile(b'raced certificate')), name)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'blobs', digest[:2])), [f'{digest}.pdf'])
+
+    def test_cloudinary_blobs_keep_their_exact_names(self):
+        from .cloudinary_blobs import ExactNameCloudinaryStorage
+
+        storage = ContentAddressedStorage(ExactNameCloudinaryStorage())
+        digest = hashlib.sha256(b'cloud certificate').hexdigest()
+        with patch('cloudinary.uploader.upload', return_value={'public_id': 'ignored'}) as upload, \
+                patch.object(ExactNameCloudinaryStorage, 'exists', return_value=False):
+            self.assertEqual(storage.save('epc.pdf', ContentFile(b'cloud certificate')), f'blobs/{digest[:2]}/{digest}.pdf')
+        options = upload.call_args.kwargs
+        self.assertEqual(options['public_id'], f'media/blobs/{digest[:2]}/{digest}.pdf')
+        self.assertEqual((options['resource_type'], options['overwrite'], options['unique_filename']), ('raw', False, False))
+
+    def test_blob_names_are_recognised_with_the_storage_prefix(self):
+        self.assertTrue(is_blob('blobs/ab/abcdef.pdf'))
+        self.assertTrue(is_blob('media/blobs/ab/abcdef.pdf'))
+        self.assertFalse(is_blob('media/property_documents/2024/01/lease.pdf'))
+
+
+@override_settings(DOCUMENT_EXTRACTION_BACKGROUND=False)
+class DocumentSearchTests(TestCase):
+    LEASE = b'The tenant may end this tenancy early under the break clause after twelve months.'
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.user = User.objects.create_user(username='searcher', password='safe-password-123')
+        self.client.login(username='searcher', password='safe-password-123')
+        self.property = Property.objects.create(
+            owner=self.user, property_name='Clause House', city='Leeds', postcode='LS11AA',
+            purchase_price=180000, weekly_rent=220, date_of_purchase=date(2020, 1, 1),
+        )
+
+    def document(self, content, name='lease.txt', title='Lease', property_obj=None):
+        document = PropertyDocument(property=property_obj or self.property, document_type='lease', title=title)
+        document.file.save(name, ContentFile(content), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            document.save()
+        return document
+
+    def search(self, query):
+        response = self.client.get(reverse('user_home:document_search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_upload_is_extracted_and_found_with_a_snippet(self):
+        document = self.document(self.LEASE)
+        self.assertEqual(document.extracted_text.status, DocumentText.EXTRACTED)
+
+        results = self.search('break clause')
+        self.assertEqual([result['id'] for result in results], [document.pk])
+        self.assertIn('<mark>break</mark>', results[0]['snippet'])
+        self.assertEqual(results[0]['property'], 'Clause House')
+        self.assertEqual(self.search('mortgage'), [])
+
+    def test_search_only_reaches_the_owners_documents(self):
+        other = User.objects.create_user(username='neighbour', password='safe-password-123')
+        other_property = Property.objects.create(
+            owner=other, property_name='Next Door', city='Leeds', postcode='LS12AA',
+            purchase_price=180000, weekly_rent=220, date_of_purchase=date(2020, 1, 1),
+        )
+        self.document(b'Their break clause is secret.', property_obj=other_property)
+        self.assertEqual(self.search('break'), [])
+
+    def test_same_file_and_edits_are_not_extracted_again(self):
+        with patch.object(document_search, 'extract_text', wraps=document_search.extract_text) as extract:
+            first = self.document(self.LEASE)
+            second = self.document(self.LEASE, name='lease copy.txt', title='Copy')
+            self.assertEqual(extract.call_count, 1)
+
+            second.title = 'Renewed lease'
+            with self.captureOnCommitCallbacks(execute=True):
+                second.save()
+            self.assertEqual(extract.call_count, 1)
+        self.assertEqual(second.extracted_text.text, first.extracted_text.text)
+        self.assertEqual({result['title'] for result in self.search('renewed')}, {'Renewed lease'})
+
+        second.delete()
+        self.assertEqual([result['id'] for result in self.search('twelve months')], [first.pk])
+
+    def test_word_documents_and_unsupported_files(self):
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('word/document.xml', (
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+                '<w:p><w:r><w:t>Gas safety </w:t></w:r><w:r><w:t>certificate</w:t></w:r></w:p>'
+                '<w:p><w:r><w:t>Renewed every year</w:t></w:r></w:p></w:body></w:document>'
+            ))
+        word = self.document(buffer.getvalue(), name='gas.docx', title='Gas')
+        self.assertEqual(word.extracted_text.text, 'Gas safety certificate\nRenewed every year')
+
+        photo = self.document(b'not really a photo', name='meter.jpg', title='Meter reading')
+        self.assertEqual(photo.extracted_text.status, DocumentText.UNSUPPORTED)
+        self.assertEqual([result['id'] for result in self.search('meter')], [photo.pk])
+        self.assertEqual([result['id'] for result in self.search('certificate')], [word.pk])
+
+    def test_index_command_extracts_missing_documents(self):
+        with patch.object(document_search, 'queue_extraction'):
+            document = self.document(self.LEASE)
+        self.assertEqual(self.search('break'), [])
+
+        call_command('index_property_documents', '--rebuild', stdout=StringIO())
+        self.assertEqual([result['id'] for result in self.search('break')], [document.pk])
@@ -12,13 +12,22 @@ urlpatterns = [
     
     # Property management
     path('properties/', views.property_list, name='property_list'),
+    path('properties/compliance/', views.compliance_report, name='compliance_report'),
+    path('properties/rent-reviews/', views.rent_reviews, name='rent_reviews'),
     path('properties/add/', views.upload_property, name='upload_property'),
     path('properties/add/', views.upload_property, name='add_property'),  # Alias for template compatibility
     path('properties/<slug:slug>/', views.property_detail, name='property_detail'),
+    path('properties/<slug:slug>/sections/<str:section>/', views.property_section, name='property_section'),
     path('properties/<slug:slug>/edit/', views.edit_property, name='edit_property'),
+    path('properties/<slug:slug>/refinance/', views.property_refinance, name='property_refinance'),
+    path('properties/<slug:slug>/documents/uploads/', views.start_document_upload, name='start_document_upload'),
+    path('documents/uploads/<uuid:upload_id>/', views.document_upload, name='document_upload'),
+    path('documents/search/', views.document_search, name='document_search'),
     # path('properties/<int:pk>/delete/', views.PropertyDeleteView.as_view(), name='delete_property'),
     
     # Deal analysis
     path('analyse-deal/', views.analyse_deal, name='analyse_deal'),
+    path('analyse-deal/recalculate/', views.analyse_deal_recalculate, name='analyse_deal_recalculate'),
+    path('analyse-deal/portfolio/', views.analyse_deal_portfolio, name='analyse_deal_portfolio'),
     path('email-deal-analysis-pdf/', views.email_deal_analysis_pdf, name='email_deal_analysis_pdf'),
 ]
\ No newline at end of file
@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+from .cashflow import INFLATION_RATE
+from .corp_tax_calculator import corp_tax_calculator
+
+
+AGENCY_FEES_RATE = Decimal('0.015')  # 1.5% agency fees
+LEGAL_FEES_BASE = Decimal('1500')  # £1,500 legal fees (base year)
+HOLDING_YEARS = 10
+
+# Context prefix and annual growth rate for each scenario
+GROWTH_SCENARIOS = (
+    ('no_growth', Decimal('0')),
+    ('moderate_growth', Decimal('0.017')),  # half the English average
+    ('average_growth', Decimal('0.034')),  # English average
+)
+
+EPC_UPGRADE_COSTS = {
+    'D': Decimal('10000'),
+    'E': Decimal('20000'),
+    'F': Decimal('30000'),
+    'G': Decimal('50000'),
+}
+
+
+def epc_upgrade_cost(epc_rating):
+    """Cost of bringing a property up to EPC C, nothing for A-C or unknown ratings"""
+    return EPC_UPGRADE_COSTS.get(epc_rating, Decimal('0'))
+
+
+def capital_gains_tax(property_obj, net_capital_growth, cashflow_projection):
+    """CGT (or corporation tax for companies) on a sale gain, nothing on losses"""
+    if net_capital_growth <= 0:
+        return 0
+    if property_obj.ownership_status == 'company':
+        return corp_tax_calculator.calculate_corporation_tax(net_capital_growth)
+
+    # Individual ownership - year 10 income decides the CGT band
+    year_10_cashflow = cashflow_projection[9]['net_cash_flow_after_tax'] if len(cashflow_projection) >= 10 else 0
+    if net_capital_growth + year_10_cashflow > 50270:
+        cgt_rate = Decimal('0.24')  # higher rate
+    else:
+        cgt_rate = Decimal('0.18')  # basic rate
+    return net_capital_growth * cgt_rate
+
+
+def capital_growth_scenarios(property_obj, cashflow_projection):
+    """
+    Net capital growth after selling costs and CGT for each growth scenario,
+    keyed the way the property detail templates expect.
+    """
+    current_value = property_obj.estimated_market_value or Decimal('0')
+
+    # Legal fees are incurred at sale, so inflate them over the holding period
+    legal_fees = LEGAL_FEES_BASE * ((1 + INFLATION_RATE) ** HOLDING_YEARS)
+    epc_cost = epc_upgrade_cost(property_obj.epc_rating)
+
+    # For P&I mortgages, principal repaid over the projection adds to equity
+    total_principal_paid = Decimal('0')
+    if property_obj.has_mortgage and property_obj.mortgage_type == 'principal_and_interest':
+        total_principal_paid = sum(projection['annual_principal_payment'] for projection in cashflow_projection)
+    notional_equity = current_value - Decimal(str(float(property_obj.outstanding_mortgage_balance or 0))) + total_principal_paid
+
+    ten_year_total_cashflow = sum(projection['net_cash_flow_after_tax'] for projection in cashflow_projection)
+
+    context = {'notional_equity': notional_equity}
+    for prefix, growth_rate in GROWTH_SCENARIOS:
+        future_value = current_value * ((1 + growth_rate) ** HOLDING_YEARS)
+        selling_costs = future_value * AGENCY_FEES_RATE + legal_fees + epc_cost
+        net_capital_growth = future_value - current_value - selling_costs
+
+        cgt_payable = capital_gains_tax(property_obj, net_capital_growth, cashflow_projection)
+        net_after_cgt = net_capital_growth - cgt_payable
+
+        cgt_result = {
+            'future_value': float(future_value),
+            'gross_gain': float(net_capital_growth),
+            'cgt_payable': float(cgt_payable),
+            'net_gain_after_cgt': float(net_after_cgt),
+            'selling_costs': float(selling_costs),
+        }
+        value = Decimal(str(cgt_result['net_gain_after_cgt']))
+
+        if notional_equity and notional_equity != 0:
+            return_rate = float((value / notional_equity) * 100)
+            annual_capital_return_rate = float((float(value) / float(notional_equity)) / HOLDING_YEARS * 100)
+            total_return = float(ten_year_total_cashflow + value)
+            annual_return_rate = float((total_return / float(notional_equity)) / HOLDING_YEARS * 100)
+        else:
+            return_rate = annual_capital_return_rate = total_return = annual_return_rate = 0
+
+        context.update({
+            f'{prefix}_value': value,
+            f'{prefix}_capital_growth_display': value,  # net gain after CGT
+            f'{prefix}_return_rate': return_rate,
+            f'{prefix}_total_return': total_return,
+            f'{prefix}_annual_return_rate': annual_return_rate,
+            f'{prefix}_annual_capital_return_rate': annual_capital_return_rate,
+            f'cgt_{prefix}': cgt_result,
+        })
+
+    return context
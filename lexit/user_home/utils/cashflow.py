@@ -0,0 +1,328 @@
+from decimal import Decimal
+
+from .corp_tax_calculator import corp_tax_calculator
+from .offshore_tax_calculator import offshore_tax_calculator
+from .tax_calculator import income_tax_calculator
+
+
+# Standard assumptions shared by the property and deal projections
+VACANCY_RATE = Decimal('0.0385')  # 3.85%
+MAINTENANCE_RATE = Decimal('0.035')  # 3.5%
+INFLATION_RATE = Decimal('0.028')  # 2.8%
+RENTAL_GROWTH_RATE = Decimal('0.0371')  # 3.71%
+INTEREST_RELIEF_RATE = Decimal('0.20')  # Section 24 basic rate credit
+PROJECTION_YEARS = 10
+
+# Bump whenever the assumptions or the projection maths change so cached
+# projections keyed on it are discarded.
+ASSUMPTIONS_VERSION = 1
+
+
+def property_tax_profile(property_obj):
+    """Return which tax regime applies to a Property: 'company', 'onshore', 'offshore' or None"""
+    if property_obj.ownership_status == 'company':
+        return 'company'
+    if property_obj.ownership_status == 'individual':
+        if property_obj.uk_resident and property_obj.uk_taxfree_allowance:
+            return 'onshore'
+        return 'offshore'
+    return None
+
+
+def deal_tax_profile(deal_data):
+    """Return which tax regime applies to a deal posted from the analyse deal form"""
+    return {
+        'company': 'company',
+        'individual': 'onshore',
+        'individual_offshore': 'offshore',
+    }.get(deal_data.get('ownership_status'))
+
+
+def property_operating_projection(property_obj, years=PROJECTION_YEARS):
+    """Year-by-year rent, operating expenses and NOI for an existing Property"""
+    annual_rent = property_obj.weekly_rent * 52
+    rows = []
+
+    for year in range(1, years + 1):
+        # Year 1 = current year (no growth), growth starts from Year 2
+        if year == 1:
+            projected_rent = annual_rent
+        else:
+            projected_rent = annual_rent * ((1 + RENTAL_GROWTH_RATE) ** (year - 1))
+
+        projected_vacancy_loss = projected_rent * VACANCY_RATE
+        projected_gross_rent = projected_rent - projected_vacancy_loss
+
+        projected_property_management_fees = projected_gross_rent * (property_obj.property_management_fees / 100)
+
+        # Service charge and other costs increase by inflation, ground rent stays fixed
+        if year == 1:
+            projected_service_charge = property_obj.service_charge
+            projected_other_annual_costs = property_obj.other_annual_costs
+        else:
+            projected_service_charge = property_obj.service_charge * ((1 + INFLATION_RATE) ** (year - 1))
+            projected_other_annual_costs = property_obj.other_annual_costs * ((1 + INFLATION_RATE) ** (year - 1))
+
+        projected_ground_rent = property_obj.ground_rent  # Always fixed
+        projected_maintenance = projected_gross_rent * MAINTENANCE_RATE
+
+        projected_total_expenses = (projected_property_management_fees + projected_service_charge +
+                                    projected_ground_rent + projected_other_annual_costs + projected_maintenance)
+
+        # Apply inflation growth to personal income
+        if year == 1:
+            personal_income = property_obj.annual_income
+        else:
+            personal_income = property_obj.annual_income * ((1 + INFLATION_RATE) ** (year - 1))
+
+        rows.append({
+            'year': year,
+            'gross_rent': projected_gross_rent,
+            'total_expenses': projected_total_expenses,
+            'net_operating_income': projected_gross_rent - projected_total_expenses,
+            'personal_income': personal_income,
+        })
+
+    return rows
+
+
+def property_fixed_monthly_payment(property_obj):
+    """Fixed monthly payment for a principal & interest mortgage (stays constant throughout loan)"""
+    if (property_obj.has_mortgage and property_obj.mortgage_type == 'principal_and_interest'
+            and property_obj.mortgage_interest_rate and property_obj.mortgage_years_remaining):
+        monthly_interest_rate = property_obj.mortgage_interest_rate / Decimal('100') / Decimal('12')
+        P = property_obj.outstanding_mortgage_balance
+        r = float(monthly_interest_rate)
+        n = property_obj.mortgage_years_remaining * 12
+
+        if r > 0:
+            return Decimal(str(float(P) * (r * (1 + r) ** n) / ((1 + r) ** n - 1)))
+        return P / Decimal(str(n))
+    return Decimal('0')
+
+
+def property_mortgage_schedule(property_obj, years=PROJECTION_YEARS):
+    """Year-by-year interest, principal and closing balance for a Property's mortgage"""
+    remaining_balance = property_obj.outstanding_mortgage_balance if property_obj.has_mortgage else Decimal('0')
+    fixed_monthly_payment = property_fixed_monthly_payment(property_obj)
+    rows = []
+
+    for year in range(1, years + 1):
+        annual_interest_payment = Decimal('0')
+        annual_principal_payment = Decimal('0')
+        annual_total_mortgage_payment = Decimal('0')
+
+        if property_obj.has_mortgage and remaining_balance > 0:
+            if property_obj.mortgage_type == 'interest_only':
+                # Interest-only: same interest payment each year, balance unchanged
+                monthly_interest_rate = property_obj.mortgage_interest_rate / Decimal('100') / Decimal('12')
+                annual_interest_payment = remaining_balance * monthly_interest_rate * 12
+                annual_total_mortgage_payment = annual_interest_payment
+
+            elif property_obj.mortgage_type == 'principal_and_interest':
+                annual_interest_rate = property_obj.mortgage_interest_rate / Decimal('100')
+                years_remaining = max(0, property_obj.mortgage_years_remaining - (year - 1))
+
+                if years_remaining > 0 and remaining_balance > 0:
+                    annual_interest_payment = remaining_balance * annual_interest_rate
+                    annual_total_mortgage_payment = fixed_monthly_payment * 12
+                    annual_principal_payment = annual_total_mortgage_payment - annual_interest_payment
+                    remaining_balance = remaining_balance - annual_principal_payment
+                else:
+                    # Mortgage is paid off
+                    remaining_balance = Decimal('0')
+
+        rows.append({
+            'annual_interest_payment': annual_interest_payment,
+            'annual_principal_payment': annual_principal_payment,
+            'annual_total_mortgage_payment': annual_total_mortgage_payment,
+            'remaining_mortgage_balance': remaining_balance,
+        })
+
+    return rows
+
+
+def deal_operating_projection(deal_data, years=PROJECTION_YEARS):
+    """Year-by-year rent, operating expenses and NOI for a deal from the analyse deal form"""
+    annual_rent = deal_data['weekly_rent'] * 52
+    inflated_costs = ('service_charge', 'ground_rent', 'selective_license_fee', 'accounting_costs',
+                      'gas_electrical_testing', 'landlord_insurance', 'other_costs')
+    rows = []
+
+    for year in range(1, years + 1):
+        projected_annual_rent = annual_rent * ((1 + RENTAL_GROWTH_RATE) ** (year - 1))
+        projected_vacancy_loss = projected_annual_rent * VACANCY_RATE
+        projected_gross_rent = projected_annual_rent - projected_vacancy_loss
+
+        # Management and maintenance follow rent, every other cost grows with inflation
+        projected_total_expenses = projected_gross_rent * deal_data['management_fees'] / 100
+        for cost in inflated_costs:
+            projected_total_expenses += deal_data[cost] * ((1 + INFLATION_RATE) ** (year - 1))
+        projected_total_expenses += projected_gross_rent * MAINTENANCE_RATE
+
+        if year == 1:
+            personal_income = deal_data['annual_income']
+        else:
+            personal_income = deal_data['annual_income'] * ((1 + INFLATION_RATE) ** (year - 1))
+
+        rows.append({
+            'year': year,
+            'gross_rent': projected_gross_rent,
+            'total_expenses': projected_total_expenses,
+            'net_operating_income': projected_gross_rent - projected_total_expenses,
+            'personal_income': personal_income,
+        })
+
+    return rows
+
+
+def deal_fixed_monthly_payment(deal_data):
+    """Fixed monthly payment for a repayment mortgage on a deal"""
+    if deal_data['has_mortgage'] and deal_data['mortgage_type'] == 'repayment':
+        monthly_rate = deal_data['mortgage_interest_rate'] / 100 / 12
+        num_payments = deal_data['mortgage_years_remaining'] * 12
+        if monthly_rate > 0:
+            return (deal_data['outstanding_mortgage_balance'] * monthly_rate * ((1 + monthly_rate) ** num_payments)) / \
+                   (((1 + monthly_rate) ** num_payments) - 1)
+        return deal_data['outstanding_mortgage_balance'] / num_payments if num_payments > 0 else Decimal('0')
+    return Decimal('0')
+
+
+def deal_mortgage_schedule(deal_data, years=PROJECTION_YEARS):
+    """Year-by-year interest, principal and closing balance for a deal's mortgage"""
+    fixed_monthly_payment = deal_fixed_monthly_payment(deal_data)
+    remaining_balance = deal_data['outstanding_mortgage_balance'] if deal_data['has_mortgage'] else Decimal('0')
+    rows = []
+
+    for year in range(1, years + 1):
+        if deal_data['has_mortgage']:
+            if deal_data['mortgage_type'] == 'repayment':
+                annual_interest_payment = remaining_balance * (deal_data['mortgage_interest_rate'] / 100)
+                annual_total_mortgage_payment = fixed_monthly_payment * 12
+                annual_principal_payment = annual_total_mortgage_payment - annual_interest_payment
+                remaining_balance = max(Decimal('0'), remaining_balance - annual_principal_payment)
+            else:  # interest_only
+                annual_interest_payment = deal_data['outstanding_mortgage_balance'] * (deal_data['mortgage_interest_rate'] / 100)
+                annual_principal_payment = Decimal('0')
+                annual_total_mortgage_payment = annual_interest_payment
+        else:
+            annual_interest_payment = Decimal('0')
+            annual_principal_payment = Decimal('0')
+            annual_total_mortgage_payment = Decimal('0')
+
+        rows.append({
+            'annual_interest_payment': annual_interest_payment,
+            'annual_principal_payment': annual_principal_payment,
+            'annual_total_mortgage_payment': annual_total_mortgage_payment,
+            'remaining_mortgage_balance': remaining_balance,
+        })
+
+    return rows
+
+
+def individual_rental_tax(personal_income, rental_profit, annual_interest_payment, offshore=False):
+    """
+    Extra income tax caused by rental profit on top of personal income,
+    after the 20% mortgage interest relief.
+    """
+    if offshore:
+        calculate = offshore_tax_calculator.calculate_offshore_tax
+    else:
+        calculate = income_tax_calculator.calculate_income_tax
+
+    tax_without_property = calculate(personal_income)['tax_payable']
+    tax_with_property_before_relief = calculate(personal_income + rental_profit)['tax_payable']
+
+    interest_rate_relief = annual_interest_payment * INTEREST_RELIEF_RATE
+    tax_with_property_after_relief = max(0, tax_with_property_before_relief - interest_rate_relief)
+
+    return tax_with_property_after_relief - tax_without_property
+
+
+def apply_loss_carryforward(gross_applicable_tax, tax_loss_carryforward):
+    """
+    Tax corkscrew: bank losses and use them against later positive tax.
+
+    Returns (applicable_tax, tax_loss_utilized, tax_loss_carryforward).
+    """
+    if gross_applicable_tax < 0:
+        # Tax loss - add to carryforward balance and set current tax to 0
+        return Decimal('0'), Decimal('0'), tax_loss_carryforward + abs(gross_applicable_tax)
+    if gross_applicable_tax > 0 and tax_loss_carryforward > 0:
+        if tax_loss_carryforward >= gross_applicable_tax:
+            # Sufficient carryforward to cover all tax
+            return Decimal('0'), gross_applicable_tax, tax_loss_carryforward - gross_applicable_tax
+        # Partial offset - use all remaining carryforward
+        return gross_applicable_tax - tax_loss_carryforward, tax_loss_carryforward, Decimal('0')
+    # Positive tax with no carryforward
+    return gross_applicable_tax, Decimal('0'), tax_loss_carryforward
+
+
+def build_cashflow_projection(operating, financing, tax_profile):
+    """Combine operating and financing rows into the full after-tax cashflow projection"""
+    cashflow_projection = []
+    tax_loss_carryforward = Decimal('0')
+
+    for op, fin in zip(operating, financing):
+        net_operating_income = op['net_operating_income']
+        annual_interest_payment = fin['annual_interest_payment']
+        net_cash_flow_before_tax = net_operating_income - fin['annual_total_mortgage_payment']
+
+        # Taxable profit for company (interest is deductible, principal is not)
+        corporate_tax = corp_tax_calculator.calculate_corporation_tax(net_operating_income - annual_interest_payment)
+        tax_payable_on_shore_individual = individual_rental_tax(
+            op['personal_income'], net_operating_income, annual_interest_payment)
+        tax_payable_offshore_individual = individual_rental_tax(
+            op['personal_income'], net_operating_income, annual_interest_payment, offshore=True)
+
+        gross_applicable_tax = {
+            'company': corporate_tax,
+            'onshore': tax_payable_on_shore_individual,
+            'offshore': tax_payable_offshore_individual,
+        }.get(tax_profile, Decimal('0'))
+
+        applicable_tax, tax_loss_utilized, tax_loss_carryforward = apply_loss_carryforward(
+            gross_applicable_tax, tax_loss_carryforward)
+
+        cashflow_projection.append({
+            'year': op['year'],
+            'gross_rent': op['gross_rent'],
+            'total_expenses': op['total_expenses'],
+            'net_operating_income': net_operating_income,
+            'annual_interest_payment': annual_interest_payment,
+            'annual_principal_payment': fin['annual_principal_payment'],
+            'annual_total_mortgage_payment': fin['annual_total_mortgage_payment'],
+            'net_cash_flow': net_cash_flow_before_tax,
+            'net_income_for_tax': net_operating_income - annual_interest_payment,
+            'remaining_mortgage_balance': fin['remaining_mortgage_balance'],
+            'corporate_tax': corporate_tax,
+            'tax_payable_on_shore_individual': tax_payable_on_shore_individual,
+            'tax_payable_offshore_individual': tax_payable_offshore_individual,
+            'gross_applicable_tax': gross_applicable_tax,
+            'tax_loss_carryforward_beginning': tax_loss_carryforward + tax_loss_utilized - (abs(gross_applicable_tax) if gross_applicable_tax < 0 else 0),
+            'tax_loss_generated': abs(gross_applicable_tax) if gross_applicable_tax < 0 else Decimal('0'),
+            'tax_loss_utilized': tax_loss_utilized,
+            'tax_loss_carryforward_ending': tax_loss_carryforward,
+            'applicable_tax': applicable_tax,
+            'net_cash_flow_after_tax': net_cash_flow_before_tax - applicable_tax,
+        })
+
+    return cashflow_projection
+
+
+def project_property_cashflow(property_obj, years=PROJECTION_YEARS):
+    """10-year after-tax cashflow projection for an existing Property"""
+    return build_cashflow_projection(
+        property_operating_projection(property_obj, years),
+        property_mortgage_schedule(property_obj, years),
+        property_tax_profile(property_obj),
+    )
+
+
+def project_deal_cashflow(deal_data, years=PROJECTION_YEARS):
+    """10-year after-tax cashflow projection for a deal from the analyse deal form"""
+    return build_cashflow_projection(
+        deal_operating_projection(deal_data, years),
+        deal_mortgage_schedule(deal_data, years),
+        deal_tax_profile(deal_data),
+    )
@@ -0,0 +1,184 @@
+"""
+Renters' Rights Act compliance checks across a portfolio.
+
+Each rule is written against whole columns of property data rather than one
+property at a time. The rule set is compiled once into the list of columns
+it needs, so a scan is a single values_list query streamed in batches, with
+no model instances, and a 10k property account is one pass.
+"""
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+PASS = 'pass'
+WARN = 'warn'
+FAIL = 'fail'
+
+# Civil penalty for an initial breach; repeat breaches can reach £40,000
+CIVIL_PENALTY = Decimal('7000')
+# Minimum Energy Efficiency Standards penalty for letting below the minimum rating
+EPC_PENALTY = Decimal('5000')
+MINIMUM_EPC_RATING = 'E'
+TARGET_EPC_RATING = 'C'  # proposed minimum for rented homes from 2030
+
+# Section 13: the rent can only be increased once a year
+RENT_INCREASE_INTERVAL = timedelta(weeks=52)
+
+SCAN_BATCH_SIZE = 2000
+COMPLIANCE_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+
+@dataclass(frozen=True)
+class Rule:
+    code: str
+    title: str
+    columns: tuple
+    check: Callable  # (columns, today) -> a status per property
+    penalty: Decimal = Decimal('0')
+    rent_repayment_months: int = 0  # rent a tenant could recover with a rent repayment order
+    guide_section: str = ''
+
+
+def next_rent_increase_date(last_increase):
+    """Earliest date the rent may next be increased, None if it can be increased now"""
+    if last_increase is None:
+        return None
+    return last_increase + RENT_INCREASE_INTERVAL
+
+
+def _epc_check(columns, today):
+    return [WARN if rating is None
+            else FAIL if rating > MINIMUM_EPC_RATING
+            else WARN if rating > TARGET_EPC_RATING
+            else PASS
+            for rating in columns['epc_rating']]
+
+
+def _prs_database_check(columns, today):
+    return [PASS if registered else FAIL for registered in columns['prs_registered']]
+
+
+def _decent_homes_check(columns, today):
+    return [WARN if compliant is None else PASS if compliant else FAIL
+            for compliant in columns['decent_homes_compliant']]
+
+
+def _awaabs_law_check(columns, today):
+    return [FAIL if reports else PASS for reports in columns['open_hazard_reports']]
+
+
+def _rent_increase_check(columns, today):
+    # Not a breach, but a rent increase served now would be invalid
+    statuses = []
+    for last_increase in columns['last_rent_increase_date']:
+        next_date = next_rent_increase_date(last_increase)
+        statuses.append(WARN if next_date and next_date > today else PASS)
+    return statuses
+
+
+RRA_RULES = (
+    Rule('epc', f'EPC rating {TARGET_EPC_RATING} or above', ('epc_rating',), _epc_check,
+         penalty=EPC_PENALTY, guide_section='awaabs_law'),
+    Rule('prs_database', 'Registered on the PRS database', ('prs_registered',), _prs_database_check,
+         penalty=CIVIL_PENALTY, rent_repayment_months=24, guide_section='database'),
+    Rule('decent_homes', 'Meets the Decent Homes Standard', ('decent_homes_compliant',), _decent_homes_check,
+         penalty=CIVIL_PENALTY, guide_section='awaabs_law'),
+    Rule('awaabs_law', "No unresolved hazards (Awaab's Law)", ('open_hazard_reports',), _awaabs_law_check,
+         penalty=CIVIL_PENALTY, guide_section='awaabs_law'),
+    Rule('rent_increase', 'Rent can be increased', ('last_rent_increase_date',), _rent_increase_check,
+         guide_section='rent_setting'),
+)
+
+
+class CompiledRules:
+    """A rule set together with the property columns it reads"""
+
+    base_columns = ('id', 'property_name', 'weekly_rent')
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        columns = list(self.base_columns)
+        for rule in self.rules:
+            columns.extend(column for column in rule.columns if column not in columns)
+        self.columns = tuple(columns)
+
+    def evaluate(self, rows, today):
+        """Statuses and penalty exposure for a batch of values_list rows"""
+        columns = dict(zip(self.columns, zip(*rows)))
+        statuses = [rule.check(columns, today) for rule in self.rules]
+
+        results = []
+        for position, weekly_rent in enumerate(columns['weekly_rent']):
+            monthly_rent = (weekly_rent or Decimal('0')) * 52 / 12
+            row_statuses = tuple(rule_statuses[position] for rule_statuses in statuses)
+            exposure = sum(
+                (rule.penalty + monthly_rent * rule.rent_repayment_months
+                 for rule, status in zip(self.rules, row_statuses) if status == FAIL),
+                Decimal('0'),
+            )
+            results.append({
+                'id': columns['id'][position],
+                'property_name': columns['property_name'][position],
+                'statuses': row_statuses,
+                'exposure': exposure.quantize(Decimal('1')),
+            })
+        return results
+
+    def scan(self, queryset, today=None, batch_size=SCAN_BATCH_SIZE):
+        """Compliance matrix for every property in the queryset"""
+        today = today or date.today()
+        rows = []
+        batch = []
+        for row in queryset.order_by().values_list(*self.columns).iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                rows.extend(self.evaluate(batch, today))
+                batch = []
+        if batch:
+            rows.extend(self.evaluate(batch, today))
+
+        summary = []
+        for index, rule in enumerate(self.rules):
+            counts = Counter(row['statuses'][index] for row in rows)
+            summary.append({
+                'code': rule.code,
+                'title': rule.title,
+                'guide_section': rule.guide_section,
+                'pass': counts[PASS],
+                'warn': counts[WARN],
+                'fail': counts[FAIL],
+            })
+
+        rows.sort(key=lambda row: (-row['exposure'], row['property_name']))
+        return {
+            'rules': summary,
+            'properties': rows,
+            'total_exposure': sum((row['exposure'] for row in rows), Decimal('0')),
+            'non_compliant': sum(1 for row in rows if FAIL in row['statuses']),
+            'scanned_on': today,
+        }
+
+
+RRA_COMPLIANCE = CompiledRules(RRA_RULES)
+
+
+def compliance_cache_key(user):
+    """Changes whenever one of the user's properties is added, edited or removed"""
+    state = user.properties.aggregate(count=Count('id'), updated=Max('updated_at'))
+    updated = state['updated'].timestamp() if state['updated'] else 0
+    return f"user_home:compliance:{user.pk}:{state['count']}:{updated}:{date.today().isoformat()}"
+
+
+def portfolio_compliance(user):
+    """The user's compliance matrix, scanned at most once per portfolio change and day"""
+    key = compliance_cache_key(user)
+    report = cache.get(key)
+    if report is None:
+        report = RRA_COMPLIANCE.scan(user.properties.all())
+        cache.set(key, report, COMPLIANCE_CACHE_TIMEOUT)
+    return report
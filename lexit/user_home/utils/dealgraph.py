@@ -0,0 +1,155 @@
+from decimal import Decimal
+
+from .cashflow import (
+    build_cashflow_projection,
+    deal_mortgage_schedule,
+    deal_operating_projection,
+    deal_tax_profile,
+)
+from .portfolio import deal_cash_deployed
+
+
+OPERATING_INPUTS = ('weekly_rent', 'management_fees', 'service_charge', 'ground_rent',
+                    'selective_license_fee', 'accounting_costs', 'gas_electrical_testing',
+                    'landlord_insurance', 'other_costs', 'annual_income')
+FINANCING_INPUTS = ('has_mortgage', 'mortgage_type', 'outstanding_mortgage_balance',
+                    'mortgage_interest_rate', 'mortgage_years_remaining')
+CASH_DEPLOYED_INPUTS = ('ownership_status', 'is_uk_resident', 'purchase_price', 'deposit_paid',
+                        'conveyancing_fees', 'mortgage_arrangement_fees', 'survey_costs')
+
+
+class Node:
+    """A named quantity computed from its dependencies"""
+
+    def __init__(self, name, deps, func):
+        self.name = name
+        self.deps = tuple(deps)
+        self.func = func
+
+    def compute(self, values):
+        return self.func(*(values[dep] for dep in self.deps))
+
+
+class DependencyGraph:
+    """
+    DAG of named quantities with memoized values.
+
+    Inputs are plain names with no node. After a change only the nodes
+    downstream of the changed inputs recompute, and a node whose new value
+    equals its old one stops the change propagating further.
+    """
+
+    def __init__(self, nodes, outputs):
+        self.nodes = {node.name: node for node in nodes}
+        self.outputs = tuple(outputs)
+        self.order = self._topological_order()
+        self.dependants = {name: [] for name in self.order}
+        for node in nodes:
+            for dep in node.deps:
+                self.dependants.setdefault(dep, []).append(node.name)
+
+    def _topological_order(self):
+        order = []
+        state = {}
+
+        def visit(name):
+            if state.get(name) == 'done' or name not in self.nodes:
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Cycle in dependency graph at '{name}'")
+            state[name] = 'visiting'
+            for dep in self.nodes[name].deps:
+                visit(dep)
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name)
+        return order
+
+    def evaluate(self, inputs):
+        """Compute every node from scratch, returning the full value map"""
+        values = dict(inputs)
+        for name in self.order:
+            values[name] = self.nodes[name].compute(values)
+        return values
+
+    def update(self, values, changes):
+        """
+        Apply changed inputs to a previously evaluated value map in place.
+
+        Returns (changed, recomputed): the names whose value changed and the
+        nodes that were recomputed.
+        """
+        changed = set()
+        for name, value in changes.items():
+            if values.get(name) != value:
+                values[name] = value
+                changed.add(name)
+
+        dirty = set()
+        for name in changed:
+            dirty.update(self.dependants.get(name, ()))
+
+        recomputed = []
+        for name in self.order:
+            if name not in dirty:
+                continue
+            recomputed.append(name)
+            value = self.nodes[name].compute(values)
+            if value != values.get(name):
+                values[name] = value
+                changed.add(name)
+                dirty.update(self.dependants.get(name, ()))
+
+        return changed, recomputed
+
+    def output_values(self, values, names=None):
+        """Output values, optionally limited to the given names"""
+        return {name: values[name] for name in self.outputs if names is None or name in names}
+
+
+def deal_node(name, fields, func):
+    """Node for a function taking deal_data, fed only the deal fields it reads"""
+    return Node(name, fields, lambda *args: func(dict(zip(fields, args))))
+
+
+def _year_1(key):
+    return lambda projection: projection[0][key]
+
+
+def _nrat(projection, total_cash_deployed):
+    if total_cash_deployed > 0:
+        return (projection[0]['net_cash_flow_after_tax'] / total_cash_deployed) * 100
+    return Decimal('0')
+
+
+DEAL_GRAPH = DependencyGraph(
+    nodes=[
+        deal_node('operating', OPERATING_INPUTS, deal_operating_projection),
+        deal_node('financing', FINANCING_INPUTS, deal_mortgage_schedule),
+        deal_node('tax_profile', ('ownership_status',), deal_tax_profile),
+        Node('cashflow_projection', ('operating', 'financing', 'tax_profile'), build_cashflow_projection),
+        deal_node('total_cash_deployed', CASH_DEPLOYED_INPUTS, deal_cash_deployed),
+
+        Node('gross_rent', ('operating',), _year_1('gross_rent')),
+        Node('total_expenses', ('operating',), _year_1('total_expenses')),
+        Node('net_operating_income', ('operating',), _year_1('net_operating_income')),
+        Node('annual_interest_payment', ('financing',), _year_1('annual_interest_payment')),
+        Node('annual_total_mortgage_payment', ('financing',), _year_1('annual_total_mortgage_payment')),
+        Node('net_income_for_tax', ('cashflow_projection',), _year_1('net_income_for_tax')),
+        Node('applicable_tax', ('cashflow_projection',), _year_1('applicable_tax')),
+        Node('net_cash_flow', ('cashflow_projection',), _year_1('net_cash_flow')),
+        Node('net_cash_flow_after_tax', ('cashflow_projection',), _year_1('net_cash_flow_after_tax')),
+        Node('ten_year_net_cash_flow_after_tax', ('cashflow_projection',),
+             lambda projection: sum((row['net_cash_flow_after_tax'] for row in projection), Decimal('0'))),
+        Node('nrat', ('cashflow_projection', 'total_cash_deployed'), _nrat),
+    ],
+    outputs=[
+        'gross_rent', 'total_expenses', 'net_operating_income', 'annual_interest_payment',
+        'annual_total_mortgage_payment', 'net_income_for_tax', 'applicable_tax', 'net_cash_flow',
+        'net_cash_flow_after_tax', 'ten_year_net_cash_flow_after_tax', 'total_cash_deployed', 'nrat',
+    ],
+)
+
+DEAL_GRAPH_INPUTS = OPERATING_INPUTS + FINANCING_INPUTS + CASH_DEPLOYED_INPUTS
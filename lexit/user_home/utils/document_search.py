@@ -0,0 +1,339 @@
+"""
+Full-text search over the contents of property documents.
+
+When a PropertyDocument is saved its file is queued (after the transaction
+commits) for a background thread, which pulls the text out of PDFs, Word
+documents and plain text files into a DocumentText row and refreshes the
+document's row in the search index. The text is only extracted again when
+the file changes, and documents stored as the same file (see
+user_home.storage) share the text of the first one extracted.
+
+The index lives in its own table, user_home_document_search_index, with the
+owner's id on every row so a search only reaches that owner's documents. As
+with the news search it is a weighted tsvector with a GIN index on Postgres
+and an FTS5 table on SQLite; migration 0012 creates whichever one the
+database needs.
+
+Set DOCUMENT_EXTRACTION_BACKGROUND = False to extract in-line instead.
+"""
+import logging
+import os
+import re
+import zipfile
+from functools import partial
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from lexit.background import BackgroundPool
+
+from ..models import DocumentText, PropertyDocument
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'user_home_document_search_index'
+SEARCH_RESULTS_LIMIT = 20
+MAX_QUERY_TERMS = 8
+# Enough for a long lease; the rest of a bigger file isn't searched
+MAX_TEXT_LENGTH = 500_000
+MAX_DOCX_XML_SIZE = 50 * 1024 * 1024
+
+# Private-use characters mark matches in snippets, as in news.search
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_END = '\ue001'
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+_pool = BackgroundPool('document-text', workers_setting='DOCUMENT_EXTRACTION_WORKERS')
+
+
+def highlight(snippet):
+    """Escape a snippet and turn its match markers into <mark> tags"""
+    html = escape(snippet)
+    html = html.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+    return mark_safe(html)
+
+
+class SQLiteSearchBackend:
+    """FTS5 index used in development"""
+
+    def index_rows(self, cursor, rows):
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, owner_id, title, description, body) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+    def remove(self, cursor, document_id):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [document_id])
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    def optimise(self, cursor):
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+
+    def query(self, cursor, owner_id, text, limit):
+        terms = re.findall(r'\w+', text.lower())[:MAX_QUERY_TERMS]
+        if not terms:
+            return []
+        match = ' '.join(f'"{term}"*' for term in terms)
+        cursor.execute(
+            f"SELECT rowid, -bm25({SEARCH_TABLE}, 10.0, 4.0, 1.0) AS rank, "
+            f"snippet({SEARCH_TABLE}, -1, %s, %s, '…', 24) "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND owner_id = %s "
+            f"ORDER BY rank DESC LIMIT %s",
+            [HIGHLIGHT_START, HIGHLIGHT_END, match, owner_id, limit],
+        )
+        return cursor.fetchall()
+
+
+class PostgresSearchBackend:
+    """Weighted tsvector with a GIN index, used in production"""
+
+    def index_rows(self, cursor, rows):
+        # content keeps the description and body text for ts_headline snippets
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (document_id, owner_id, content, document) "
+            f"VALUES (%s, %s, %s || ' ' || %s, "
+            f"setweight(to_tsvector('english', %s), 'A') || "
+            f"setweight(to_tsvector('english', %s), 'B') || "
+            f"setweight(to_tsvector('english', %s), 'C')) "
+            f"ON CONFLICT (document_id) DO UPDATE "
+            f"SET owner_id = EXCLUDED.owner_id, content = EXCLUDED.content, document = EXCLUDED.document",
+            [(document_id, owner_id, description, body, title, description, body)
+             for document_id, owner_id, title, description, body in rows],
+        )
+
+    def remove(self, cursor, document_id):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE document_id = %s", [document_id])
+
+    def clear(self, cursor):
+        cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+
+    def optimise(self, cursor):
+        cursor.execute(f"ANALYZE {SEARCH_TABLE}")
+
+    def query(self, cursor, owner_id, text, limit):
+        if not text.strip():
+            return []
+        # Rank and limit first so ts_headline only runs on the rows returned
+        cursor.execute(
+            f"SELECT hits.document_id, hits.rank, "
+            f"ts_headline('english', hits.content, hits.query, %s) "
+            f"FROM (SELECT s.document_id, s.content, q.query, ts_rank_cd(s.document, q.query) AS rank "
+            f"      FROM {SEARCH_TABLE} s, websearch_to_tsquery('english', %s) AS q(query) "
+            f"      WHERE s.owner_id = %s AND s.document @@ q.query ORDER BY rank DESC LIMIT %s) AS hits "
+            f"ORDER BY hits.rank DESC",
+            [f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_END}", MaxWords=35, MinWords=15',
+             text, owner_id, limit],
+        )
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend(),
+    'postgresql': PostgresSearchBackend(),
+}
+
+
+def get_backend(using=None):
+    """Search backend for the connection's database, None if it has no full-text support"""
+    return BACKENDS.get((using or connection).vendor)
+
+
+def _plain_text(file):
+    data = file.read(MAX_TEXT_LENGTH * 4)
+    return data.decode('utf-8-sig', errors='replace')
+
+
+def _pdf_text(file):
+    from pypdf import PdfReader
+
+    pages = []
+    length = 0
+    for page in PdfReader(file).pages:
+        text = page.extract_text() or ''
+        pages.append(text)
+        length += len(text)
+        if length >= MAX_TEXT_LENGTH:
+            break
+    return '\n'.join(pages)
+
+
+def _docx_text(file):
+    with zipfile.ZipFile(file) as archive:
+        if archive.getinfo('word/document.xml').file_size > MAX_DOCX_XML_SIZE:
+            raise ValueError('word/document.xml is too large')
+        with archive.open('word/document.xml') as xml:
+            paragraphs, words = [], []
+            for _, element in ElementTree.iterparse(xml):
+                if element.tag == f'{WORD_NAMESPACE}t':
+                    words.append(element.text or '')
+                elif element.tag == f'{WORD_NAMESPACE}p':
+                    paragraphs.append(''.join(words))
+                    words = []
+                    element.clear()
+    return '\n'.join(paragraphs)
+
+
+# file extension: function returning the text of an open file
+EXTRACTORS = {
+    '.pdf': _pdf_text,
+    '.docx': _docx_text,
+    '.txt': _plain_text,
+    '.csv': _plain_text,
+    '.md': _plain_text,
+}
+
+
+def extract_text(file, name):
+    """Plain text of an open document file, None if text can't be pulled from its type"""
+    extractor = EXTRACTORS.get(os.path.splitext(name)[1].lower())
+    if extractor is None:
+        return None
+    # Postgres text can't hold NUL characters
+    text = extractor(file).replace('\x00', '')
+    return re.sub(r'[ \t\r\f\v]+', ' ', text).strip()[:MAX_TEXT_LENGTH]
+
+
+def _extract(document):
+    """(text, status) for a document's file"""
+    try:
+        with document.file.open('rb'):
+            text = extract_text(document.file, document.file.name)
+    except Exception:
+        logger.exception('Failed to extract the text of document %s', document.pk)
+        return '', DocumentText.FAILED
+    if text is None:
+        return '', DocumentText.UNSUPPORTED
+    return text, DocumentText.EXTRACTED
+
+
+def _index_row(document, text):
+    return (document.pk, document.property.owner_id, document.title, document.description, text)
+
+
+def index_document(document, text):
+    """Add or refresh one document in the search index"""
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.index_rows(cursor, [_index_row(document, text)])
+
+
+def remove_document(document_id):
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.remove(cursor, document_id)
+
+
+def extract_document(pk):
+    """Extract a document's text if its file is new, and refresh it in the index; returns whether it exists"""
+    document = PropertyDocument.objects.select_related('property', 'extracted_text').filter(pk=pk).first()
+    if document is None:
+        return False
+
+    source = document.file.name
+    extracted = getattr(document, 'extracted_text', None)
+    if extracted is None or extracted.source != source:
+        # A file another document already has was extracted then
+        shared = (DocumentText.objects.filter(source=source).exclude(document=document)
+                  .exclude(status=DocumentText.FAILED).only('text', 'status').first())
+        text, status = (shared.text, shared.status) if shared else _extract(document)
+        extracted, _ = DocumentText.objects.update_or_create(
+            document=document, defaults={'source': source, 'text': text, 'status': status})
+
+    index_document(document, extracted.text)
+    return True
+
+
+def _run_job(pk):
+    try:
+        extract_document(pk)
+    except Exception:
+        logger.exception('Failed to index document %s', pk)
+
+
+def queue_extraction(pk):
+    """Extract and index a document on a background thread, or now if extraction is synchronous"""
+    if not getattr(settings, 'DOCUMENT_EXTRACTION_BACKGROUND', True):
+        extract_document(pk)
+        return
+    _pool.submit(_run_job, pk)
+
+
+def rebuild_index(batch_size=200):
+    """Re-index every document from its stored text in batches; returns the number indexed"""
+    backend = get_backend()
+    if backend is None:
+        return 0
+
+    documents = PropertyDocument.objects.select_related('property', 'extracted_text').order_by('pk')
+    count = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        backend.clear(cursor)
+        batch = []
+        for document in documents.iterator(chunk_size=batch_size):
+            extracted = getattr(document, 'extracted_text', None)
+            batch.append(_index_row(document, extracted.text if extracted else ''))
+            if len(batch) >= batch_size:
+                backend.index_rows(cursor, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            backend.index_rows(cursor, batch)
+            count += len(batch)
+        backend.optimise(cursor)
+    return count
+
+
+def search_documents(owner, text, limit=SEARCH_RESULTS_LIMIT):
+    """
+    An owner's best matching documents for a query, most relevant first.
+
+    Each document has search_rank and a search_snippet with the matching
+    words wrapped in <mark>.
+    """
+    text = (text or '').strip()
+    if not text:
+        return []
+    documents = PropertyDocument.objects.select_related('property').filter(property__owner=owner)
+    backend = get_backend()
+    if backend is None:
+        # No full-text index on this database, fall back to the short fields
+        results = list(documents.filter(Q(title__icontains=text) | Q(description__icontains=text))[:limit])
+        for document in results:
+            document.search_rank, document.search_snippet = None, highlight(document.description)
+        return results
+
+    with connection.cursor() as cursor:
+        hits = backend.query(cursor, owner.pk, text, limit)
+
+    by_id = documents.in_bulk([hit[0] for hit in hits])
+    results = []
+    for document_id, rank, snippet in hits:
+        document = by_id.get(document_id)
+        if document is None:
+            continue
+        document.search_rank = rank
+        document.search_snippet = highlight(snippet or '')
+        results.append(document)
+    return results
+
+
+def queue_on_save(sender, instance, raw=False, **kwargs):
+    """post_save receiver that re-indexes a document once the transaction commits"""
+    if not raw:
+        transaction.on_commit(partial(queue_extraction, instance.pk))
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_document(instance.pk)
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .cashflow import ASSUMPTIONS_VERSION
+
+
+PROPERTY_CARD_TEMPLATE = 'user_home/partials/property_card.html'
+
+# Bump whenever property_card.html changes so previously cached cards are dropped
+PROPERTY_CARD_TEMPLATE_VERSION = 2
+
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24 * 7  # 1 week
+
+
+def property_card_cache_key(property_obj):
+    """Cache key that changes with the property, the assumptions or the card template"""
+    updated_at = property_obj.updated_at.timestamp() if property_obj.updated_at else 0
+    return (f"user_home:card:a{ASSUMPTIONS_VERSION}:t{PROPERTY_CARD_TEMPLATE_VERSION}:"
+            f"{property_obj.pk}:{updated_at}")
+
+
+def render_property_cards(properties):
+    """
+    Rendered HTML for each property card, in order.
+
+    Cached cards are fetched in a single get_many, so a large portfolio only
+    renders the cards for properties edited since they were last cached.
+    """
+    properties = list(properties)
+    keys = [property_card_cache_key(property_obj) for property_obj in properties]
+    cached = cache.get_many(keys)
+
+    cards = []
+    rendered = {}
+    for key, property_obj in zip(keys, properties):
+        html = cached.get(key)
+        if html is None:
+            html = render_to_string(PROPERTY_CARD_TEMPLATE, {'property': property_obj})
+            rendered[key] = html
+        cards.append(mark_safe(html))
+
+    if rendered:
+        cache.set_many(rendered, FRAGMENT_CACHE_TIMEOUT)
+    return cards
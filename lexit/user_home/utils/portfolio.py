@@ -0,0 +1,225 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+
+from .cashflow import (
+    ASSUMPTIONS_VERSION,
+    INFLATION_RATE,
+    PROJECTION_YEARS,
+    apply_loss_carryforward,
+    deal_tax_profile,
+    individual_rental_tax,
+    project_deal_cashflow,
+    project_property_cashflow,
+    property_tax_profile,
+)
+from .corp_tax_calculator import corp_tax_calculator
+from .sdlt_calculator import sdlt_calculator
+from .tax_calculator import income_tax_calculator
+
+
+PROJECTION_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+
+def projection_cache_key(property_obj):
+    """Cache key that changes whenever the property or the assumptions change"""
+    updated_at = property_obj.updated_at.timestamp() if property_obj.updated_at else 0
+    return f"user_home:projection:v{ASSUMPTIONS_VERSION}:{property_obj.pk}:{updated_at}"
+
+
+def property_cash_deployed(property_obj):
+    """Deposit plus buy-to-let SDLT, matching calculate_nrat"""
+    sdlt_result = sdlt_calculator.calculate_sdlt(
+        purchase_date=property_obj.date_of_purchase,
+        purchase_price=int(property_obj.purchase_price),
+        buyer_type=property_obj.buyer_type_for_sdlt,
+        is_btl=True
+    )
+    return property_obj.deposit_paid + Decimal(str(sdlt_result.get('sdlt', 0)))
+
+
+def deal_cash_deployed(deal_data, purchase_date=None):
+    """Deposit plus SDLT plus acquisition costs, matching analyse_deal"""
+    if deal_data['ownership_status'] == 'company':
+        buyer_type = 'uk_company'
+    elif deal_data['ownership_status'] == 'individual' and not deal_data['is_uk_resident']:
+        buyer_type = 'non_uk_individual'
+    else:
+        buyer_type = 'uk_individual'
+
+    sdlt_result = sdlt_calculator.calculate_sdlt(
+        purchase_date=purchase_date or date.today(),
+        purchase_price=int(deal_data['purchase_price']),
+        buyer_type=buyer_type,
+        is_btl=True
+    )
+    acquisition_costs = (deal_data['conveyancing_fees'] +
+                         deal_data['mortgage_arrangement_fees'] +
+                         deal_data['survey_costs'])
+    return deal_data['deposit_paid'] + Decimal(str(sdlt_result.get('sdlt', 0))) + acquisition_costs
+
+
+def get_property_projection(property_obj):
+    """
+    Return the cached projection for a Property, computing it on a miss.
+
+    The key includes updated_at, so editing a property invalidates its
+    projection without any explicit cache delete.
+    """
+    key = projection_cache_key(property_obj)
+    projection = cache.get(key)
+    if projection is None:
+        projection = {
+            'property_id': property_obj.pk,
+            'name': property_obj.property_name,
+            'tax_profile': property_tax_profile(property_obj),
+            'annual_income': property_obj.annual_income,
+            'total_cash_deployed': property_cash_deployed(property_obj),
+            'cashflow_projection': project_property_cashflow(property_obj),
+        }
+        cache.set(key, projection, PROJECTION_CACHE_TIMEOUT)
+    return projection
+
+
+def marginal_band(income):
+    """Name of the income tax band the last pound of income falls into"""
+    calculator = income_tax_calculator
+    taxable_income = calculator.calculate_income_tax(income).get('taxable_income', Decimal('0'))
+    if taxable_income <= 0:
+        return 'personal_allowance'
+    if taxable_income <= calculator.basic_rate_limit:
+        return 'basic'
+    if taxable_income <= calculator.higher_rate_limit:
+        return 'higher'
+    return 'additional'
+
+
+def portfolio_tax_rollup(positions, personal_income, years=PROJECTION_YEARS):
+    """
+    Re-tax a set of positions together instead of one at a time.
+
+    Individual rental profits are stacked on the same personal income so band
+    effects are captured, company profits share one corporation tax charge,
+    and losses carry forward per regime.
+    """
+    carryforward = {'onshore': Decimal('0'), 'offshore': Decimal('0'), 'company': Decimal('0')}
+    rows = []
+
+    for index in range(years):
+        year = index + 1
+        if year == 1:
+            income = personal_income
+        else:
+            income = personal_income * ((1 + INFLATION_RATE) ** (year - 1))
+
+        profit = {'onshore': Decimal('0'), 'offshore': Decimal('0'), 'company': Decimal('0')}
+        interest = {'onshore': Decimal('0'), 'offshore': Decimal('0')}
+        regimes = set()
+        net_cash_flow = Decimal('0')
+
+        for position in positions:
+            row = position['cashflow_projection'][index]
+            regime = position['tax_profile']
+            net_cash_flow += row['net_cash_flow']
+            if regime == 'company':
+                profit['company'] += row['net_operating_income'] - row['annual_interest_payment']
+            elif regime in interest:
+                profit[regime] += row['net_operating_income']
+                interest[regime] += row['annual_interest_payment']
+            else:
+                continue
+            regimes.add(regime)
+
+        applicable_tax = Decimal('0')
+        for regime in sorted(regimes):
+            if regime == 'company':
+                gross_tax = corp_tax_calculator.calculate_corporation_tax(profit['company'])
+            else:
+                gross_tax = individual_rental_tax(income, profit[regime], interest[regime],
+                                                  offshore=regime == 'offshore')
+            tax, _, carryforward[regime] = apply_loss_carryforward(gross_tax, carryforward[regime])
+            applicable_tax += tax
+
+        rows.append({
+            'year': year,
+            'net_cash_flow': net_cash_flow,
+            'applicable_tax': applicable_tax,
+            'net_cash_flow_after_tax': net_cash_flow - applicable_tax,
+            'taxable_income': income + profit['onshore'],
+        })
+
+    return rows
+
+
+def summarise_portfolio(positions, personal_income):
+    rows = portfolio_tax_rollup(positions, personal_income)
+    total_cash_deployed = sum((p['total_cash_deployed'] for p in positions), Decimal('0'))
+    year_1 = rows[0]
+
+    if total_cash_deployed > 0:
+        nrat = (year_1['net_cash_flow_after_tax'] / total_cash_deployed) * 100
+    else:
+        nrat = Decimal('0')
+
+    return {
+        'property_count': len(positions),
+        'year_1_net_cash_flow': year_1['net_cash_flow'],
+        'year_1_tax': year_1['applicable_tax'],
+        'year_1_net_cash_flow_after_tax': year_1['net_cash_flow_after_tax'],
+        'ten_year_net_cash_flow_after_tax': sum((r['net_cash_flow_after_tax'] for r in rows), Decimal('0')),
+        'total_cash_deployed': total_cash_deployed,
+        'nrat': nrat,
+        'marginal_band': marginal_band(year_1['taxable_income']),
+        'cashflow_projection': rows,
+    }
+
+
+def analyse_portfolio_what_if(properties, deal_data, purchase_date=None):
+    """
+    Compare the user's portfolio with and without a candidate deal.
+
+    Existing holdings come from the projection cache, so each what-if only
+    projects the candidate deal and re-runs the portfolio tax roll-up.
+    """
+    holdings = [get_property_projection(property_obj) for property_obj in properties]
+
+    deal_position = {
+        'property_id': None,
+        'name': deal_data.get('deal_name') or 'Candidate deal',
+        'tax_profile': deal_tax_profile(deal_data),
+        'annual_income': deal_data['annual_income'],
+        'total_cash_deployed': deal_cash_deployed(deal_data, purchase_date),
+        'cashflow_projection': project_deal_cashflow(deal_data),
+    }
+
+    # Income entered on the deal form wins, otherwise fall back to the holdings
+    personal_income = deal_data['annual_income'] or max(
+        (h['annual_income'] for h in holdings), default=Decimal('0'))
+
+    without_deal = summarise_portfolio(holdings, personal_income)
+    with_deal = summarise_portfolio(holdings + [deal_position], personal_income)
+
+    deal_year_1 = deal_position['cashflow_projection'][0]['net_cash_flow_after_tax']
+    if deal_position['total_cash_deployed'] > 0:
+        deal_nrat = (deal_year_1 / deal_position['total_cash_deployed']) * 100
+    else:
+        deal_nrat = Decimal('0')
+
+    return {
+        'portfolio': without_deal,
+        'with_deal': with_deal,
+        'deal_standalone': {
+            'year_1_net_cash_flow_after_tax': deal_year_1,
+            'total_cash_deployed': deal_position['total_cash_deployed'],
+            'nrat': deal_nrat,
+        },
+        'marginal': {
+            'year_1_net_cash_flow_after_tax': with_deal['year_1_net_cash_flow_after_tax'] - without_deal['year_1_net_cash_flow_after_tax'],
+            'ten_year_net_cash_flow_after_tax': with_deal['ten_year_net_cash_flow_after_tax'] - without_deal['ten_year_net_cash_flow_after_tax'],
+            'year_1_additional_tax': with_deal['year_1_tax'] - without_deal['year_1_tax'],
+            'nrat_change': with_deal['nrat'] - without_deal['nrat'],
+            'band_before': without_deal['marginal_band'],
+            'band_after': with_deal['marginal_band'],
+        },
+    }
@@ -0,0 +1,194 @@
+from decimal import Decimal
+from itertools import product
+
+from .cashflow import (
+    PROJECTION_YEARS,
+    apply_loss_carryforward,
+    individual_rental_tax,
+    property_mortgage_schedule,
+    property_operating_projection,
+    property_tax_profile,
+)
+from .corp_tax_calculator import corp_tax_calculator
+from .portfolio import property_cash_deployed
+
+
+# Default product grid, overridable per request
+DEFAULT_RATES = [Decimal('4.0'), Decimal('4.5'), Decimal('5.0'), Decimal('5.5'), Decimal('6.0')]
+DEFAULT_TERMS = [15, 20, 25, 30]
+DEFAULT_MORTGAGE_TYPES = ['principal_and_interest', 'interest_only']
+DEFAULT_ARRANGEMENT_FEES = [Decimal('0'), Decimal('999'), Decimal('1999')]
+DEFAULT_LTVS = [None, Decimal('60'), Decimal('75')]  # None keeps the current balance
+
+MAX_CANDIDATES = 2000
+
+
+class RefinanceOptimiser:
+    """Evaluate a grid of remortgage products against a Property's current mortgage"""
+
+    def __init__(self, years=PROJECTION_YEARS):
+        self.years = years
+
+    def build_grid(self, rates=None, terms=None, mortgage_types=None, arrangement_fees=None, ltvs=None):
+        """Cartesian product of product options as candidate dicts"""
+        grid = product(
+            rates or DEFAULT_RATES,
+            terms or DEFAULT_TERMS,
+            mortgage_types or DEFAULT_MORTGAGE_TYPES,
+            arrangement_fees if arrangement_fees is not None else DEFAULT_ARRANGEMENT_FEES,
+            ltvs or DEFAULT_LTVS,
+        )
+        candidates = [
+            {'rate': rate, 'term': term, 'mortgage_type': mortgage_type,
+             'arrangement_fee': fee, 'ltv': ltv}
+            for rate, term, mortgage_type, fee, ltv in grid
+        ]
+        if len(candidates) > MAX_CANDIDATES:
+            raise ValueError(f"Grid has {len(candidates)} candidates, the maximum is {MAX_CANDIDATES}")
+        return candidates
+
+    def new_loan_amount(self, property_obj, ltv):
+        """Loan size for a candidate, None LTV means refinance the existing balance"""
+        current_balance = property_obj.outstanding_mortgage_balance if property_obj.has_mortgage else Decimal('0')
+        if ltv is None:
+            return current_balance
+        market_value = property_obj.estimated_market_value or property_obj.purchase_price or Decimal('0')
+        return (market_value * ltv / 100).quantize(Decimal('1'))
+
+    def amortise(self, balances, candidates):
+        """
+        Amortise every candidate in one pass over the projection years.
+
+        Uses the same annual interest convention as property_mortgage_schedule.
+        Returns one list of financing rows per candidate.
+        """
+        payments = []
+        for balance, candidate in zip(balances, candidates):
+            if candidate['mortgage_type'] == 'principal_and_interest' and balance > 0:
+                r = float(candidate['rate'] / Decimal('100') / Decimal('12'))
+                n = candidate['term'] * 12
+                if r > 0:
+                    payments.append(Decimal(str(float(balance) * (r * (1 + r) ** n) / ((1 + r) ** n - 1))) * 12)
+                else:
+                    payments.append(balance / Decimal(str(candidate['term'])))
+            else:
+                payments.append(Decimal('0'))
+
+        remaining = list(balances)
+        schedules = [[] for _ in candidates]
+
+        for year in range(1, self.years + 1):
+            for i, candidate in enumerate(candidates):
+                balance = remaining[i]
+                interest = principal = total = Decimal('0')
+
+                if balance > 0:
+                    interest = balance * candidate['rate'] / Decimal('100')
+                    if candidate['mortgage_type'] == 'interest_only':
+                        total = interest
+                    elif year <= candidate['term']:
+                        total = payments[i]
+                        principal = total - interest
+                        balance = max(Decimal('0'), balance - principal)
+                    else:
+                        interest = Decimal('0')
+                        balance = Decimal('0')
+
+                remaining[i] = balance
+                schedules[i].append({
+                    'annual_interest_payment': interest,
+                    'annual_principal_payment': principal,
+                    'annual_total_mortgage_payment': total,
+                    'remaining_mortgage_balance': balance,
+                })
+
+        return schedules
+
+    def after_tax_cash(self, operating, financing, tax_profile):
+        """Year-by-year after-tax cash, only taxing under the regime that applies"""
+        carryforward = Decimal('0')
+        rows = []
+        for op, fin in zip(operating, financing):
+            noi = op['net_operating_income']
+            interest = fin['annual_interest_payment']
+            if tax_profile == 'company':
+                gross_tax = corp_tax_calculator.calculate_corporation_tax(noi - interest)
+            elif tax_profile in ('onshore', 'offshore'):
+                gross_tax = individual_rental_tax(op['personal_income'], noi, interest,
+                                                  offshore=tax_profile == 'offshore')
+            else:
+                gross_tax = Decimal('0')
+            tax, _, carryforward = apply_loss_carryforward(gross_tax, carryforward)
+            rows.append(noi - fin['annual_total_mortgage_payment'] - tax)
+        return rows
+
+    def summarise(self, cash_rows, financing, cash_deployed, equity_released, fee):
+        """10-year cash, NRAT and closing balance for one financing option"""
+        # Released equity comes back out of the deal, fees go in
+        cash_in_deal = cash_deployed + fee - equity_released
+        ten_year_cash = sum(cash_rows, Decimal('0')) + equity_released - fee
+        closing_balance = financing[-1]['remaining_mortgage_balance'] if financing else Decimal('0')
+
+        return {
+            'year_1_net_cash_flow_after_tax': cash_rows[0],
+            'ten_year_after_tax_cash': ten_year_cash,
+            'closing_mortgage_balance': closing_balance,
+            'cash_in_deal': cash_in_deal,
+            # Infinite return when all cash has been pulled out
+            'nrat': (cash_rows[0] / cash_in_deal) * 100 if cash_in_deal > 0 else None,
+        }
+
+    @staticmethod
+    def rank_key(result, rank_by):
+        """Sort key, highest first, for one result"""
+        value = result[rank_by]
+        if value is not None:
+            return (1, value)
+        # An unbounded NRAT (no cash left in) beats any finite one if the product still pays its
+        # way, and is worse than all of them if it loses money every year
+        return (2 if result['year_1_net_cash_flow_after_tax'] > 0 else 0, Decimal('0'))
+
+    def optimise(self, property_obj, candidates=None, rank_by='ten_year_after_tax_cash', limit=10):
+        """Rank candidate products against the current mortgage for a Property"""
+        if rank_by not in ('ten_year_after_tax_cash', 'nrat'):
+            raise ValueError("rank_by must be 'ten_year_after_tax_cash' or 'nrat'")
+        if limit is not None and limit < 0:
+            raise ValueError('limit must be 0 or more')
+        if candidates is None:
+            candidates = self.build_grid()
+
+        operating = property_operating_projection(property_obj, self.years)
+        tax_profile = property_tax_profile(property_obj)
+        cash_deployed = property_cash_deployed(property_obj)
+        current_balance = property_obj.outstanding_mortgage_balance if property_obj.has_mortgage else Decimal('0')
+
+        current_financing = property_mortgage_schedule(property_obj, self.years)
+        current = self.summarise(self.after_tax_cash(operating, current_financing, tax_profile),
+                                 current_financing, cash_deployed, Decimal('0'), Decimal('0'))
+
+        balances = [self.new_loan_amount(property_obj, c['ltv']) for c in candidates]
+        schedules = self.amortise(balances, candidates)
+
+        results = []
+        for candidate, balance, financing in zip(candidates, balances, schedules):
+            equity_released = balance - current_balance
+            summary = self.summarise(self.after_tax_cash(operating, financing, tax_profile),
+                                     financing, cash_deployed, equity_released, candidate['arrangement_fee'])
+            summary.update(candidate)
+            summary['loan_amount'] = balance
+            summary['equity_released'] = equity_released
+            summary['ten_year_cash_vs_current'] = summary['ten_year_after_tax_cash'] - current['ten_year_after_tax_cash']
+            results.append(summary)
+
+        results.sort(key=lambda r: self.rank_key(r, rank_by), reverse=True)
+
+        return {
+            'current': current,
+            'candidates_evaluated': len(results),
+            'rank_by': rank_by,
+            'results': results[:limit] if limit else results,
+        }
+
+
+# Global optimiser instance
+refinance_optimiser = RefinanceOptimiser()
@@ -0,0 +1,120 @@
+"""
+Renters' Rights Act rent reviews across every portfolio.
+
+Under Section 13 the rent can only go up once a year, on two months' notice.
+A scheduled batch proposes a review for each property that can next be
+increased within the notice period, suggesting a new weekly rent from the
+growth rate used in the cashflow projections (or a market index rate passed
+in), and applies the reviews landlords have approved once they take effect.
+A review the landlord declines holds off the next one until its effective
+date has passed and a year has gone by since it was declined.
+Both passes work in batches with bulk_create and bulk_update rather than
+saving properties one at a time.
+"""
+import calendar
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Property, RentReview
+from .cashflow import RENTAL_GROWTH_RATE
+from .compliance import RENT_INCREASE_INTERVAL, next_rent_increase_date
+
+NOTICE_MONTHS = 2
+REVIEW_BATCH_SIZE = 1000
+
+
+def add_months(day, months):
+    """The same day of the month, months later, or the last day of a shorter month"""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def next_permitted_increase(last_increase, today):
+    """Earliest date a new rent can take effect if notice is served today"""
+    earliest = add_months(today, NOTICE_MONTHS)
+    anniversary = next_rent_increase_date(last_increase)
+    return max(earliest, anniversary) if anniversary else earliest
+
+
+def suggested_rent(weekly_rent, growth_rate=RENTAL_GROWTH_RATE):
+    """A year's growth on the weekly rent, to the whole pound"""
+    return (weekly_rent * (1 + growth_rate)).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+
+
+def due_for_review(today):
+    """Properties whose next increase could take effect by the end of a notice served today"""
+    cutoff = add_months(today, NOTICE_MONTHS) - RENT_INCREASE_INTERVAL
+    recently_declined = (RentReview.objects
+                         .filter(status=RentReview.DECLINED)
+                         .filter(Q(effective_date__gte=today) | Q(updated_at__date__gt=today - RENT_INCREASE_INTERVAL)))
+    return (Property.objects
+            .filter(weekly_rent__gt=0)
+            .filter(Q(last_rent_increase_date__isnull=True) | Q(last_rent_increase_date__lte=cutoff))
+            .exclude(rent_reviews__status__in=RentReview.OPEN_STATUSES)
+            .exclude(pk__in=recently_declined.values('property_id')))
+
+
+def propose_rent_reviews(today=None, growth_rate=RENTAL_GROWTH_RATE, batch_size=REVIEW_BATCH_SIZE):
+    """Create a review for every property that is due one, returning how many were created"""
+    today = today or date.today()
+    rows = due_for_review(today).order_by().values_list('id', 'weekly_rent', 'last_rent_increase_date')
+
+    created = 0
+    batch = []
+    for property_id, weekly_rent, last_increase in rows.iterator(chunk_size=batch_size):
+        batch.append(RentReview(
+            property_id=property_id,
+            current_weekly_rent=weekly_rent,
+            proposed_weekly_rent=suggested_rent(weekly_rent, growth_rate),
+            growth_rate=growth_rate,
+            effective_date=next_permitted_increase(last_increase, today),
+        ))
+        if len(batch) >= batch_size:
+            created += len(RentReview.objects.bulk_create(batch))
+            batch = []
+    if batch:
+        created += len(RentReview.objects.bulk_create(batch))
+    return created
+
+
+def apply_rent_reviews(today=None, batch_size=REVIEW_BATCH_SIZE):
+    """Put approved reviews that have taken effect into the properties' rent, returning how many were applied"""
+    today = today or date.today()
+    due = (RentReview.objects
+           .filter(status=RentReview.APPROVED, effective_date__lte=today)
+           .select_related('property')
+           .order_by('id'))
+
+    applied = 0
+    while True:
+        with transaction.atomic():
+            reviews = list(due.select_for_update(of=('self',))[:batch_size])
+            if not reviews:
+                break
+            # bulk_update skips auto_now, and updated_at is what invalidates cached projections and cards
+            now = timezone.now()
+            properties = []
+            for review in reviews:
+                review.property.weekly_rent = review.proposed_weekly_rent
+                review.property.last_rent_increase_date = review.effective_date
+                review.property.updated_at = now
+                properties.append(review.property)
+                review.status = RentReview.APPLIED
+                review.updated_at = now
+            Property.objects.bulk_update(properties, ['weekly_rent', 'last_rent_increase_date', 'updated_at'])
+            RentReview.objects.bulk_update(reviews, ['status', 'updated_at'])
+        applied += len(reviews)
+    return applied
+
+
+def run_rent_reviews(today=None, growth_rate=RENTAL_GROWTH_RATE, batch_size=REVIEW_BATCH_SIZE):
+    """The scheduled batch: apply approved reviews, then propose the next ones"""
+    today = today or date.today()
+    applied = apply_rent_reviews(today, batch_size)
+    proposed = propose_rent_reviews(today, growth_rate, batch_size)
+    return {'applied': applied, 'proposed': proposed}
@@ -0,0 +1,245 @@
+"""
+Chunked, resumable PropertyDocument uploads.
+
+A client starts an upload with the file's name and size, then sends the
+bytes in order as a series of short requests, each carrying its offset. A
+chunk is streamed from the request straight into storage as a part file and
+hashed as it goes, so neither the worker's memory nor a single long request
+holds the whole document. After a dropped connection the client asks for the
+offset and carries on from there.
+
+Parts are kept on local disk in DOCUMENT_UPLOAD_STAGING_ROOT, whatever the
+media storage is: Cloudinary would take each byte range as an image upload,
+and reading them back would download every part. The directory is outside
+MEDIA_ROOT, so half-uploaded leases aren't served as media. Only the
+assembled file goes to the document field's storage, so all the workers
+taking an upload's chunks need to share that directory.
+
+The SHA-256 state lives in the worker process between chunks. If the next
+chunk reaches another worker, that worker catches up by hashing the parts
+already stored. When the last byte arrives the parts are streamed into the
+document's file and the upload becomes a PropertyDocument.
+"""
+import hashlib
+import io
+import os
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import DocumentUpload, PropertyDocument
+
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # suggested to clients
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+MAX_DOCUMENT_SIZE = 500 * 1024 * 1024
+READ_SIZE = 64 * 1024
+UPLOAD_PARTS_DIR = 'document_uploads'
+STALE_UPLOAD_AGE = timedelta(days=2)
+
+# upload id -> (offset, hasher), for the uploads this process has received chunks for
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+def staging_storage():
+    """Local storage for the parts of uploads in progress"""
+    return FileSystemStorage(location=settings.DOCUMENT_UPLOAD_STAGING_ROOT)
+
+
+class UploadError(Exception):
+    """A chunk or upload that can't be accepted; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def part_name(upload, offset):
+    # Unique per attempt, so a chunk sent twice at once can't overwrite the copy that was kept
+    return f'{UPLOAD_PARTS_DIR}/{upload.pk}/{offset:012d}-{uuid.uuid4().hex[:8]}.part'
+
+
+class HashingReader(io.RawIOBase):
+    """Reads exactly length bytes from a stream, adding them to a hasher on the way"""
+
+    def __init__(self, stream, length, hasher):
+        self.stream = stream
+        self.remaining = length
+        self.hasher = hasher
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.remaining <= 0:
+            return 0
+        data = self.stream.read(min(len(buffer), self.remaining, READ_SIZE))
+        if not data:
+            raise UploadError('The chunk ended before its Content-Length')
+        self.remaining -= len(data)
+        self.hasher.update(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class PartsReader(io.RawIOBase):
+    """Reads an upload's stored parts one after the other, as a single file"""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.current = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self.current is None:
+                if not self.names:
+                    return 0
+                self.current = staging_storage().open(self.names.pop(0), 'rb')
+            data = self.current.read(len(buffer))
+            if data:
+                buffer[:len(data)] = data
+                return len(data)
+            self.current.close()
+            self.current = None
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+        super().close()
+
+
+def _stored_hasher(upload):
+    """A hasher over everything received so far, from this process's memory or the stored parts"""
+    with _hashers_lock:
+        offset, hasher = _hashers.get(upload.pk, (None, None))
+    if offset == upload.offset:
+        return hasher.copy()
+
+    hasher = hashlib.sha256()
+    with io.BufferedReader(PartsReader(upload.parts)) as parts:
+        for block in iter(lambda: parts.read(READ_SIZE), b''):
+            hasher.update(block)
+    return hasher
+
+
+def start_upload(property_obj, filename, size, document_type, title, description='', sha256=''):
+    if not 0 < size <= MAX_DOCUMENT_SIZE:
+        raise UploadError(f'Documents must be between 1 byte and {MAX_DOCUMENT_SIZE // (1024 * 1024)} MB')
+    if document_type not in dict(PropertyDocument.DOCUMENT_TYPES):
+        raise UploadError('Unknown document type')
+    if sha256 and (len(sha256) != 64 or any(c not in '0123456789abcdef' for c in sha256.lower())):
+        raise UploadError('sha256 must be 64 hex digits')
+    return DocumentUpload.objects.create(
+        property=property_obj,
+        filename=os.path.basename(filename)[:255] or 'document',
+        size=size,
+        document_type=document_type,
+        title=title[:200] or os.path.basename(filename)[:200],
+        description=description[:500],
+        expected_sha256=sha256.lower(),
+    )
+
+
+def receive_chunk(upload, offset, length, stream):
+    """
+    Store the next chunk of an upload, streamed from the request body.
+
+    Returns the PropertyDocument once the upload is complete, None before.
+    """
+    if offset != upload.offset:
+        raise UploadError(f'Expected the chunk at offset {upload.offset}', status=409)
+    if not 0 < length <= MAX_CHUNK_SIZE:
+        raise UploadError(f'Chunks must be between 1 byte and {MAX_CHUNK_SIZE // (1024 * 1024)} MB')
+    if offset + length > upload.size:
+        raise UploadError('The chunk runs past the end of the file')
+
+    hasher = _stored_hasher(upload)
+    name = part_name(upload, offset)
+    storage = staging_storage()
+    try:
+        stored = storage.save(name, File(HashingReader(stream, length, hasher), name=name))
+    except Exception:
+        storage.delete(name)
+        raise
+
+    # Only one request can move the offset on, if two send the same chunk
+    with transaction.atomic():
+        current = DocumentUpload.objects.select_for_update().get(pk=upload.pk)
+        if current.offset != offset:
+            storage.delete(stored)
+            raise UploadError('Another request already sent this chunk', status=409)
+        upload.parts = current.parts + [stored]
+        upload.offset = offset + length
+        upload.save(update_fields=['parts', 'offset', 'updated_at'])
+
+    with _hashers_lock:
+        _hashers[upload.pk] = (upload.offset, hasher)
+
+    if upload.offset == upload.size:
+        return complete_upload(upload, hasher.hexdigest())
+    return None
+
+
+def complete_upload(upload, sha256=None):
+    """Turn a fully received upload into a PropertyDocument"""
+    if upload.offset != upload.size:
+        raise UploadError(f'Only {upload.offset} of {upload.size} bytes have arrived', status=409)
+    if sha256 is None:
+        sha256 = _stored_hasher(upload).hexdigest()
+    upload_id, names = upload.pk, list(upload.parts)
+
+    if upload.expected_sha256 and upload.expected_sha256 != sha256:
+        abort_upload(upload)
+        raise UploadError('The file received does not match its SHA-256, please upload it again', status=422)
+
+    document = PropertyDocument(
+        property=upload.property,
+        document_type=upload.document_type,
+        title=upload.title,
+        description=upload.description,
+        size=upload.size,
+        sha256=sha256,
+    )
+    # If this fails the parts are kept, so completing can be retried
+    with io.BufferedReader(PartsReader(names)) as parts:
+        content = File(parts, name=upload.filename)
+        # Already hashed, so content-addressed storage doesn't read the parts twice
+        content.sha256 = sha256
+        document.file.save(upload.filename, content, save=False)
+    with transaction.atomic():
+        document.save()
+        upload.delete()
+    discard_parts(upload_id, names)
+    return document
+
+
+def discard_parts(upload_id, names):
+    with _hashers_lock:
+        _hashers.pop(upload_id, None)
+    storage = staging_storage()
+    for name in names:
+        storage.delete(name)
+
+
+def abort_upload(upload):
+    discard_parts(upload.pk, upload.parts)
+    upload.delete()
+
+
+def purge_stale_uploads(age=STALE_UPLOAD_AGE):
+    """Abort uploads that haven't received a chunk for a while, returning how many there were"""
+    stale = DocumentUpload.objects.filter(updated_at__lt=timezone.now() - age)
+    count = 0
+    for upload in stale.iterator():
+        abort_upload(upload)
+        count += 1
+    return count
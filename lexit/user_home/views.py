@@ -2,10 +2,13 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
 from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
 from decimal import Decimal
 from news.models import NewsArticle
 from datetime import date
@@ -16,6 +19,16 @@ from .utils.corp_tax_calculator import corp_tax_calculator
 from .utils.offshore_tax_calculator import offshore_tax_calculator
 from .utils.tax_calculator import income_tax_calculator as tax_calculator
 from .utils.sdlt_calculator import sdlt_calculator
+from .utils.cashflow import project_deal_cashflow, project_property_cashflow
+from .utils.portfolio import analyse_portfolio_what_if, get_property_projection, projection_cache_key
+from .utils.capital_growth import capital_growth_scenarios
+from .utils.fragments import render_property_cards
+from .utils.refinance import refinance_optimiser
+from .utils.dealgraph import DEAL_GRAPH, DEAL_GRAPH_INPUTS
+from .utils.compliance import RRA_COMPLIANCE, portfolio_compliance
+from .utils.rent_review import next_permitted_increase
+from .utils import uploads
+from .utils.document_search import search_documents
 
 
 logger = logging.getLogger(__name__)
@@ -137,7 +150,7 @@ def calculate_nrat(property_obj, net_return_after_tax):
     print(f"=== END NRAT CALCULATION DEBUG ===\n")
     
     return result
-from .models import Property
+from .models import DocumentUpload, Property, RentReview
 from .forms import PropertyForm
 
 # Create your views here.
@@ -389,7 +402,7 @@ def user_home(request):
 
     # Get recent news articles for the dashboard
     try:
-        recent_articles = NewsArticle.objects.all()[:4]
+        recent_articles = NewsArticle.objects.only(*NewsArticle.LISTING_FIELDS)[:4]
     except:
         recent_articles = []
 
@@ -398,6 +411,7 @@ def user_home(request):
         'user': user,
         'profile': profile,
         'properties': properties[:5],  # Show only 5 most recent
+        'property_cards': render_property_cards(properties[:3]),
         'recent_articles': recent_articles,  # Add recent articles
         'total_properties': total_properties,
         'total_weekly_rent': total_weekly_rent,
@@ -632,43 +646,46 @@ def upload_property(request):
     }
     return render(request, 'user_home/property_form.html', context)
 
+def _deal_data_from_post(post):
+    """Parse the analyse deal form into the deal_data dict used by the calculations"""
+    return {
+        'deal_name': post.get('deal_name'),
+        'property_type': post.get('property_type'),
+        'number_bedrooms': int(post.get('number_bedrooms') or 0),
+        'number_bathrooms': int(post.get('number_bathrooms') or 0),
+        'car_parking_spaces': int(post.get('car_parking_spaces') or 0),
+        'epc_rating': post.get('epc_rating'),
+        'purchase_price': Decimal(post.get('purchase_price') or 0),
+        'deposit_paid': Decimal(post.get('deposit_paid') or 0),
+        'current_market_value': Decimal(post.get('current_market_value') or 0),
+        'weekly_rent': Decimal(post.get('weekly_rent') or 0),
+        'ownership_status': post.get('ownership_status'),
+        'has_mortgage': post.get('has_mortgage') == 'on',
+        'mortgage_type': post.get('mortgage_type'),
+        'outstanding_mortgage_balance': Decimal(post.get('outstanding_mortgage_balance') or 0) or (Decimal(post.get('purchase_price') or 0) - Decimal(post.get('deposit_paid') or 0)),
+        'mortgage_interest_rate': Decimal(post.get('mortgage_interest_rate') or 0),
+        'mortgage_years_remaining': int(post.get('mortgage_years_remaining') or 0),
+        'conveyancing_fees': Decimal(post.get('conveyancing_fees') or 0),
+        'mortgage_arrangement_fees': Decimal(post.get('mortgage_arrangement_fees') or 0),
+        'survey_costs': Decimal(post.get('survey_costs') or 0),
+        'management_fees': Decimal(post.get('management_fees') or 0),
+        'service_charge': Decimal(post.get('service_charge') or 0),
+        'ground_rent': Decimal(post.get('ground_rent') or 0),
+        'selective_license_fee': Decimal(post.get('selective_license_fee') or 0),
+        'accounting_costs': Decimal(post.get('accounting_costs') or 0),
+        'gas_electrical_testing': Decimal(post.get('gas_electrical_testing') or 0),
+        'landlord_insurance': Decimal(post.get('landlord_insurance') or 0),
+        'other_costs': Decimal(post.get('other_costs') or 0),
+        'annual_income': Decimal(post.get('annual_income') or 0),
+        'is_uk_resident': post.get('is_uk_resident') == 'on',
+        'has_personal_allowance': post.get('has_personal_allowance') == 'on',
+    }
+
 @login_required
 def analyse_deal(request):
     """View for analysing a potential investment deal"""
     if request.method == 'POST':
-        # Get form data
-        deal_data = {
-            'deal_name': request.POST.get('deal_name'),
-            'property_type': request.POST.get('property_type'),
-            'number_bedrooms': int(request.POST.get('number_bedrooms') or 0),
-            'number_bathrooms': int(request.POST.get('number_bathrooms') or 0),
-            'car_parking_spaces': int(request.POST.get('car_parking_spaces') or 0),
-            'epc_rating': request.POST.get('epc_rating'),
-            'purchase_price': Decimal(request.POST.get('purchase_price') or 0),
-            'deposit_paid': Decimal(request.POST.get('deposit_paid') or 0),
-            'current_market_value': Decimal(request.POST.get('current_market_value') or 0),
-            'weekly_rent': Decimal(request.POST.get('weekly_rent') or 0),
-            'ownership_status': request.POST.get('ownership_status'),
-            'has_mortgage': request.POST.get('has_mortgage') == 'on',
-            'mortgage_type': request.POST.get('mortgage_type'),
-            'outstanding_mortgage_balance': Decimal(request.POST.get('outstanding_mortgage_balance') or 0) or (Decimal(request.POST.get('purchase_price') or 0) - Decimal(request.POST.get('deposit_paid') or 0)),
-            'mortgage_interest_rate': Decimal(request.POST.get('mortgage_interest_rate') or 0),
-            'mortgage_years_remaining': int(request.POST.get('mortgage_years_remaining') or 0),
-            'conveyancing_fees': Decimal(request.POST.get('conveyancing_fees') or 0),
-            'mortgage_arrangement_fees': Decimal(request.POST.get('mortgage_arrangement_fees') or 0),
-            'survey_costs': Decimal(request.POST.get('survey_costs') or 0),
-            'management_fees': Decimal(request.POST.get('management_fees') or 0),
-            'service_charge': Decimal(request.POST.get('service_charge') or 0),
-            'ground_rent': Decimal(request.POST.get('ground_rent') or 0),
-            'selective_license_fee': Decimal(request.POST.get('selective_license_fee') or 0),
-            'accounting_costs': Decimal(request.POST.get('accounting_costs') or 0),
-            'gas_electrical_testing': Decimal(request.POST.get('gas_electrical_testing') or 0),
-            'landlord_insurance': Decimal(request.POST.get('landlord_insurance') or 0),
-            'other_costs': Decimal(request.POST.get('other_costs') or 0),
-            'annual_income': Decimal(request.POST.get('annual_income') or 0),
-            'is_uk_resident': request.POST.get('is_uk_resident') == 'on',
-            'has_personal_allowance': request.POST.get('has_personal_allowance') == 'on',
-        }
+        deal_data = _deal_data_from_post(request.POST)
         
         # STANDARD METRICS
         vacancy_rate = Decimal('0.0385')  # 3.85%
@@ -764,216 +781,7 @@ def analyse_deal(request):
         # 10-YEAR CASHFLOW PROJECTION
         # ============================================
         
-        cashflow_projection = []
-        tax_loss_carryforward = Decimal('0')
-        
-        # Calculate fixed monthly payment for Principal & Interest mortgages
-        if deal_data['has_mortgage'] and deal_data['mortgage_type'] == 'repayment':
-            monthly_rate = deal_data['mortgage_interest_rate'] / 100 / 12
-            num_payments = deal_data['mortgage_years_remaining'] * 12
-            if monthly_rate > 0:
-                fixed_monthly_payment = (deal_data['outstanding_mortgage_balance'] * monthly_rate * ((1 + monthly_rate) ** num_payments)) / \
-                                      (((1 + monthly_rate) ** num_payments) - 1)
-            else:
-                fixed_monthly_payment = deal_data['outstanding_mortgage_balance'] / num_payments if num_payments > 0 else Decimal('0')
-        else:
-            fixed_monthly_payment = Decimal('0')
-        
-        remaining_balance = deal_data['outstanding_mortgage_balance'] if deal_data['has_mortgage'] else Decimal('0')
-        
-        for year in range(1, 11):  # Years 1-10
-            # Project rental income with growth
-            projected_annual_rent = annual_rent * ((1 + rental_growth_rate) ** (year - 1))
-            projected_vacancy_loss = projected_annual_rent * vacancy_rate
-            projected_gross_rent = projected_annual_rent - projected_vacancy_loss
-            
-            # Project expenses with inflation
-            projected_management = (projected_gross_rent * deal_data['management_fees'] / 100)
-            projected_service_charge = (deal_data['service_charge']) * ((1 + inflation_rate) ** (year - 1))
-            projected_ground_rent = (deal_data['ground_rent']) * ((1 + inflation_rate) ** (year - 1))
-            projected_selective_license = (deal_data['selective_license_fee']) * ((1 + inflation_rate) ** (year - 1))
-            projected_accounting = (deal_data['accounting_costs']) * ((1 + inflation_rate) ** (year - 1))
-            projected_gas_electrical = (deal_data['gas_electrical_testing']) * ((1 + inflation_rate) ** (year - 1))
-            projected_insurance = (deal_data['landlord_insurance']) * ((1 + inflation_rate) ** (year - 1))
-            projected_other = (deal_data['other_costs']) * ((1 + inflation_rate) ** (year - 1))
-            projected_maintenance = (projected_gross_rent * maintenance_rate)
-            
-            projected_total_expenses = (projected_management + projected_service_charge + 
-                                       projected_ground_rent + projected_selective_license +
-                                       projected_accounting + projected_gas_electrical +
-                                       projected_insurance + projected_other + projected_maintenance)
-            
-            # Calculate mortgage payments
-            if deal_data['has_mortgage']:
-                if deal_data['mortgage_type'] == 'repayment':
-                    # Calculate interest on current balance
-                    annual_interest = remaining_balance * (deal_data['mortgage_interest_rate'] / 100)
-                    annual_interest_payment = annual_interest
-                    
-                    # Total annual payment
-                    annual_total_mortgage_payment = fixed_monthly_payment * 12
-                    
-                    # Principal payment is total - interest
-                    annual_principal_payment = annual_total_mortgage_payment - annual_interest_payment
-                    
-                    # Update remaining balance
-                    remaining_balance = max(Decimal('0'), remaining_balance - annual_principal_payment)
-                else:  # interest_only
-                    annual_interest_payment = deal_data['outstanding_mortgage_balance'] * (deal_data['mortgage_interest_rate'] / 100)
-                    annual_principal_payment = Decimal('0')
-                    annual_total_mortgage_payment = annual_interest_payment
-            else:
-                annual_interest_payment = Decimal('0')
-                annual_principal_payment = Decimal('0')
-                annual_total_mortgage_payment = Decimal('0')
-            
-            # Net Operating Income
-            net_operating_income = projected_gross_rent - projected_total_expenses
-            net_cash_flow_before_tax = net_operating_income - annual_total_mortgage_payment
-            
-            # ============================================
-            # TAX CALCULATIONS
-            # ============================================
-            
-            # Taxable profit for company (interest is deductible, principal is not)
-            company_taxable_profit = net_operating_income - annual_interest_payment
-            corporate_tax = corp_tax_calculator.calculate_corporation_tax(company_taxable_profit)
-            
-            # Tax payable if owned individually (onshore)
-            # Apply inflation growth to personal income
-            if year == 1:
-                personal_income = deal_data['annual_income']
-            else:
-                personal_income = deal_data['annual_income'] * ((1 + inflation_rate) ** (year - 1))
-            
-            rental_profit = net_operating_income  # Gross rental income - total operating expenses
-            
-            # Tax without property
-            tax_result_without = tax_calculator.calculate_income_tax(personal_income)
-            notional_income_tax_without_property = tax_result_without['tax_payable']
-            
-            # Tax with property (personal income + rental profit)
-            total_income_with_property = personal_income + rental_profit
-            tax_result_with = tax_calculator.calculate_income_tax(total_income_with_property)
-            tax_with_property_before_relief = tax_result_with['tax_payable']
-            
-            # Apply 20% mortgage interest relief
-            interest_rate_relief = annual_interest_payment * Decimal('0.20')
-            tax_with_property_after_relief = max(0, tax_with_property_before_relief - interest_rate_relief)
-            
-            # Final tax payable = tax with property - tax without property
-            tax_payable_on_shore_individual = tax_with_property_after_relief - notional_income_tax_without_property
-            
-            # Debug output for Year 1
-            if year == 1:
-                print(f"\n=== TAX CALCULATION DEBUG Year {year} ===")
-                print(f"Deal: {deal_data['deal_name']}")
-                print(f"Ownership status: {deal_data['ownership_status']}")
-                print(f"Personal income: £{personal_income:,.2f}")
-                print(f"Net operating income (rental profit): £{net_operating_income:,.2f}")
-                print(f"Annual interest payment: £{annual_interest_payment:,.2f}")
-                print(f"\nTax calculation:")
-                print(f"  Tax without property: £{notional_income_tax_without_property:,.2f}")
-                print(f"  Total income with property: £{total_income_with_property:,.2f}")
-                print(f"  Tax with property before relief: £{tax_with_property_before_relief:,.2f}")
-                print(f"  Interest rate relief (20%): £{interest_rate_relief:,.2f}")
-                print(f"  Tax with property after relief: £{tax_with_property_after_relief:,.2f}")
-                print(f"  Tax payable onshore individual: £{tax_payable_on_shore_individual:,.2f}")
-                print(f"=== END TAX DEBUG ===\n")
-            
-            # Tax payable if owned by foreign individual (offshore)
-            if year == 1:
-                personal_income_offshore = deal_data['annual_income']
-            else:
-                personal_income_offshore = deal_data['annual_income'] * ((1 + inflation_rate) ** (year - 1))
-            
-            rental_profit_offshore = net_operating_income
-            
-            # Tax without property (offshore rates)
-            notional_income_tax_without_property_offshore = offshore_tax_calculator.calculate_offshore_tax(personal_income_offshore)['tax_payable']
-            
-            # Tax with property (personal income + rental profit)
-            total_income_with_property_offshore = personal_income_offshore + rental_profit_offshore
-            tax_with_property_before_relief_offshore = offshore_tax_calculator.calculate_offshore_tax(total_income_with_property_offshore)['tax_payable']
-            
-            # Apply 20% mortgage interest relief
-            interest_rate_relief_offshore = annual_interest_payment * Decimal('0.20')
-            tax_with_property_after_relief_offshore = max(0, tax_with_property_before_relief_offshore - interest_rate_relief_offshore)
-            
-            # Final tax payable = tax with property - tax without property
-            tax_payable_offshore_individual = tax_with_property_after_relief_offshore - notional_income_tax_without_property_offshore
-            
-            # Determine applicable tax before carryforward adjustments
-            if deal_data['ownership_status'] == 'company':
-                gross_applicable_tax = corporate_tax
-            elif deal_data['ownership_status'] == 'individual':
-                gross_applicable_tax = tax_payable_on_shore_individual
-            elif deal_data['ownership_status'] == 'individual_offshore':
-                gross_applicable_tax = tax_payable_offshore_individual
-            else:
-                gross_applicable_tax = Decimal('0')
-            
-            # Debug output for Year 1
-            if year == 1:
-                print(f"\n=== APPLICABLE TAX DETERMINATION Year {year} ===")
-                print(f"Ownership status: {deal_data['ownership_status']}")
-                print(f"Corporate tax: £{corporate_tax:,.2f}")
-                print(f"Tax payable onshore individual: £{tax_payable_on_shore_individual:,.2f}")
-                print(f"Tax payable offshore individual: £{tax_payable_offshore_individual:,.2f}")
-                print(f"Gross applicable tax (selected): £{gross_applicable_tax:,.2f}")
-                print(f"=== END APPLICABLE TAX DEBUG ===\n")
-            
-            # Apply tax corkscrew logic (loss carryforward)
-            if gross_applicable_tax < 0:
-                # Tax loss - add to carryforward balance and set current tax to 0
-                tax_loss_carryforward += abs(gross_applicable_tax)
-                applicable_tax = Decimal('0')
-                tax_loss_utilized = Decimal('0')
-            elif gross_applicable_tax > 0 and tax_loss_carryforward > 0:
-                # Positive tax - use carryforward to offset
-                if tax_loss_carryforward >= gross_applicable_tax:
-                    # Sufficient carryforward to cover all tax
-                    tax_loss_utilized = gross_applicable_tax
-                    applicable_tax = Decimal('0')
-                    tax_loss_carryforward -= gross_applicable_tax
-                else:
-                    # Partial offset - use all remaining carryforward
-                    tax_loss_utilized = tax_loss_carryforward
-                    applicable_tax = gross_applicable_tax - tax_loss_carryforward
-                    tax_loss_carryforward = Decimal('0')
-            else:
-                # Positive tax with no carryforward
-                applicable_tax = gross_applicable_tax
-                tax_loss_utilized = Decimal('0')
-            
-            # Calculate net cash flow after tax
-            net_cash_flow_after_tax = net_cash_flow_before_tax - applicable_tax
-            
-            # Net income for tax purposes (excluding principal payments)
-            net_income_for_tax = net_operating_income - annual_interest_payment
-            
-            cashflow_projection.append({
-                'year': year,
-                'gross_rent': projected_gross_rent,
-                'total_expenses': projected_total_expenses,
-                'net_operating_income': net_operating_income,
-                'annual_interest_payment': annual_interest_payment,
-                'annual_principal_payment': annual_principal_payment,
-                'annual_total_mortgage_payment': annual_total_mortgage_payment,
-                'net_cash_flow': net_cash_flow_before_tax,
-                'net_income_for_tax': net_income_for_tax,
-                'remaining_mortgage_balance': remaining_balance,
-                'corporate_tax': corporate_tax,
-                'tax_payable_on_shore_individual': tax_payable_on_shore_individual,
-                'tax_payable_offshore_individual': tax_payable_offshore_individual,
-                'gross_applicable_tax': gross_applicable_tax,
-                'tax_loss_carryforward_beginning': tax_loss_carryforward + tax_loss_utilized - (abs(gross_applicable_tax) if gross_applicable_tax < 0 else 0),
-                'tax_loss_generated': abs(gross_applicable_tax) if gross_applicable_tax < 0 else Decimal('0'),
-                'tax_loss_utilized': tax_loss_utilized,
-                'tax_loss_carryforward_ending': tax_loss_carryforward,
-                'applicable_tax': applicable_tax,
-                'net_cash_flow_after_tax': net_cash_flow_after_tax,
-            })
+        cashflow_projection = project_deal_cashflow(deal_data)
         
         # ============================================
         # NRAT CALCULATION
@@ -1282,6 +1090,64 @@ def analyse_deal(request):
     }
     return render(request, 'user_home/analyse_deal.html', context)
 
+
+def _json_ready(value):
+    """Convert Decimals in nested dicts/lists to floats for JsonResponse"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, dict):
+        return {k: _json_ready(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_ready(v) for v in value]
+    return value
+
+@login_required
+def analyse_deal_portfolio(request):
+    """What-if analysis of adding the posted deal to the user's existing portfolio"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+
+    try:
+        deal_data = _deal_data_from_post(request.POST)
+    except (ValueError, ArithmeticError):
+        return JsonResponse({'success': False, 'error': 'Invalid deal figures'}, status=400)
+
+    properties = Property.objects.filter(owner=request.user)
+    result = analyse_portfolio_what_if(properties, deal_data)
+    return JsonResponse({'success': True, **_json_ready(result)})
+
+DEAL_GRAPH_CACHE_TIMEOUT = 60 * 60  # 1 hour
+
+@login_required
+def analyse_deal_recalculate(request):
+    """Recalculate only the deal outputs affected by the fields that changed since the last call"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+
+    try:
+        deal_data = _deal_data_from_post(request.POST)
+    except (ValueError, ArithmeticError):
+        return JsonResponse({'success': False, 'error': 'Invalid deal figures'}, status=400)
+
+    if not request.session.session_key:
+        request.session.save()
+    cache_key = f"user_home:deal_graph:{request.session.session_key}"
+
+    inputs = {name: deal_data[name] for name in DEAL_GRAPH_INPUTS}
+    values = cache.get(cache_key)
+    if values is None or request.POST.get('reset'):
+        values = DEAL_GRAPH.evaluate(inputs)
+        changed, recomputed = None, list(DEAL_GRAPH.order)
+    else:
+        changed, recomputed = DEAL_GRAPH.update(values, inputs)
+    cache.set(cache_key, values, DEAL_GRAPH_CACHE_TIMEOUT)
+
+    return JsonResponse({
+        'success': True,
+        'outputs': _json_ready(DEAL_GRAPH.output_values(values, changed)),
+        'recomputed': recomputed,
+    })
+
 @login_required
 def property_detail(request, slug):
     """View for displaying property details"""
@@ -1295,8 +1161,6 @@ def property_detail(request, slug):
     # STANDARD METRICS
     vacancy_rate = Decimal('0.0385')  # 3.85%
     maintenance_rate = Decimal('0.035')  # 3.5%
-    inflation_rate = Decimal('0.028')  # 2.8%
-    rental_growth_rate = Decimal('0.0371')  # 3.71%
 
     # Estimated Market Value
     estimated_market_value = property_obj.estimated_market_value or Decimal('0')
@@ -1440,545 +1304,18 @@ def property_detail(request, slug):
     else:
         opex_load = None  # Not applicable if no gross rent
 
-    # NRAT will be calculated after cashflow projection using Year 1 figures
-    # This is a placeholder - actual calculation happens after cashflow projection
-    nrat_result = None
-    nrat_percentage = 0
-
-    ## CASHFLOWS ##
-    # Annual Cash Flow with Mortgage Payment Breakdown and Tax Corkscrew
-    cashflow_projection = []
-    remaining_balance = property_obj.outstanding_mortgage_balance if property_obj.has_mortgage else Decimal('0')
-    tax_loss_carryforward = Decimal('0')  # Initialize tax loss carryforward balance
-    
-    # Calculate fixed monthly payment for principal & interest mortgages (stays constant throughout loan)
-    fixed_monthly_payment = Decimal('0')
-    if property_obj.has_mortgage and property_obj.mortgage_type == 'principal_and_interest' and property_obj.mortgage_interest_rate and property_obj.mortgage_years_remaining:
-        monthly_interest_rate = property_obj.mortgage_interest_rate / Decimal('100') / Decimal('12')
-        total_payments = property_obj.mortgage_years_remaining * 12
-        P = property_obj.outstanding_mortgage_balance
-        r = float(monthly_interest_rate)
-        n = total_payments
-        
-        if r > 0:
-            fixed_monthly_payment = Decimal(str(float(P) * (r * (1 + r) ** n) / ((1 + r) ** n - 1)))
-        else:
-            fixed_monthly_payment = P / Decimal(str(n))
-    
-    for year in range(1, 11):
-        # Year 1 = current year (no growth), growth starts from Year 2
-        if year == 1:
-            projected_rent = annual_rent
-        else:
-            projected_rent = annual_rent * ((1 + rental_growth_rate) ** (year - 1))
-        
-        projected_vacancy_loss = projected_rent * vacancy_rate
-        projected_gross_rent = projected_rent - projected_vacancy_loss
-
-        projected_property_management_fees = projected_gross_rent * (property_obj.property_management_fees / 100)
-        
-        # Service charge and other costs increase by inflation, ground rent stays fixed
-        if year == 1:
-            projected_service_charge = property_obj.service_charge
-            projected_other_annual_costs = property_obj.other_annual_costs
-        else:
-            projected_service_charge = property_obj.service_charge * ((1 + inflation_rate) ** (year - 1))
-            projected_other_annual_costs = property_obj.other_annual_costs * ((1 + inflation_rate) ** (year - 1))
-        
-        projected_ground_rent = property_obj.ground_rent  # Always fixed
-        projected_maintenance = projected_gross_rent * maintenance_rate
-
-        projected_total_expenses = (projected_property_management_fees + projected_service_charge +
-                                   projected_ground_rent + projected_other_annual_costs + projected_maintenance)
-
-        # Calculate annual mortgage payments and breakdown
-        annual_interest_payment = Decimal('0')
-        annual_principal_payment = Decimal('0')
-        annual_total_mortgage_payment = Decimal('0')
-        
-        if property_obj.has_mortgage and remaining_balance > 0:
-            if property_obj.mortgage_type == 'interest_only':
-                # Interest-only: same interest payment each year until loan term ends
-                monthly_interest_rate = property_obj.mortgage_interest_rate / Decimal('100') / Decimal('12')
-                annual_interest_payment = remaining_balance * monthly_interest_rate * 12
-                annual_principal_payment = Decimal('0')
-                annual_total_mortgage_payment = annual_interest_payment
-                # Balance remains the same for interest-only loans
-                
-            elif property_obj.mortgage_type == 'principal_and_interest':
-                # Calculate annual payments directly (like Excel model)
-                annual_interest_rate = property_obj.mortgage_interest_rate / Decimal('100')
-                years_remaining = max(0, property_obj.mortgage_years_remaining - (year - 1))
-                
-                if years_remaining > 0 and remaining_balance > 0:
-                    # Annual interest on current balance
-                    annual_interest_payment = remaining_balance * annual_interest_rate
-                    
-                    # Fixed annual total payment
-                    annual_total_mortgage_payment = fixed_monthly_payment * 12
-                    
-                    # Annual principal = total payment - interest
-                    annual_principal_payment = annual_total_mortgage_payment - annual_interest_payment
-                    
-                    # Update remaining balance for next year
-                    remaining_balance = remaining_balance - annual_principal_payment
-                else:
-                    # Mortgage is paid off
-                    annual_interest_payment = Decimal('0')
-                    annual_principal_payment = Decimal('0')
-                    annual_total_mortgage_payment = Decimal('0')
-                    remaining_balance = Decimal('0')
-        else:
-            # No mortgage or no remaining balance
-            annual_interest_payment = Decimal('0')
-            annual_principal_payment = Decimal('0')
-            annual_total_mortgage_payment = Decimal('0')
-
-        # Calculate net cash flows
-        net_operating_income = projected_gross_rent - projected_total_expenses
-        net_cash_flow_before_tax = net_operating_income - annual_total_mortgage_payment
-        
-        # Taxable profit for company (interest is deductible, principal is not)
-        company_taxable_profit = net_operating_income - annual_interest_payment
-        corporate_tax = corp_tax_calculator.calculate_corporation_tax(company_taxable_profit)
-
-        # Tax payable if owned individually (CORRECTED CALCULATION)
-        # Apply inflation growth to personal income
-        if year == 1:
-            personal_income = property_obj.annual_income
-        else:
-            personal_income = property_obj.annual_income * ((1 + inflation_rate) ** (year - 1))
-        
-        rental_profit = net_operating_income  # Gross rental income - total operating expenses
-        
-        # Tax without property
-        tax_result_without = tax_calculator.calculate_income_tax(personal_income)
-        notional_income_tax_without_property = tax_result_without['tax_payable']
-        
-        # Tax with property (personal income + rental profit)
-        total_income_with_property = personal_income + rental_profit
-        tax_result_with = tax_calculator.calculate_income_tax(total_income_with_property)
-        tax_with_property_before_relief = tax_result_with['tax_payable']
-        
-        # Apply 20% mortgage interest relief
-        interest_rate_relief = annual_interest_payment * Decimal('0.20')
-        tax_with_property_after_relief = max(0, tax_with_property_before_relief - interest_rate_relief)
-        
-        # Final tax payable = tax with property - tax without property
-        tax_payable_on_shore_individual = tax_with_property_after_relief - notional_income_tax_without_property
-
-        # Tax payable if owned by foreign individual (CORRECTED CALCULATION)
-        # Apply inflation growth to personal income
-        if year == 1:
-            personal_income_offshore = property_obj.annual_income
-        else:
-            personal_income_offshore = property_obj.annual_income * ((1 + inflation_rate) ** (year - 1))
-        
-        rental_profit_offshore = net_operating_income  # Gross rental income - total operating expenses
-        
-        # Tax without property (offshore rates)
-        notional_income_tax_without_property_offshore = offshore_tax_calculator.calculate_offshore_tax(personal_income_offshore)['tax_payable']
-        
-        # Tax with property (personal income + rental profit) - CORRECTED: using offshore rates for all income
-        total_income_with_property_offshore = personal_income_offshore + rental_profit_offshore
-        tax_with_property_before_relief_offshore = offshore_tax_calculator.calculate_offshore_tax(total_income_with_property_offshore)['tax_payable']
-        
-        # Apply 20% mortgage interest relief
-        interest_rate_relief_offshore = annual_interest_payment * Decimal('0.20')
-        tax_with_property_after_relief_offshore = max(0, tax_with_property_before_relief_offshore - interest_rate_relief_offshore)
-        
-        # Final tax payable = tax with property - tax without property
-        tax_payable_offshore_individual = tax_with_property_after_relief_offshore - notional_income_tax_without_property_offshore
-
-        # Determine applicable tax before carryforward adjustments
-        if property_obj.ownership_status == 'company':
-            gross_applicable_tax = corporate_tax
-        elif property_obj.ownership_status == 'individual':
-            if property_obj.uk_resident and property_obj.uk_taxfree_allowance:
-                gross_applicable_tax = tax_payable_on_shore_individual
-            else:
-                gross_applicable_tax = tax_payable_offshore_individual
-        else:
-            # Fallback for any other ownership status
-            gross_applicable_tax = Decimal('0')
-
-        # Apply tax corkscrew logic
-        if gross_applicable_tax < 0:
-            # Tax loss - add to carryforward balance and set current tax to 0
-            tax_loss_carryforward += abs(gross_applicable_tax)
-            applicable_tax = Decimal('0')
-            tax_loss_utilized = Decimal('0')
-        elif gross_applicable_tax > 0 and tax_loss_carryforward > 0:
-            # Positive tax - use carryforward to offset
-            if tax_loss_carryforward >= gross_applicable_tax:
-                # Sufficient carryforward to cover all tax
-                tax_loss_utilized = gross_applicable_tax
-                applicable_tax = Decimal('0')
-                tax_loss_carryforward -= gross_applicable_tax
-            else:
-                # Partial offset - use all remaining carryforward
-                tax_loss_utilized = tax_loss_carryforward
-                applicable_tax = gross_applicable_tax - tax_loss_carryforward
-                tax_loss_carryforward = Decimal('0')
-        else:
-            # Positive tax with no carryforward
-            applicable_tax = gross_applicable_tax
-            tax_loss_utilized = Decimal('0')
-
-        # Calculate net cash flow after tax
-        net_cash_flow_after_tax = net_cash_flow_before_tax - applicable_tax
-
-        # Net income for tax purposes (excluding principal payments)
-        net_income_for_tax = net_operating_income - annual_interest_payment
-        
-        cashflow_projection.append({
-            'year': year,
-            'gross_rent': projected_gross_rent,
-            'total_expenses': projected_total_expenses,
-            'net_operating_income': net_operating_income,
-            'annual_interest_payment': annual_interest_payment,
-            'annual_principal_payment': annual_principal_payment,
-            'annual_total_mortgage_payment': annual_total_mortgage_payment,
-            'net_cash_flow': net_cash_flow_before_tax,
-            'net_income_for_tax': net_income_for_tax,
-            'remaining_mortgage_balance': remaining_balance,
-            'corporate_tax': corporate_tax,
-            'tax_payable_on_shore_individual': tax_payable_on_shore_individual,
-            'tax_payable_offshore_individual': tax_payable_offshore_individual,
-            'gross_applicable_tax': gross_applicable_tax,
-            'tax_loss_carryforward_beginning': tax_loss_carryforward + tax_loss_utilized - (abs(gross_applicable_tax) if gross_applicable_tax < 0 else 0),
-            'tax_loss_generated': abs(gross_applicable_tax) if gross_applicable_tax < 0 else Decimal('0'),
-            'tax_loss_utilized': tax_loss_utilized,
-            'tax_loss_carryforward_ending': tax_loss_carryforward,
-            'applicable_tax': applicable_tax,
-            'net_cash_flow_after_tax': net_cash_flow_after_tax,
-        })
-
-    # Calculate NRAT using Year 1 Net Cash Flow After Tax from cashflow projection
+    # NRAT uses Year 1 Net Cash Flow After Tax from the (cached) cashflow projection.
+    # The full projection and growth scenarios are rendered by property_section.
+    projection = get_property_projection(property_obj)
+    cashflow_projection = projection['cashflow_projection']
     if len(cashflow_projection) > 0:
         year_1_net_return_after_tax = cashflow_projection[0]['net_cash_flow_after_tax']
         nrat_result = calculate_nrat(property_obj, year_1_net_return_after_tax)
         nrat_percentage = float(nrat_result['nrat'])
-        print(f"=== NRAT CALCULATION COMPLETED ===")
-        print(f"Year 1 Net Return After Tax: £{year_1_net_return_after_tax}")
-        print(f"NRAT Result: {nrat_percentage:.2f}%")
-        print(f"====================================")
     else:
-        nrat_result = {'nrat': 0, 'sdlt_amount': 0, 'total_cash_deployed': 0}
         nrat_percentage = 0
 
-    # CAPITAL GROWTH CALCULATIONS
-    print("\n" + "="*60)
-    print("="*60)
-    
-    # Constants for capital growth calculations
-    agency_fees_rate = Decimal('0.015')  # 1.5% agency fees
-    legal_fees_base = Decimal('1500')    # £1,500 legal fees (base year)
-    
-    # Apply 10 years of inflation to legal fees (costs incurred at sale)
-    legal_fees_rate = legal_fees_base * ((1 + inflation_rate) ** 10)
-    
-    # Calculate EPC upgrade cost based on current EPC rating
-    epc_rating = property_obj.epc_rating
-    if epc_rating in ['A', 'B', 'C']:
-        epc_upgrade_cost = Decimal('0')      # No upgrade needed for A, B, C ratings
-    elif epc_rating == 'D':
-        epc_upgrade_cost = Decimal('10000')  # £10,000 for D rating
-    elif epc_rating == 'E':
-        epc_upgrade_cost = Decimal('20000')  # £20,000 for E rating
-    elif epc_rating == 'F':
-        epc_upgrade_cost = Decimal('30000')  # £30,000 for F rating
-    elif epc_rating == 'G':
-        epc_upgrade_cost = Decimal('50000')  # £50,000 for G rating
-    else:
-        epc_upgrade_cost = Decimal('0')      # Default to £0 if EPC rating not set     
-
-    # Use estimated_market_value as current_value for calculations
-    current_value = estimated_market_value
-    
-    # Calculate cumulative principal payments for principal & interest mortgages
-    total_principal_paid = Decimal('0')
-    if property_obj.has_mortgage and property_obj.mortgage_type == 'principal_and_interest':
-        total_principal_paid = sum(projection['annual_principal_payment'] for projection in cashflow_projection)
-    
-    # Calculate notional equity early for use in debug and calculations
-    # For P&I mortgages, add principal payments made over cashflow period to increase equity
-    notional_equity = current_value - Decimal(str(float(property_obj.outstanding_mortgage_balance or 0))) + total_principal_paid
-    
-    # Calculate total returns (10-year net cash flow + capital growth) - moved above for use in annual return calculations
-    ten_year_total_cashflow = sum(projection['net_cash_flow_after_tax'] for projection in cashflow_projection)
-    
-    # FORECAST CAPITAL GROWTH (0% growth)
-    print("--- 0% GROWTH SCENARIO ---")
-    
-    # Calculate Net Capital Growth for 0% growth scenario
-    # With 0% growth, there's no capital appreciation, so net capital growth = negative selling costs
-    future_value_no_growth = current_value  # No growth
-    agency_fees_no_growth = future_value_no_growth * agency_fees_rate
-    total_selling_costs_no_growth = agency_fees_no_growth + legal_fees_rate + epc_upgrade_cost
-    net_capital_growth_no_growth = -total_selling_costs_no_growth  # Simply negative selling costs
-    
-    print(f"  Net Capital Growth Calculation (0% Growth):")
-    print(f"    - Future Value: £{future_value_no_growth} (no growth)")
-    print(f"    - Total Selling Costs: £{total_selling_costs_no_growth}")
-    print(f"    - Net Capital Growth: -£{total_selling_costs_no_growth} (cost of selling with no appreciation)")
-    
-    # Calculate CGT for 0% growth scenario
-    if net_capital_growth_no_growth <= 0:
-        # No CGT on losses
-        cgt_payable_no_growth = 0
-        net_capital_growth_after_cgt_no_growth = net_capital_growth_no_growth
-        print(f"    - CGT: £0 (no CGT on losses)")
-    else:
-        # Calculate CGT based on ownership
-        if property_obj.ownership_status == 'company':
-            cgt_payable_no_growth = corp_tax_calculator.calculate_corporation_tax(net_capital_growth_no_growth)
-            print(f"    - CGT (Corporation Tax): £{cgt_payable_no_growth}")
-        else:
-            # Individual ownership - check CGT bands
-            # Get year 10 cashflow income for CGT band calculation
-            year_10_cashflow = cashflow_projection[9]['net_cash_flow_after_tax'] if len(cashflow_projection) >= 10 else 0
-            total_gains_and_income = net_capital_growth_no_growth + year_10_cashflow
-            
-            if total_gains_and_income > 50270:
-                cgt_rate = Decimal('0.24')  # 24% higher rate
-                print(f"    - Total gains + Year 10 income: £{total_gains_and_income} > £50,270")
-                print(f"    - CGT Rate: 24% (higher rate)")
-            else:
-                cgt_rate = Decimal('0.18')  # 18% basic rate
-                print(f"    - Total gains + Year 10 income: £{total_gains_and_income} ≤ £50,270")
-                print(f"    - CGT Rate: 18% (basic rate)")
-            
-            cgt_payable_no_growth = net_capital_growth_no_growth * cgt_rate
-            print(f"    - CGT: £{cgt_payable_no_growth}")
-        
-        net_capital_growth_after_cgt_no_growth = net_capital_growth_no_growth - cgt_payable_no_growth
-    
-    print(f"    - Net Capital Growth (after CGT): £{net_capital_growth_after_cgt_no_growth}")
-    
-    # Create result dictionary for 0% growth
-    cgt_result_no_growth = {
-        'future_value': float(future_value_no_growth),
-        'gross_gain': float(net_capital_growth_no_growth),
-        'cgt_payable': float(cgt_payable_no_growth),
-        'net_gain_after_cgt': float(net_capital_growth_after_cgt_no_growth),
-        'selling_costs': float(total_selling_costs_no_growth)
-    }
-    
-    no_growth_value = Decimal(str(cgt_result_no_growth['net_gain_after_cgt']))
-    
-    # For investment summary display - show net gain after CGT (same as capital growth analysis final values)
-    no_growth_capital_growth_display = no_growth_value  # Net gain after CGT
-
-    # Calculate no growth return rate
-    if notional_equity and notional_equity != 0:
-        no_growth_return_rate = float((no_growth_value / notional_equity) * 100)
-        # Calculate annual capital growth return rate for capital growth table
-        no_growth_annual_capital_return_rate = float((float(no_growth_value) / float(notional_equity)) / 10 * 100)
-        # Calculate average annual return rate for conclusion table (total return including income + capital)
-        no_growth_total_return = float(ten_year_total_cashflow + no_growth_value)
-        no_growth_annual_return_rate = float((no_growth_total_return / float(notional_equity)) / 10 * 100)
-        
-        print(f"    - Capital return rate (10-year): {no_growth_return_rate:.2f}%")
-        print(f"    - Annual capital return rate: {no_growth_annual_capital_return_rate:.2f}%")
-        print(f"    - Total return (cashflow + capital): £{no_growth_total_return}")
-        print(f"    - Annual total return rate: {no_growth_annual_return_rate:.2f}%")
-    else:
-        no_growth_return_rate = 0
-        no_growth_annual_capital_return_rate = 0
-        no_growth_total_return = 0
-        no_growth_annual_return_rate = 0
-        print(f"    - Cannot calculate returns: Notional equity is zero")
-
-    # FORECAST CAPITAL GROWTH (1.7%)
-    print("\n--- 1.7% GROWTH SCENARIO ---")
-    
-    # Calculate Net Capital Growth for 1.7% growth scenario
-    future_value_moderate_growth = current_value * ((Decimal('1.017')) ** 10)
-    agency_fees_moderate_growth = future_value_moderate_growth * agency_fees_rate
-    total_selling_costs_moderate_growth = agency_fees_moderate_growth + legal_fees_rate + epc_upgrade_cost
-    net_capital_growth_moderate = future_value_moderate_growth - current_value - total_selling_costs_moderate_growth
-    
-    print(f"  Future Value (1.7% growth): £{future_value_moderate_growth}")
-    print(f"  Net Capital Growth Calculation:")
-    print(f"    - Future Value: £{future_value_moderate_growth}")
-    print(f"    - Current Value: £{current_value}")
-    print(f"    - Total Selling Costs: £{total_selling_costs_moderate_growth}")
-    print(f"    - Net Capital Growth: £{net_capital_growth_moderate}")
-    
-    # Calculate CGT for 1.7% growth scenario
-    if net_capital_growth_moderate <= 0:
-        # No CGT on losses
-        cgt_payable_moderate_growth = 0
-        net_capital_growth_after_cgt_moderate = net_capital_growth_moderate
-        print(f"    - CGT: £0 (no CGT on losses)")
-    else:
-        # Calculate CGT based on ownership
-        if property_obj.ownership_status == 'company':
-            cgt_payable_moderate_growth = corp_tax_calculator.calculate_corporation_tax(net_capital_growth_moderate)
-            print(f"    - CGT (Corporation Tax): £{cgt_payable_moderate_growth}")
-        else:
-            # Individual ownership - check CGT bands
-            # Get year 10 cashflow income for CGT band calculation
-            year_10_cashflow = cashflow_projection[9]['net_cash_flow_after_tax'] if len(cashflow_projection) >= 10 else 0
-            total_gains_and_income = net_capital_growth_moderate + year_10_cashflow
-            
-            if total_gains_and_income > 50270:
-                cgt_rate = Decimal('0.24')  # 24% higher rate
-                print(f"    - Total gains + Year 10 income: £{total_gains_and_income} > £50,270")
-                print(f"    - CGT Rate: 24% (higher rate)")
-            else:
-                cgt_rate = Decimal('0.18')  # 18% basic rate
-                print(f"    - Total gains + Year 10 income: £{total_gains_and_income} ≤ £50,270")
-                print(f"    - CGT Rate: 18% (basic rate)")
-            
-            cgt_payable_moderate_growth = net_capital_growth_moderate * cgt_rate
-            print(f"    - CGT: £{cgt_payable_moderate_growth}")
-        
-        net_capital_growth_after_cgt_moderate = net_capital_growth_moderate - cgt_payable_moderate_growth
-    
-    print(f"    - Net Capital Growth (after CGT): £{net_capital_growth_after_cgt_moderate}")
-
-    # Create result dictionary for 1.7% growth
-    cgt_result_moderate = {
-        'future_value': float(future_value_moderate_growth),
-        'gross_gain': float(net_capital_growth_moderate),
-        'cgt_payable': float(cgt_payable_moderate_growth),
-        'net_gain_after_cgt': float(net_capital_growth_after_cgt_moderate),
-        'selling_costs': float(total_selling_costs_moderate_growth)
-    }
-    
-    moderate_growth_value = Decimal(str(cgt_result_moderate['net_gain_after_cgt']))
-    
-    # For investment summary display - show net gain after CGT (same as capital growth analysis final values)
-    moderate_growth_capital_growth_display = moderate_growth_value  # Net gain after CGT
-
-    # Calculate 1.7% growth return rate
-    if notional_equity and notional_equity != 0:
-        moderate_growth_return_rate = float((moderate_growth_value / notional_equity) * 100)
-        # Calculate annual capital growth return rate for capital growth table
-        moderate_growth_annual_capital_return_rate = float((float(moderate_growth_value) / float(notional_equity)) / 10 * 100)
-        # Calculate average annual return rate for conclusion table (total return including income + capital)
-        moderate_growth_total_return = float(ten_year_total_cashflow + moderate_growth_value)
-        moderate_growth_annual_return_rate = float((moderate_growth_total_return / float(notional_equity)) / 10 * 100)
-        
-        print(f"  Return Rate Calculations:")
-        print(f"    - Net gain after CGT: £{moderate_growth_value}")
-        print(f"    - Capital return rate (10-year): {moderate_growth_return_rate:.2f}%")
-        print(f"    - Annual capital return rate: {moderate_growth_annual_capital_return_rate:.2f}%")
-        print(f"    - Total return (cashflow + capital): £{moderate_growth_total_return}")
-        print(f"    - Annual total return rate: {moderate_growth_annual_return_rate:.2f}%")
-    else:
-        moderate_growth_return_rate = 0
-        moderate_growth_annual_capital_return_rate = 0
-        moderate_growth_total_return = 0
-        moderate_growth_annual_return_rate = 0
-        print(f"    - Cannot calculate returns: Notional equity is zero")
-
-    # FORECAST CAPITAL GROWTH (3.4% annual)
-    print("\n--- 3.4% GROWTH SCENARIO ---")
-    
-    # Calculate Net Capital Growth for 3.4% growth scenario
-    future_value_average_growth = current_value * ((Decimal('1.034')) ** 10)
-    agency_fees_average_growth = future_value_average_growth * agency_fees_rate
-    total_selling_costs_average_growth = agency_fees_average_growth + legal_fees_rate + epc_upgrade_cost
-    net_capital_growth_average = future_value_average_growth - current_value - total_selling_costs_average_growth
-    
-    print(f"  Future Value (3.4% growth): £{future_value_average_growth}")
-    print(f"  Net Capital Growth Calculation:")
-    print(f"    - Future Value: £{future_value_average_growth}")
-    print(f"    - Current Value: £{current_value}")
-    print(f"    - Total Selling Costs: £{total_selling_costs_average_growth}")
-    print(f"    - Net Capital Growth: £{net_capital_growth_average}")
-    
-    # Calculate CGT for 3.4% growth scenario
-    if net_capital_growth_average <= 0:
-        # No CGT on losses
-        cgt_payable_average_growth = 0
-        net_capital_growth_after_cgt_average = net_capital_growth_average
-        print(f"    - CGT: £0 (no CGT on losses)")
-    else:
-        # Calculate CGT based on ownership
-        if property_obj.ownership_status == 'company':
-            cgt_payable_average_growth = corp_tax_calculator.calculate_corporation_tax(net_capital_growth_average)
-            print(f"    - CGT (Corporation Tax): £{cgt_payable_average_growth}")
-        else:
-            # Individual ownership - check CGT bands
-            # Get year 10 cashflow income for CGT band calculation
-            year_10_cashflow = cashflow_projection[9]['net_cash_flow_after_tax'] if len(cashflow_projection) >= 10 else 0
-            total_gains_and_income = net_capital_growth_average + year_10_cashflow
-            
-            if total_gains_and_income > 50270:
-                cgt_rate = Decimal('0.24')  # 24% higher rate
-                print(f"    - Total gains + Year 10 income: £{total_gains_and_income} > £50,270")
-                print(f"    - CGT Rate: 24% (higher rate)")
-            else:
-                cgt_rate = Decimal('0.18')  # 18% basic rate
-                print(f"    - Total gains + Year 10 income: £{total_gains_and_income} ≤ £50,270")
-                print(f"    - CGT Rate: 18% (basic rate)")
-            
-            cgt_payable_average_growth = net_capital_growth_average * cgt_rate
-            print(f"    - CGT: £{cgt_payable_average_growth}")
-        
-        net_capital_growth_after_cgt_average = net_capital_growth_average - cgt_payable_average_growth
-    
-    print(f"    - Net Capital Growth (after CGT): £{net_capital_growth_after_cgt_average}")
-
-    # Create result dictionary for 3.4% growth
-    cgt_result_average = {
-        'future_value': float(future_value_average_growth),
-        'gross_gain': float(net_capital_growth_average),
-        'cgt_payable': float(cgt_payable_average_growth),
-        'net_gain_after_cgt': float(net_capital_growth_after_cgt_average),
-        'selling_costs': float(total_selling_costs_average_growth)
-    }
-    
-    average_growth_value = Decimal(str(cgt_result_average['net_gain_after_cgt']))
-    
-    # For investment summary display - show net gain after CGT (same as capital growth analysis final values)
-    average_growth_capital_growth_display = average_growth_value  # Net gain after CGT
-
-    # Calculate 3.4% growth return rate
-    if notional_equity and notional_equity != 0:
-        average_growth_return_rate = float((average_growth_value / notional_equity) * 100)
-        # Calculate annual capital growth return rate for capital growth table
-        average_growth_annual_capital_return_rate = float((float(average_growth_value) / float(notional_equity)) / 10 * 100)
-        # Calculate average annual return rate for conclusion table (total return including income + capital)
-        average_growth_total_return = float(ten_year_total_cashflow + average_growth_value)
-        average_growth_annual_return_rate = float((average_growth_total_return / float(notional_equity)) / 10 * 100)
-        
-        print(f"  Return Rate Calculations:")
-        print(f"    - Net gain after CGT: £{average_growth_value}")
-        print(f"    - Capital return rate (10-year): {average_growth_return_rate:.2f}%")
-        print(f"    - Annual capital return rate: {average_growth_annual_capital_return_rate:.2f}%")
-        print(f"    - Total return (cashflow + capital): £{average_growth_total_return}")
-        print(f"    - Annual total return rate: {average_growth_annual_return_rate:.2f}%")
-    else:
-        average_growth_return_rate = 0
-        average_growth_annual_capital_return_rate = 0
-        average_growth_total_return = 0
-        average_growth_annual_return_rate = 0
-        print(f"    - Cannot calculate returns: Notional equity is zero")
-
-    print("\n--- CAPITAL GROWTH SUMMARY ---")
-    print("SCENARIO COMPARISON:")
-    print(f"  0% Growth   - Net Gain: £{no_growth_value:,.2f} | Capital Return: {no_growth_annual_capital_return_rate:.2f}%/yr | Total Return: {no_growth_annual_return_rate:.2f}%/yr")
-    print(f"  1.7% Growth - Net Gain: £{moderate_growth_value:,.2f} | Capital Return: {moderate_growth_annual_capital_return_rate:.2f}%/yr | Total Return: {moderate_growth_annual_return_rate:.2f}%/yr")
-    print(f"  3.4% Growth - Net Gain: £{average_growth_value:,.2f} | Capital Return: {average_growth_annual_capital_return_rate:.2f}%/yr | Total Return: {average_growth_annual_return_rate:.2f}%/yr")
-    print("="*60)
-    
-    # Add calculated fields to property object for template compatibility
     property_obj.address = property_obj.full_address  # Add address alias for template
-    property_obj.no_growth_value = float(no_growth_value)
-    property_obj.moderate_growth_value = float(moderate_growth_value)
-    property_obj.average_growth_value = float(average_growth_value)
-    property_obj.notional_equity = float(notional_equity)
-    property_obj.no_growth_return_rate = no_growth_return_rate
-    property_obj.moderate_growth_return_rate = moderate_growth_return_rate
-    property_obj.average_growth_return_rate = average_growth_return_rate
-    property_obj.no_growth_total_return = no_growth_total_return
-    property_obj.moderate_growth_total_return = moderate_growth_total_return
-    property_obj.average_growth_total_return = average_growth_total_return
 
     # Risk Analysis - Placeholder for future implementation
     Tenant_Dispute_Total = (monthly_mortgage_payment * 18) + 1500  # 18 months mortgage + legal fees
@@ -2039,49 +1376,194 @@ def property_detail(request, slug):
         'annual_vacancy_loss': annual_vacancy_loss,
         'annual_gross_rent': annual_gross_rent,
         
-        # Cash flow projections
-        'cashflow_projection': cashflow_projection,
-        
-        # Calculate 10-year total net income after tax
-        'total_net_income_after_tax': sum(projection['net_cash_flow_after_tax'] for projection in cashflow_projection),
-        
-        # Capital Growth Analysis
-        'no_growth_value': no_growth_value,
-        'moderate_growth_value': moderate_growth_value,
-        'average_growth_value': average_growth_value,
-        
-        # Capital Growth Display Values (actual growth before selling costs)
-        'no_growth_capital_growth_display': no_growth_capital_growth_display,
-        'moderate_growth_capital_growth_display': moderate_growth_capital_growth_display,
-        'average_growth_capital_growth_display': average_growth_capital_growth_display,
-        'no_growth_return_rate': no_growth_return_rate,
-        'moderate_growth_return_rate': moderate_growth_return_rate,
-        'average_growth_return_rate': average_growth_return_rate,
-        'no_growth_total_return': no_growth_total_return,
-        'moderate_growth_total_return': moderate_growth_total_return,
-        'average_growth_total_return': average_growth_total_return,
-        'no_growth_annual_return_rate': no_growth_annual_return_rate,
-        'moderate_growth_annual_return_rate': moderate_growth_annual_return_rate,
-        'average_growth_annual_return_rate': average_growth_annual_return_rate,
-        'no_growth_annual_capital_return_rate': no_growth_annual_capital_return_rate,
-        'moderate_growth_annual_capital_return_rate': moderate_growth_annual_capital_return_rate,
-        'average_growth_annual_capital_return_rate': average_growth_annual_capital_return_rate,
-        'notional_equity': notional_equity,
-        
-        # CGT Analysis Results
-        'cgt_no_growth': cgt_result_no_growth,
-        'cgt_moderate_growth': cgt_result_moderate,
-        'cgt_average_growth': cgt_result_average,
-
         # Risk Analysis
         'Tenant_Dispute_Total': Tenant_Dispute_Total,
         'Tenant_Dispute_monthly': Tenant_Dispute_monthly,
         'RRB_rent_recovery': RRB_rent_recovery,
 
         'nrat_percentage': nrat_percentage,
+
+        # Heavy sections are loaded on demand, versioned so browsers can cache them
+        'section_version': f"t{PROPERTY_SECTION_TEMPLATE_VERSION}-{projection_cache_key(property_obj).rsplit(':', 1)[-1]}",
     }
     return render(request, 'user_home/property_detail.html', context)
 
+
+PROPERTY_SECTION_TEMPLATES = {
+    'cashflow': 'user_home/partials/property_cashflow.html',
+    'capital-growth': 'user_home/partials/property_capital_growth.html',
+    'investment-summary': 'user_home/partials/property_investment_summary.html',
+}
+# Bump whenever one of the section templates changes so previously cached sections are dropped
+PROPERTY_SECTION_TEMPLATE_VERSION = 1
+PROPERTY_SECTION_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+@login_required
+def property_section(request, slug, section):
+    """Render one heavy property_detail section on demand, cached per property version"""
+    template_name = PROPERTY_SECTION_TEMPLATES.get(section)
+    if template_name is None:
+        raise Http404('Unknown section')
+    property_obj = get_object_or_404(Property, slug=slug, owner=request.user)
+
+    cache_key = f"user_home:section:{section}:t{PROPERTY_SECTION_TEMPLATE_VERSION}:{projection_cache_key(property_obj)}"
+    html = cache.get(cache_key)
+    if html is None:
+        cashflow_projection = get_property_projection(property_obj)['cashflow_projection']
+        context = {
+            'property': property_obj,
+            'section': section,
+            'cashflow_projection': cashflow_projection,
+            'total_net_income_after_tax': sum(projection['net_cash_flow_after_tax'] for projection in cashflow_projection),
+        }
+        if section != 'cashflow':
+            context.update(capital_growth_scenarios(property_obj, cashflow_projection))
+        html = render_to_string(template_name, context, request=request)
+        cache.set(cache_key, html, PROPERTY_SECTION_CACHE_TIMEOUT)
+
+    response = HttpResponse(html)
+    # The page requests sections with ?v=<property version>, so they can be cached privately
+    if request.GET.get('v'):
+        patch_cache_control(response, private=True, max_age=PROPERTY_SECTION_CACHE_TIMEOUT)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _grid_param(request, name, cast):
+    """Parse a comma separated grid option from the query string, None if absent"""
+    raw = request.GET.get(name)
+    if not raw:
+        return None
+    return [cast(value.strip()) for value in raw.split(',') if value.strip()]
+
+
+def _ltv_option(value):
+    return None if value == 'current' else Decimal(value)
+
+@login_required
+def property_refinance(request, slug):
+    """Rank remortgage products over a rate/term/type/fee/LTV grid for a property"""
+    property_obj = get_object_or_404(Property, slug=slug, owner=request.user)
+
+    try:
+        candidates = refinance_optimiser.build_grid(
+            rates=_grid_param(request, 'rates', Decimal),
+            terms=_grid_param(request, 'terms', int),
+            mortgage_types=_grid_param(request, 'types', str),
+            arrangement_fees=_grid_param(request, 'fees', Decimal),
+            ltvs=_grid_param(request, 'ltvs', _ltv_option),
+        )
+        if any(c['mortgage_type'] not in dict(Property.MORTGAGE_CHOICES) for c in candidates):
+            raise ValueError('Unknown mortgage type')
+        if any(c['term'] <= 0 or c['rate'] < 0 for c in candidates):
+            raise ValueError('Rates and terms must be positive')
+        result = refinance_optimiser.optimise(
+            property_obj,
+            candidates,
+            rank_by=request.GET.get('rank_by', 'ten_year_after_tax_cash'),
+            limit=int(request.GET.get('limit', 10)),
+        )
+    except ArithmeticError:
+        return JsonResponse({'success': False, 'error': 'Invalid refinance options'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({'success': True, **_json_ready(result)})
+
+def _upload_status(upload):
+    return {
+        'upload_id': str(upload.pk),
+        'offset': upload.offset,
+        'size': upload.size,
+        'chunk_size': uploads.UPLOAD_CHUNK_SIZE,
+        'upload_url': reverse('user_home:document_upload', args=[upload.pk]),
+    }
+
+def _document_data(document):
+    return {
+        'id': document.pk,
+        'title': document.title,
+        'document_type': document.document_type,
+        'size': document.size,
+        'sha256': document.sha256,
+        'url': document.file.url,
+    }
+
+@login_required
+def start_document_upload(request, slug):
+    """Start a chunked upload of a document for a property"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+    property_obj = get_object_or_404(Property, slug=slug, owner=request.user)
+
+    try:
+        data = json.loads(request.body)
+        upload = uploads.start_upload(
+            property_obj,
+            filename=str(data['filename']),
+            size=int(data['size']),
+            document_type=str(data.get('document_type', 'other')),
+            title=str(data.get('title', '')),
+            description=str(data.get('description', '')),
+            sha256=str(data.get('sha256', '')),
+        )
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'success': False, 'error': 'filename and size are required'}, status=400)
+    except uploads.UploadError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+
+    return JsonResponse({'success': True, **_upload_status(upload)}, status=201)
+
+@login_required
+def document_upload(request, upload_id):
+    """
+    A chunked document upload: GET for the offset to resume from, PATCH with the next
+    chunk as the body and its offset in Upload-Offset, POST to retry completing it,
+    DELETE to abandon it
+    """
+    upload = get_object_or_404(DocumentUpload.objects.select_related('property'), pk=upload_id,
+                               property__owner=request.user)
+
+    try:
+        if request.method == 'GET':
+            return JsonResponse({'success': True, **_upload_status(upload)})
+        elif request.method == 'PATCH':
+            try:
+                offset = int(request.headers['Upload-Offset'])
+                length = int(request.headers['Content-Length'])
+            except (KeyError, ValueError):
+                return JsonResponse({'success': False, 'error': 'Upload-Offset and Content-Length are required'}, status=400)
+            document = uploads.receive_chunk(upload, offset, length, request)
+        elif request.method == 'POST':
+            document = uploads.complete_upload(upload)
+        elif request.method == 'DELETE':
+            uploads.abort_upload(upload)
+            return JsonResponse({'success': True})
+        else:
+            return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+    except uploads.UploadError as e:
+        return JsonResponse({'success': False, 'error': str(e), 'offset': upload.offset}, status=e.status)
+
+    if document is None:
+        return JsonResponse({'success': True, **_upload_status(upload)})
+    return JsonResponse({'success': True, 'complete': True, 'document': _document_data(document)}, status=201)
+
+@login_required
+def document_search(request):
+    """Full-text search over the contents of the user's property documents"""
+    query = request.GET.get('q', '').strip()[:200]
+    results = [
+        {
+            **_document_data(document),
+            'property': document.property.property_name,
+            'property_url': reverse('user_home:property_detail', args=[document.property.slug]),
+            'snippet': document.search_snippet,
+        }
+        for document in search_documents(request.user, query)
+    ]
+    return JsonResponse({'success': True, 'query': query, 'results': results})
+
 @login_required
 def property_list(request):
     """View for listing all user's properties"""
@@ -2089,10 +1571,56 @@ def property_list(request):
     
     context = {
         'properties': properties,
+        'property_cards': render_property_cards(properties),
         'page_title': 'My Properties',
     }
     return render(request, 'user_home/property_list.html', context)
 
+@login_required
+def compliance_report(request):
+    """Renters' Rights Act compliance matrix for the user's portfolio"""
+    report = portfolio_compliance(request.user)
+    context = {
+        'report': report,
+        'rules': RRA_COMPLIANCE.rules,
+        'page_title': "Renters' Rights Act Compliance",
+    }
+    return render(request, 'user_home/compliance_report.html', context)
+
+@login_required
+def rent_reviews(request):
+    """Open rent reviews for the user's properties, approved or declined by the landlord"""
+    if request.method == 'POST':
+        review = get_object_or_404(RentReview, pk=request.POST.get('review_id'), property__owner=request.user,
+                                   status__in=RentReview.OPEN_STATUSES)
+        action = request.POST.get('action')
+        if action == 'approve':
+            review.status = RentReview.APPROVED
+            messages.success(request, f'The rent for "{review.property.property_name}" will go up to £{review.proposed_weekly_rent} a week on {review.effective_date:%d %B %Y}.')
+        elif action == 'decline':
+            review.status = RentReview.DECLINED
+            messages.success(request, f'The rent review for "{review.property.property_name}" has been declined.')
+        else:
+            messages.error(request, 'Unknown rent review action.')
+            return redirect('user_home:rent_reviews')
+        review.save(update_fields=['status', 'updated_at'])
+        return redirect('user_home:rent_reviews')
+
+    reviews = (RentReview.objects
+               .filter(property__owner=request.user, status__in=RentReview.OPEN_STATUSES)
+               .select_related('property'))
+    upcoming = [
+        (property_obj, next_permitted_increase(property_obj.last_rent_increase_date, date.today()))
+        for property_obj in request.user.properties.exclude(rent_reviews__status__in=RentReview.OPEN_STATUSES)
+        .only('property_name', 'slug', 'weekly_rent', 'last_rent_increase_date')
+    ]
+    context = {
+        'reviews': reviews,
+        'upcoming': sorted(upcoming, key=lambda item: item[1]),
+        'page_title': 'Rent Reviews',
+    }
+    return render(request, 'user_home/rent_reviews.html', context)
+
 @login_required
 def edit_property(request, slug):
     """View for editing property details"""
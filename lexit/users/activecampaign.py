@@ -1,13 +1,30 @@
+import hashlib
 import json
 import logging
+import threading
+import time
 from urllib.parse import quote
-from urllib import request as urllib_request, error as urllib_error
 
 from django.conf import settings
+from django.core.cache import cache
+
+from lexit import http_client
 
 
 logger = logging.getLogger(__name__)
 
+# Tag and custom field IDs hardly ever change, so lookups by name are cached
+LOOKUP_CACHE_PREFIX = "activecampaign:lookup:"
+LOOKUP_CACHE_TTL = 60 * 60  # 1 hour
+
+# ActiveCampaign allows 5 requests a second per account, so calls from every thread share one limit
+RATE_LIMIT = 5
+# Contacts per bulk import request, ActiveCampaign's maximum
+BULK_IMPORT_MAX_CONTACTS = 250
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
 
 def build_referred_user_identifier(user):
     # Provide a stable, non-contact identifier for referral notifications.
@@ -17,7 +34,7 @@ def build_referred_user_identifier(user):
     return "LXT-UNKNOWN"
 
 
-def sync_contact(user, referral_code=None, referred_by=None):
+def sync_contact(user, referral_code=None, referred_by=None, add_note=True):
     api_url = (getattr(settings, "ACTIVECAMPAIGN_API_URL", "") or "").strip().rstrip("/")
     api_key = (getattr(settings, "ACTIVECAMPAIGN_API_KEY", "") or "").strip()
 
@@ -103,19 +120,25 @@ def sync_contact(user, referral_code=None, referred_by=None):
                     referral_code=normalized_referral_code,
                 )
                 if code_tag_id:
-                    _post_json(
-                        f"{api_url}/api/3/contactTags",
-                        {
-                            "contactTag": {
-                                "contact": str(contact_id),
-                                "tag": str(code_tag_id),
-                            }
-                        },
-                        api_key,
-                    )
+                    try:
+                        _post_json(
+                            f"{api_url}/api/3/contactTags",
+                            {
+                                "contactTag": {
+                                    "contact": str(contact_id),
+                                    "tag": str(code_tag_id),
+                                }
+                            },
+                            api_key,
+                        )
+                    except Exception:
+                        # The cached tag may have been deleted since, so look it up again next time
+                        cache.delete(_lookup_cache_key("tag", api_url, build_referral_code_tag_name(normalized_referral_code)))
+                        raise
                     applied_tags.append(str(code_tag_id))
 
-        if contact_id and (referred_by or has_referral_token):
+        # A re-sync leaves out the note, which would otherwise be added again each time
+        if contact_id and add_note and (referred_by or has_referral_token):
             note_lines = [
                 "Referral tracked by LEXIT.",
             ]
@@ -149,6 +172,72 @@ def sync_contact(user, referral_code=None, referred_by=None):
         return {"success": False, "reason": str(exc)}
 
 
+def contact_import_row(user, referral_code=None, referred_by=None):
+    """
+    A user's contact for bulk_import_contacts, with the list and tags sync_contact would give them.
+    Bulk import takes tag names rather than IDs, and creates any tag that doesn't exist yet.
+    """
+    api_url = (getattr(settings, "ACTIVECAMPAIGN_API_URL", "") or "").strip().rstrip("/")
+    api_key = (getattr(settings, "ACTIVECAMPAIGN_API_KEY", "") or "").strip()
+
+    row = {
+        "email": user.email,
+        "first_name": (getattr(user, "first_name", "") or "").strip(),
+        "last_name": (getattr(user, "last_name", "") or "").strip(),
+    }
+
+    list_id = (getattr(settings, "ACTIVECAMPAIGN_DEFAULT_LIST_ID", "") or "").strip()
+    if list_id:
+        row["subscribe"] = [{"listid": str(list_id)}]
+
+    tags = []
+    has_referral_token = bool((referral_code or '').strip())
+    signup_tag_id = (getattr(settings, "ACTIVECAMPAIGN_SIGNUP_TAG_ID", "") or "").strip()
+    referral_tag_id = (getattr(settings, "ACTIVECAMPAIGN_REFERRAL_TAG_ID", "") or "").strip()
+    if signup_tag_id:
+        tags.append(_tag_name(api_url, api_key, signup_tag_id))
+    if referral_tag_id and (referred_by or has_referral_token):
+        tags.append(_tag_name(api_url, api_key, referral_tag_id))
+    if has_referral_token:
+        tags.append(build_referral_code_tag_name(referral_code))
+    tags = [tag for tag in tags if tag]
+    if tags:
+        row["tags"] = tags
+    return row
+
+
+def bulk_import_contacts(contacts):
+    """
+    Create or update up to BULK_IMPORT_MAX_CONTACTS contacts in one request.
+    ActiveCampaign imports them in the background; returns its response, with the batchId.
+    """
+    api_url = (getattr(settings, "ACTIVECAMPAIGN_API_URL", "") or "").strip().rstrip("/")
+    api_key = (getattr(settings, "ACTIVECAMPAIGN_API_KEY", "") or "").strip()
+
+    if not api_url or not api_key:
+        raise RuntimeError("ActiveCampaign is not configured")
+    if len(contacts) > BULK_IMPORT_MAX_CONTACTS:
+        raise ValueError(f"At most {BULK_IMPORT_MAX_CONTACTS} contacts can be imported at a time")
+
+    response = _post_json(f"{api_url}/api/3/import/bulk_import", {"contacts": contacts}, api_key)
+    if not (response or {}).get("success", 1):
+        raise RuntimeError(f"Bulk import rejected: {response}")
+    return response
+
+
+def bulk_import_status(batch_id):
+    """
+    ActiveCampaign's progress on a bulk import: its status ("completed" once it is done),
+    and the emails it imported ("success") and rejected ("failure").
+    """
+    api_url = (getattr(settings, "ACTIVECAMPAIGN_API_URL", "") or "").strip().rstrip("/")
+    api_key = (getattr(settings, "ACTIVECAMPAIGN_API_KEY", "") or "").strip()
+
+    if not api_url or not api_key:
+        raise RuntimeError("ActiveCampaign is not configured")
+    return _get_json(f"{api_url}/api/3/import/info?batchId={quote(str(batch_id))}", api_key) or {}
+
+
 def notify_referrer_of_signup(referrer_user, referred_user, referral_code=None):
     """
     Create an ActiveCampaign note for the referrer without exposing the referred user's contact details.
@@ -244,64 +333,61 @@ def notify_referrer_of_signup(referrer_user, referred_user, referral_code=None):
 
 
 def _post_json(url, payload, api_key):
-    req = urllib_request.Request(
-        url,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Api-Token": api_key,
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        },
-        method="POST",
-    )
-
-    try:
-        with urllib_request.urlopen(req, timeout=30) as response:
-            body = response.read().decode("utf-8") if response else "{}"
-            return json.loads(body) if body else {}
-    except urllib_error.HTTPError as exc:
-        body = exc.read().decode("utf-8") if hasattr(exc, "read") else ""
-        raise RuntimeError(f"HTTP {exc.code}: {body}")
+    return _send("POST", url, api_key, payload)
 
 
 def _put_json(url, payload, api_key):
-    req = urllib_request.Request(
-        url,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Api-Token": api_key,
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        },
-        method="PUT",
-    )
-
-    try:
-        with urllib_request.urlopen(req, timeout=30) as response:
-            body = response.read().decode("utf-8") if response else "{}"
-            return json.loads(body) if body else {}
-    except urllib_error.HTTPError as exc:
-        body = exc.read().decode("utf-8") if hasattr(exc, "read") else ""
-        raise RuntimeError(f"HTTP {exc.code}: {body}")
+    return _send("PUT", url, api_key, payload)
 
 
 def _get_json(url, api_key):
-    req = urllib_request.Request(
+    return _send("GET", url, api_key)
+
+
+class RateLimiter:
+    """Spaces calls out so no more than rate are started per second, across threads"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.interval = 1.0 / rate if rate and rate > 0 else 0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            slot = max(time.monotonic(), self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _rate_limiter():
+    global _limiter
+    rate = getattr(settings, "ACTIVECAMPAIGN_RATE_LIMIT", RATE_LIMIT)
+    with _limiter_lock:
+        if _limiter is None or _limiter.rate != rate:
+            _limiter = RateLimiter(rate)
+    return _limiter
+
+
+def _send(method, url, api_key, payload=None):
+    """Make a request within the rate limit; the shared client waits out 429 answers and tries again"""
+    _rate_limiter().wait()
+    response = http_client.request(
+        method,
         url,
+        json=payload,
         headers={
             "Api-Token": api_key,
             "Accept": "application/json",
         },
-        method="GET",
     )
-
-    try:
-        with urllib_request.urlopen(req, timeout=30) as response:
-            body = response.read().decode("utf-8") if response else "{}"
-            return json.loads(body) if body else {}
-    except urllib_error.HTTPError as exc:
-        body = exc.read().decode("utf-8") if hasattr(exc, "read") else ""
-        raise RuntimeError(f"HTTP {exc.code}: {body}")
+    if not response.ok:
+        raise RuntimeError(f"HTTP {response.status}: {response.text}")
+    return response.json()
 
 
 def _normalize_referral_code(referral_code):
@@ -320,11 +406,43 @@ def build_referral_code_tag_name(referral_code):
     return f"{tag_prefix}{normalized_referral_code}"
 
 
+def _lookup_cache_key(kind, api_url, name):
+    digest = hashlib.sha256(f"{api_url}\x1f{str(name).strip().lower()}".encode("utf-8")).hexdigest()[:32]
+    return f"{LOOKUP_CACHE_PREFIX}{kind}:{digest}"
+
+
+def _lookup_cache_ttl():
+    return getattr(settings, "ACTIVECAMPAIGN_LOOKUP_CACHE_TTL", LOOKUP_CACHE_TTL)
+
+
 def _ensure_referral_code_tag(api_url, api_key, referral_code):
     tag_name = build_referral_code_tag_name(referral_code)
     if not tag_name:
         return None
 
+    cache_key = _lookup_cache_key("tag", api_url, tag_name)
+    tag_id = cache.get(cache_key)
+    if tag_id:
+        return tag_id
+
+    tag_id = _find_or_create_tag(api_url, api_key, tag_name, referral_code)
+    if tag_id:
+        cache.set(cache_key, tag_id, _lookup_cache_ttl())
+    return tag_id
+
+
+def _tag_name(api_url, api_key, tag_id):
+    cache_key = _lookup_cache_key("tag_name", api_url, tag_id)
+    tag_name = cache.get(cache_key)
+    if tag_name is None:
+        response = _get_json(f"{api_url}/api/3/tags/{quote(str(tag_id))}", api_key)
+        tag_name = str(((response or {}).get("tag") or {}).get("tag", "")).strip()
+        if tag_name:
+            cache.set(cache_key, tag_name, _lookup_cache_ttl())
+    return tag_name
+
+
+def _find_or_create_tag(api_url, api_key, tag_name, referral_code):
     existing_tag = _find_existing_tag(
         api_url=api_url,
         api_key=api_key,
@@ -427,6 +545,17 @@ def _find_contact_field(api_url, api_key, field_name):
     if not normalized_field_name:
         return None
 
+    cache_key = _lookup_cache_key("field", api_url, normalized_field_name)
+    field = cache.get(cache_key)
+    if field is None:
+        field = _search_contact_field(api_url, api_key, field_name)
+        if field:
+            cache.set(cache_key, field, _lookup_cache_ttl())
+    return field
+
+
+def _search_contact_field(api_url, api_key, field_name):
+    normalized_field_name = str(field_name or "").strip().lower()
     encoded_field_name = quote(field_name)
     response = _get_json(f"{api_url}/api/3/fields?search={encoded_field_name}", api_key)
     fields = (response or {}).get("fields") or []
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import UserProfile, Referrer, HoneypotAttempt, SecurityEvent
+from django.utils import timezone
+from .models import UserProfile, Referrer, HoneypotAttempt, SecurityEvent, OutboundEmail, CrmSyncTask, CrmBackfillRun
 from .activecampaign import build_referral_code_tag_name
 
 
@@ -231,3 +232,49 @@ class SecurityEventAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'recipients', 'provider_message_id')
+    readonly_fields = ('created_at', 'sent_at', 'attempts', 'provider_message_id', 'last_error', 'message')
+    ordering = ['-created_at']
+    actions = ['retry_emails']
+
+    def retry_emails(self, request, queryset):
+        count = queryset.exclude(status=OutboundEmail.SENT).update(
+            status=OutboundEmail.PENDING, attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"Queued {count} emails to be sent again.")
+    retry_emails.short_description = "Send selected emails again"
+
+
+@admin.register(CrmSyncTask)
+class CrmSyncTaskAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'kind', 'user', 'status', 'attempts', 'next_attempt_at', 'updated_at')
+    list_filter = ('kind', 'status', 'created_at')
+    search_fields = ('user__email', 'user__username', 'key')
+    readonly_fields = ('created_at', 'updated_at', 'attempts', 'version', 'last_error', 'result')
+    raw_id_fields = ('user',)
+    ordering = ['-created_at']
+    actions = ['retry_tasks']
+
+    def retry_tasks(self, request, queryset):
+        count = 0
+        for task in queryset.filter(status=CrmSyncTask.DEAD):
+            # Skipped if a newer task for the same contact is already waiting
+            if not CrmSyncTask.objects.filter(key=task.key, status=CrmSyncTask.PENDING).exists():
+                CrmSyncTask.objects.filter(pk=task.pk).update(
+                    status=CrmSyncTask.PENDING, attempts=0, next_attempt_at=timezone.now())
+                count += 1
+        self.message_user(request, f"Queued {count} ActiveCampaign updates to run again.")
+    retry_tasks.short_description = "Run selected updates again"
+
+
+@admin.register(CrmBackfillRun)
+class CrmBackfillRunAdmin(admin.ModelAdmin):
+    list_display = ('name', 'processed', 'failed', 'last_user_id', 'started_at', 'updated_at', 'finished_at')
+    readonly_fields = ('started_at', 'updated_at', 'finished_at', 'processed', 'failed', 'failed_user_ids',
+                       'pending_imports')
+    ordering = ['-started_at']
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from lexit.image_derivatives import register_image_field
+        from .models import UserProfile
+
+        register_image_field(UserProfile, 'profile_image')
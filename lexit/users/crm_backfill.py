@@ -0,0 +1,181 @@
+"""
+Re-sync every user to ActiveCampaign, e.g. after the tagging rules change.
+
+Users are streamed in id order and sent a batch at a time, through
+ActiveCampaign's bulk contact import (250 contacts a request) where it can be
+used. If bulk import is turned off or fails, the rest of the run falls back to
+sync_contact on a bounded thread pool. Every call goes through the rate
+limiter in users.activecampaign, which waits out 429 responses, so the
+threads share the account's limit instead of tripping it.
+
+After each batch the last user id is saved in a CrmBackfillRun, so a run
+that is interrupted carries on from there when started again with the same
+name.
+
+ActiveCampaign imports each bulk batch in the background and can still
+reject contacts in it, so the batch ids are kept on the run, and it is only
+finished once every import has completed, with the contacts it rejected
+counted as failed. If the imports are still going after import_wait
+seconds, the run stops unfinished, and starting it again checks them.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+
+from .activecampaign import (
+    BULK_IMPORT_MAX_CONTACTS, bulk_import_contacts, bulk_import_status, contact_import_row, sync_contact,
+)
+from .models import CrmBackfillRun
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = BULK_IMPORT_MAX_CONTACTS
+WORKERS = 4
+# How many failed user ids a run keeps, to look into or retry
+MAX_FAILED_IDS = 1000
+# How long a run waits for ActiveCampaign to finish its bulk imports, and how often it checks
+IMPORT_WAIT_SECONDS = 10 * 60
+IMPORT_POLL_SECONDS = 15
+
+
+def users_to_sync(after_id=0):
+    """Active users with an email address and an id above after_id, in id order"""
+    return (User.objects.filter(pk__gt=after_id, is_active=True).exclude(email='')
+            .select_related('profile', 'profile__referred_by').order_by('pk'))
+
+
+def _referral(user):
+    profile = getattr(user, 'profile', None)
+    if profile is None:
+        return None, None
+    return profile.referral_code_used or None, profile.referred_by
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _import_batch(batch):
+    """Queue a bulk import of the batch, returning it to be checked on once ActiveCampaign is done"""
+    response = bulk_import_contacts([contact_import_row(user, *_referral(user)) for user in batch])
+    if not response.get('batchId'):
+        # Without it there's no finding out which contacts were rejected
+        raise RuntimeError(f'Bulk import gave no batch id: {response}')
+    logger.info('ActiveCampaign bulk import %s queued %s contacts', response.get('batchId'), len(batch))
+    return {'batch_id': response['batchId'], 'users': {user.email.lower(): user.pk for user in batch}}
+
+
+def _sync_one(user):
+    referral_code, referred_by = _referral(user)
+    try:
+        # The note was added when they signed up
+        return sync_contact(user, referral_code=referral_code, referred_by=referred_by, add_note=False)
+    finally:
+        # Each pool thread has its own database connection
+        connection.close()
+
+
+def _sync_batch(batch, executor):
+    results = executor.map(_sync_one, batch)
+    return [user.pk for user, result in zip(batch, results) if not result.get('success')]
+
+
+def _record_failures(run, failed):
+    run.failed += len(failed)
+    run.failed_user_ids = (run.failed_user_ids + failed)[-MAX_FAILED_IDS:]
+
+
+def check_imports(run):
+    """Count the contacts rejected by the run's completed bulk imports, returning how many are still going"""
+    pending = []
+    for entry in run.pending_imports:
+        try:
+            status = bulk_import_status(entry['batch_id'])
+        except Exception as exc:
+            logger.warning('Could not check ActiveCampaign bulk import %s: %s', entry['batch_id'], exc)
+            pending.append(entry)
+            continue
+        if status.get('status') != 'completed':
+            pending.append(entry)
+            continue
+        failed = [entry['users'][email.lower()] for email in status.get('failure') or []
+                  if email.lower() in entry['users']]
+        if failed:
+            logger.warning('ActiveCampaign bulk import %s rejected %s contacts', entry['batch_id'], len(failed))
+        _record_failures(run, failed)
+
+    run.pending_imports = pending
+    run.save(update_fields=['failed', 'failed_user_ids', 'pending_imports', 'updated_at'])
+    return len(pending)
+
+
+def wait_for_imports(run, timeout=IMPORT_WAIT_SECONDS, poll_interval=IMPORT_POLL_SECONDS):
+    """Check the run's bulk imports until they have all completed or timeout runs out, returning whether they did"""
+    deadline = time.monotonic() + timeout
+    while check_imports(run):
+        if time.monotonic() + poll_interval > deadline:
+            return False
+        time.sleep(poll_interval)
+    return True
+
+
+def backfill_contacts(name='default', batch_size=BATCH_SIZE, workers=WORKERS, use_bulk=True, restart=False,
+                      max_batches=None, progress=None, import_wait=IMPORT_WAIT_SECONDS,
+                      import_poll=IMPORT_POLL_SECONDS):
+    """
+    Send users to ActiveCampaign from where the run called name got to.
+
+    Returns the CrmBackfillRun, with finished_at set once every user has been
+    sent and every bulk import has completed. progress, if given, is called
+    with the run and the mode used after each batch.
+    """
+    run, _ = CrmBackfillRun.objects.get_or_create(name=name)
+    if restart or run.finished_at:
+        run.last_user_id = run.processed = run.failed = 0
+        run.failed_user_ids = []
+        run.pending_imports = []
+        run.started_at = timezone.now()
+        run.finished_at = None
+        run.save()
+
+    if use_bulk:
+        batch_size = min(batch_size, BULK_IMPORT_MAX_CONTACTS)
+    users = users_to_sync(run.last_user_id).iterator(chunk_size=batch_size)
+    batches = 0
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='activecampaign-backfill') as executor:
+        for batch in _batches(users, batch_size):
+            failed = None
+            if use_bulk:
+                try:
+                    run.pending_imports = run.pending_imports + [_import_batch(batch)]
+                    failed = []
+                except Exception as exc:
+                    logger.warning('ActiveCampaign bulk import failed, syncing contacts one at a time: %s', exc)
+                    use_bulk = False
+            if failed is None:
+                failed = _sync_batch(batch, executor)
+
+            run.last_user_id = batch[-1].pk
+            run.processed += len(batch)
+            _record_failures(run, failed)
+            run.save(update_fields=['last_user_id', 'processed', 'failed', 'failed_user_ids', 'pending_imports',
+                                    'updated_at'])
+            if progress is not None:
+                progress(run, 'bulk import' if use_bulk else 'sync')
+
+            batches += 1
+            if max_batches is not None and batches >= max_batches:
+                return run
+
+    if not wait_for_imports(run, import_wait, import_poll):
+        return run
+    run.finished_at = timezone.now()
+    run.save(update_fields=['finished_at', 'updated_at'])
+    return run
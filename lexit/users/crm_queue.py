@@ -0,0 +1,163 @@
+"""
+Queue of ActiveCampaign updates, made off the request path.
+
+Registration used to sync the new contact and notify the referrer with up to
+a dozen blocking calls to ActiveCampaign. Now it only stores a CrmSyncTask
+in its transaction, and the updates are made afterwards: by a background
+thread woken when the transaction commits, and again by a timer when the
+next retry or lease falls due, or by the process_crm_sync_queue command on a
+worker (set ACTIVECAMPAIGN_SYNC_THREAD = False then).
+
+Updates for the same contact are merged while they wait, so a contact is
+synced once with the latest details rather than once per change. An update
+merged in while its task is being run makes the task run again. A failed
+task is tried again with exponential backoff, and dead-lettered after
+MAX_ATTEMPTS.
+"""
+import logging
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from lexit.background import QueueWorker, backoff_delay
+
+from .activecampaign import notify_referrer_of_signup, sync_contact
+from .models import CrmSyncTask
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 6
+RETRY_BASE_DELAY = timedelta(minutes=1)
+RETRY_MAX_DELAY = timedelta(hours=2)
+# A claimed task is run again after this if its worker dies before recording the result
+RUN_LEASE = timedelta(minutes=5)
+# Results that trying again won't change
+SKIPPED_REASONS = {'not_configured', 'missing_email', 'missing_referrer_email', 'referred_user_deleted'}
+
+
+def _merge_contact_sync(old, new):
+    # A later update without a referral doesn't undo an earlier one
+    return {key: new.get(key) or old.get(key) for key in old.keys() | new.keys()}
+
+
+def _enqueue(kind, key, user, payload, merge=None):
+    """Store a task, or merge the payload into the one already waiting with the same key"""
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                task = CrmSyncTask.objects.select_for_update().filter(key=key, status=CrmSyncTask.PENDING).first()
+                if task is None:
+                    task = CrmSyncTask.objects.create(kind=kind, key=key, user=user, payload=payload)
+                elif merge is not None:
+                    task.payload = merge(task.payload, payload)
+                    task.version += 1
+                    task.save(update_fields=['payload', 'version', 'updated_at'])
+            break
+        except IntegrityError:
+            # Another request stored the same task first, so merge into that one
+            if attempt:
+                raise
+    transaction.on_commit(wake_sync_worker)
+    return task
+
+
+def enqueue_contact_sync(user, referral_code=None, referred_by=None):
+    """Sync a user to ActiveCampaign soon, merged with any sync of theirs still waiting"""
+    payload = {'referral_code': referral_code or '', 'referred_by_id': getattr(referred_by, 'pk', None)}
+    return _enqueue(CrmSyncTask.CONTACT_SYNC, f'contact:{user.pk}', user, payload, _merge_contact_sync)
+
+
+def enqueue_referrer_notification(referrer_user, referred_user, referral_code=None):
+    """Tell a referrer's ActiveCampaign contact about a signup, once per referred user"""
+    payload = {'referred_user_id': referred_user.pk, 'referral_code': referral_code or ''}
+    return _enqueue(CrmSyncTask.REFERRER_NOTIFICATION, f'referrer:{referrer_user.pk}:{referred_user.pk}',
+                    referrer_user, payload)
+
+
+def retry_delay(attempts):
+    return backoff_delay(attempts, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+
+
+def claim_due(batch_size=BATCH_SIZE):
+    """Take the next due tasks, so no other worker runs them meanwhile"""
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(CrmSyncTask.objects.select_for_update(skip_locked=True)
+                     .filter(status=CrmSyncTask.PENDING, next_attempt_at__lte=now)
+                     .select_related('user').order_by('next_attempt_at', 'pk')[:batch_size])
+        CrmSyncTask.objects.filter(pk__in=[task.pk for task in tasks]).update(
+            attempts=F('attempts') + 1, next_attempt_at=now + RUN_LEASE)
+    for task in tasks:
+        task.attempts += 1
+    return tasks
+
+
+def run_task(task):
+    """Make a task's ActiveCampaign calls, returning the result dict"""
+    payload = task.payload
+    if task.kind == CrmSyncTask.CONTACT_SYNC:
+        referred_by = User.objects.filter(pk=payload.get('referred_by_id')).first() if payload.get('referred_by_id') else None
+        return sync_contact(task.user, referral_code=payload.get('referral_code') or None, referred_by=referred_by)
+
+    referred_user = User.objects.filter(pk=payload.get('referred_user_id')).first()
+    if referred_user is None:
+        return {'success': False, 'reason': 'referred_user_deleted'}
+    return notify_referrer_of_signup(task.user, referred_user, referral_code=payload.get('referral_code') or None)
+
+
+def process_task(task):
+    """Run a claimed task and record how it went; returns the status it was left in"""
+    try:
+        result = run_task(task)
+    except Exception as exc:
+        result = {'success': False, 'reason': str(exc)}
+
+    reason = result.get('reason', '')
+    updates = {'result': result, 'updated_at': timezone.now()}
+    if result.get('success') or reason in SKIPPED_REASONS:
+        updates.update(status=CrmSyncTask.DONE, last_error='')
+        logger.info('ActiveCampaign %s for %s: %s', task.get_kind_display().lower(), task.user.email, result)
+    elif task.attempts >= MAX_ATTEMPTS:
+        updates.update(status=CrmSyncTask.DEAD, last_error=reason)
+        logger.error('ActiveCampaign %s for %s dead-lettered after %s attempts: %s',
+                     task.get_kind_display().lower(), task.user.email, task.attempts, reason)
+    else:
+        updates.update(next_attempt_at=timezone.now() + retry_delay(task.attempts), last_error=reason)
+        logger.warning('ActiveCampaign %s for %s failed, trying again at %s: %s',
+                       task.get_kind_display().lower(), task.user.email, updates['next_attempt_at'], reason)
+
+    # Only if nothing was merged in while it ran; otherwise it runs again with the merged update
+    if not CrmSyncTask.objects.filter(pk=task.pk, version=task.version).update(**updates):
+        CrmSyncTask.objects.filter(pk=task.pk).update(next_attempt_at=timezone.now(), attempts=0)
+        return CrmSyncTask.PENDING
+    return updates.get('status', CrmSyncTask.PENDING)
+
+
+def process_queue(batch_size=BATCH_SIZE, max_batches=None):
+    """Run due tasks in batches until none are left; returns how many were run"""
+    count = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        tasks = claim_due(batch_size)
+        if not tasks:
+            break
+        for task in tasks:
+            process_task(task)
+        count += len(tasks)
+        batches += 1
+    return count
+
+
+def next_due():
+    """When the earliest pending task falls due, None if there are none"""
+    return CrmSyncTask.objects.filter(status=CrmSyncTask.PENDING).aggregate(due=Min('next_attempt_at'))['due']
+
+
+# Runs the queue on a background thread once a transaction commits, and when the next retry falls due
+worker = QueueWorker('activecampaign-sync', process_queue, next_due, 'ACTIVECAMPAIGN_SYNC_THREAD')
+wake_sync_worker = worker.wake
+schedule_next_wake = worker.schedule_next_wake
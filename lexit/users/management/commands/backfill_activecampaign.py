@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users.crm_backfill import BATCH_SIZE, WORKERS, backfill_contacts
+
+
+class Command(BaseCommand):
+    help = ('Re-sync every active user to ActiveCampaign, through bulk import where possible. '
+            'An interrupted run carries on where it stopped when started again with the same --run-name')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run-name', default='default',
+                            help='Name the progress is saved under (default "default")')
+        parser.add_argument('--restart', action='store_true', help='Start again from the first user')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f'Users sent and checkpointed at a time (default {BATCH_SIZE}, at most that for bulk import)')
+        parser.add_argument('--workers', type=int, default=WORKERS,
+                            help=f'Threads syncing contacts when not using bulk import (default {WORKERS})')
+        parser.add_argument('--no-bulk', action='store_true',
+                            help='Sync each contact with its tags and list instead of using bulk import')
+
+    def handle(self, *args, **options):
+        if not (getattr(settings, 'ACTIVECAMPAIGN_API_URL', '') and getattr(settings, 'ACTIVECAMPAIGN_API_KEY', '')):
+            raise CommandError('ACTIVECAMPAIGN_API_URL and ACTIVECAMPAIGN_API_KEY must be set')
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be at least 1')
+
+        def progress(run, mode):
+            self.stdout.write(f'{run.processed} users sent ({mode}), {run.failed} failed, up to user {run.last_user_id}')
+
+        run = backfill_contacts(
+            name=options['run_name'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            use_bulk=not options['no_bulk'],
+            restart=options['restart'],
+            progress=progress,
+        )
+        if run.finished_at is None:
+            self.stdout.write(self.style.WARNING(
+                f'{len(run.pending_imports)} bulk imports are still being processed by ActiveCampaign; '
+                f'run this again with --run-name {run.name} to check them'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Backfill finished: {run.processed} users sent, {run.failed} failed'))
+        if run.failed_user_ids:
+            self.stdout.write(f'Failed user ids: {", ".join(map(str, run.failed_user_ids))}')
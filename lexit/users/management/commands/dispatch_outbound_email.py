@@ -0,0 +1,32 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import BATCH_SIZE, dispatch, outbox_metrics
+
+
+class Command(BaseCommand):
+    help = 'Send the emails waiting in the outbox, trying failed ones again with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f'Emails sent per call to the mail API (default {BATCH_SIZE})')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, checking for due emails every --interval seconds')
+        parser.add_argument('--interval', type=float, default=5.0)
+        parser.add_argument('--stats', action='store_true', help='Print the outbox metrics as JSON and exit')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(outbox_metrics(), indent=2))
+            return
+
+        while True:
+            totals = dispatch(batch_size=options['batch_size'])
+            if totals:
+                self.stdout.write(self.style.SUCCESS(
+                    'Outbox: ' + ', '.join(f'{count} {status}' for status, count in sorted(totals.items()))))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
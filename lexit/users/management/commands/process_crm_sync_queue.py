@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.crm_queue import BATCH_SIZE, process_queue
+
+
+class Command(BaseCommand):
+    help = 'Make the queued ActiveCampaign updates, trying failed ones again with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f'Tasks claimed at a time (default {BATCH_SIZE})')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, checking for due updates every --interval seconds')
+        parser.add_argument('--interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            count = process_queue(batch_size=options['batch_size'])
+            if count:
+                self.stdout.write(self.style.SUCCESS(f'Ran {count} ActiveCampaign updates'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.14 on 2026-10-19 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_referrer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='profile_image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the profile picture'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.14 on 2026-10-19 19:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_crm_sync_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrmBackfillRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_user_id', models.PositiveBigIntegerField(default=0, help_text='Users up to this id have been sent')),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('failed_user_ids', models.JSONField(blank=True, default=list, help_text='The most recent users that failed')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'CRM Backfill Run',
+                'verbose_name_plural': 'CRM Backfill Runs',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.14 on 2026-10-19 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_crm_backfill_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crmbackfillrun',
+            name='pending_imports',
+            field=models.JSONField(blank=True, default=list, help_text="Bulk imports ActiveCampaign hasn't finished: batch id and the users in it"),
+        ),
+    ]
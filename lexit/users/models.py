@@ -3,6 +3,9 @@ from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.conf import settings
+from django.utils import timezone
+from lexit.image_derivatives import image_sources
+from lexit.media_urls import file_url, static_image_url
 import secrets
 import string
 
@@ -17,6 +20,14 @@ class UserProfile(models.Model):
         ('avatar_4', 'Elegant'),
         ('avatar_5', 'Creative'),
     ]
+    AVATAR_IMAGES = {
+        'default': 'lexit_image.png',
+        'avatar_1': 'avatar_1.png',
+        'avatar_2': 'avatar_2.png',
+        'avatar_3': 'avatar_3.png',
+        'avatar_4': 'avatar_4.png',
+        'avatar_5': 'avatar_5.png',
+    }
     
     COUNTRY_CHOICES = [
         ('GB', 'United Kingdom'),
@@ -112,6 +123,12 @@ class UserProfile(models.Model):
         null=True,
         help_text='Upload your profile picture'
     )
+    profile_image_derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Resized copies of the profile picture'
+    )
     avatar_choice = models.CharField(
         max_length=20, 
         choices=AVATAR_CHOICES, 
@@ -232,21 +249,17 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Profile"
     
+    @property
+    def profile_image_sources(self):
+        """URLs of the profile picture and its resized copies for srcset, None if there is no picture"""
+        return image_sources(self, 'profile_image')
+
     def get_display_image_url(self):
         """Return the URL for the user's display image (either uploaded image or avatar)"""
+        avatar_url = static_image_url(self.AVATAR_IMAGES.get(self.avatar_choice, 'lexit_image.png'))
         if not self.use_avatar and self.profile_image:
-            return self.profile_image.url
-        else:
-            # Return avatar based on choice
-            avatar_mapping = {
-                'default': '/static/images/lexit_image.png',
-                'avatar_1': '/static/images/avatar_1.png',
-                'avatar_2': '/static/images/avatar_2.png', 
-                'avatar_3': '/static/images/avatar_3.png',
-                'avatar_4': '/static/images/avatar_4.png',
-                'avatar_5': '/static/images/avatar_5.png',
-            }
-            return avatar_mapping.get(self.avatar_choice, '/static/images/lexit_image.png')
+            return file_url(self, 'profile_image', fallback=avatar_url)
+        return avatar_url
     
     def get_country_display_name(self):
         """Return the full country name"""
@@ -447,3 +460,103 @@ class SecurityEvent(models.Model):
     
     def __str__(self):
         return f"{self.get_event_type_display()} - {self.get_severity_display()} ({self.timestamp})"
+
+
+class OutboundEmail(models.Model):
+    """An email in the outbox, sent by the dispatcher in users/outbox.py"""
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (DEAD, 'Dead letter'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    subject = models.CharField(max_length=255, blank=True)
+    recipients = models.TextField(blank=True, help_text="Every To, Cc and Bcc address, comma separated")
+    message = models.JSONField(help_text="The message's fields, with attachments base64 encoded")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="When the dispatcher may next send it")
+    last_error = models.TextField(blank=True)
+    provider_message_id = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+        verbose_name = "Outbound Email"
+        verbose_name_plural = "Outbound Emails"
+
+    def __str__(self):
+        return f"{self.subject} to {self.recipients} ({self.get_status_display()})"
+
+
+class CrmSyncTask(models.Model):
+    """An ActiveCampaign update waiting to be made off the request path, see users/crm_queue.py"""
+    CONTACT_SYNC = 'contact_sync'
+    REFERRER_NOTIFICATION = 'referrer_notification'
+    KIND_CHOICES = [
+        (CONTACT_SYNC, 'Contact sync'),
+        (REFERRER_NOTIFICATION, 'Referrer notification'),
+    ]
+    PENDING = 'pending'
+    DONE = 'done'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+        (DEAD, 'Dead letter'),
+    ]
+
+    kind = models.CharField(max_length=25, choices=KIND_CHOICES)
+    key = models.CharField(max_length=100, help_text="Updates with the same key are merged while pending")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='crm_sync_tasks',
+                             help_text="The user whose contact is updated")
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    version = models.PositiveIntegerField(default=0, help_text="Goes up each time another update is merged in")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+        constraints = [
+            models.UniqueConstraint(fields=['key'], condition=models.Q(status='pending'),
+                                    name='one_pending_crm_sync_task_per_key'),
+        ]
+        verbose_name = "CRM Sync Task"
+        verbose_name_plural = "CRM Sync Tasks"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.user} ({self.get_status_display()})"
+
+
+class CrmBackfillRun(models.Model):
+    """How far an ActiveCampaign backfill has got, so an interrupted one carries on from there, see users/crm_backfill.py"""
+    name = models.CharField(max_length=50, unique=True)
+    last_user_id = models.PositiveBigIntegerField(default=0, help_text="Users up to this id have been sent")
+    processed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    failed_user_ids = models.JSONField(default=list, blank=True, help_text="The most recent users that failed")
+    pending_imports = models.JSONField(default=list, blank=True,
+                                       help_text="Bulk imports ActiveCampaign hasn't finished: batch id and the users in it")
+    started_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = "CRM Backfill Run"
+        verbose_name_plural = "CRM Backfill Runs"
+
+    def __str__(self):
+        state = 'finished' if self.finished_at else f'up to user {self.last_user_id}'
+        return f"{self.name}: {self.processed} sent, {state}"
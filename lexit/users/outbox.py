@@ -0,0 +1,255 @@
+"""
+Outbox for transactional email.
+
+EMAIL_BACKEND is OutboxEmailBackend, so send_mail, EmailMessage.send() and
+Django's password reset emails store the message as an OutboundEmail row
+instead of calling the mail API. The row is written in the caller's
+transaction, so an email about something that is rolled back never goes
+out, and the request only waits for an insert.
+
+The dispatcher sends due rows in batches through OUTBOUND_EMAIL_BACKEND
+(Postmark). Once the transaction commits, a background thread drains the
+outbox, and sets a timer to drain it again when the next retry or lease falls
+due; set OUTBOUND_EMAIL_DISPATCH_THREAD = False when a worker runs the
+dispatch_outbound_email command instead. A failed email is tried again with
+exponential backoff, and after MAX_ATTEMPTS, or when Postmark says the
+address can't receive it, it is dead-lettered for an admin to look at.
+
+outbox_metrics() reports the backlog and what this process has sent.
+"""
+import base64
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from lexit.background import QueueWorker, backoff_delay
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 8
+RETRY_BASE_DELAY = timedelta(minutes=1)
+RETRY_MAX_DELAY = timedelta(hours=6)
+# A claimed email is tried again after this if its dispatcher dies before recording the result
+SEND_LEASE = timedelta(minutes=10)
+# Postmark error codes that sending again won't fix: invalid address, inactive recipient
+PERMANENT_ERROR_CODES = {300, 406}
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(event, amount=1):
+    with _stats_lock:
+        _stats[event] += amount
+
+
+def serialize_message(message):
+    """JSON-ready fields of an EmailMessage, enough to build it again"""
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, MIMEBase):
+            filename, content, mimetype = (attachment.get_filename(), attachment.get_payload(decode=True),
+                                           attachment.get_content_type())
+        else:
+            filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        attachments.append([filename, base64.b64encode(content).decode('ascii'), mimetype])
+
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': list(message.to),
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': dict(message.extra_headers),
+        'content_subtype': message.content_subtype,
+        'alternatives': [[alternative[0], alternative[1]] for alternative in getattr(message, 'alternatives', [])],
+        'attachments': attachments,
+    }
+
+
+def build_message(data):
+    """The EmailMessage stored by serialize_message"""
+    message = EmailMultiAlternatives(
+        subject=data['subject'],
+        body=data['body'],
+        from_email=data['from_email'],
+        to=data['to'],
+        cc=data['cc'],
+        bcc=data['bcc'],
+        reply_to=data['reply_to'],
+        headers=data['headers'],
+        alternatives=[tuple(alternative) for alternative in data['alternatives']],
+    )
+    message.content_subtype = data['content_subtype']
+    for filename, content, mimetype in data['attachments']:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Stores messages in the outbox for the dispatcher to send"""
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        try:
+            emails = [
+                OutboundEmail(
+                    subject=message.subject[:255],
+                    recipients=', '.join(message.recipients()),
+                    message=serialize_message(message),
+                )
+                for message in email_messages
+            ]
+            OutboundEmail.objects.bulk_create(emails)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            logger.exception('Failed to store %s emails in the outbox', len(email_messages))
+            return 0
+        _count('queued', len(emails))
+        transaction.on_commit(wake_dispatcher)
+        return len(emails)
+
+
+def retry_delay(attempts):
+    """How long to wait before another try, after the given number of failed ones"""
+    return backoff_delay(attempts, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+
+
+def claim_due(batch_size=BATCH_SIZE):
+    """Take the next due emails, so no other dispatcher sends them while these are being sent"""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(OutboundEmail.objects.select_for_update(skip_locked=True)
+                      .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+                      .order_by('next_attempt_at', 'pk')[:batch_size])
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            attempts=F('attempts') + 1, next_attempt_at=now + SEND_LEASE)
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def _failed(email, error, permanent=False):
+    email.last_error = str(error)[:2000]
+    if permanent or email.attempts >= MAX_ATTEMPTS:
+        email.status = OutboundEmail.DEAD
+        _count('dead_lettered')
+        logger.error('Dead-lettered email %s to %s after %s attempts: %s',
+                     email.pk, email.recipients, email.attempts, email.last_error)
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        _count('retried')
+        logger.warning('Email %s to %s failed, trying again at %s: %s',
+                       email.pk, email.recipients, email.next_attempt_at, email.last_error)
+
+
+def send_batch(emails, connection):
+    """Send claimed emails through an open delivery connection and record what happened to each"""
+    messages = []
+    for email in emails:
+        try:
+            messages.append((email, build_message(email.message)))
+        except Exception as exc:
+            _failed(email, f'Could not build the message: {exc}', permanent=True)
+
+    try:
+        sent_count = connection.send_messages([message for _, message in messages])
+        error = None
+    except Exception as exc:
+        sent_count, error = 0, exc
+
+    for email, message in messages:
+        # The Postmark backend reports on every message; others send them all or raise
+        result = getattr(message, 'postmark_result', None)
+        if error is not None:
+            _failed(email, error)
+        elif result is not None and result.get('ErrorCode') != 0:
+            # Only ErrorCode 0 means Postmark accepted it; anything else, or none, is tried again
+            _failed(email, f"{result.get('ErrorCode')}: {result.get('Message', '')}",
+                    permanent=result.get('ErrorCode') in PERMANENT_ERROR_CODES)
+        elif result is None and sent_count != len(messages):
+            _failed(email, f'The mail backend sent {sent_count} of {len(messages)} emails')
+        else:
+            email.status = OutboundEmail.SENT
+            email.sent_at = timezone.now()
+            email.provider_message_id = str((result or {}).get('MessageID', ''))[:100]
+            email.last_error = ''
+            _count('sent')
+
+    OutboundEmail.objects.bulk_update(
+        emails, ['status', 'sent_at', 'provider_message_id', 'last_error', 'next_attempt_at'])
+    _count('batches')
+    return Counter(email.status for email in emails)
+
+
+def dispatch(batch_size=BATCH_SIZE, max_batches=None):
+    """Send due emails in batches until none are left; returns how many ended up in each status"""
+    totals = Counter()
+    batches = 0
+    connection = None
+    try:
+        while max_batches is None or batches < max_batches:
+            emails = claim_due(batch_size)
+            if not emails:
+                break
+            if connection is None:
+                connection = get_connection(settings.OUTBOUND_EMAIL_BACKEND)
+                connection.open()
+            totals.update(send_batch(emails, connection))
+            batches += 1
+    finally:
+        if connection is not None:
+            connection.close()
+    return totals
+
+
+def next_due():
+    """When the earliest pending email falls due, None if there are none"""
+    return OutboundEmail.objects.filter(status=OutboundEmail.PENDING).aggregate(due=Min('next_attempt_at'))['due']
+
+
+# Drains the outbox on a background thread once a transaction commits, and when the next retry falls due
+worker = QueueWorker('email-outbox', dispatch, next_due, 'OUTBOUND_EMAIL_DISPATCH_THREAD')
+wake_dispatcher = worker.wake
+schedule_next_wake = worker.schedule_next_wake
+
+
+def outbox_metrics():
+    """The outbox backlog, and what this process has queued and sent since it started"""
+    now = timezone.now()
+    by_status = dict(OutboundEmail.objects.values_list('status').annotate(count=Count('pk')).order_by())
+    pending = OutboundEmail.objects.filter(status=OutboundEmail.PENDING)
+    oldest = pending.aggregate(oldest=Min('created_at'))['oldest']
+
+    with _stats_lock:
+        process = dict.fromkeys(('queued', 'sent', 'retried', 'dead_lettered', 'batches'), 0)
+        process.update(_stats)
+    return {
+        **{status: by_status.get(status, 0) for status, _ in OutboundEmail.STATUS_CHOICES},
+        'due': pending.filter(next_attempt_at__lte=now).count(),
+        'oldest_pending_seconds': round((now - oldest).total_seconds()) if oldest else None,
+        'process': process,
+    }
+
+
+def reset_outbox_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -1,20 +1,33 @@
+from datetime import timedelta
 from types import SimpleNamespace
 from unittest.mock import patch
 
 from django.contrib.auth.models import User
-from django.db import IntegrityError
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, send_mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
 from django.test import SimpleTestCase, override_settings
 
+from lexit import background, http_client
+from lexit.postmark_backend import PostmarkBackend
 from lexit.settings import _build_csrf_trusted_origins
 
-from . import activecampaign
+from . import activecampaign, crm_backfill, crm_queue, outbox
 from .forms import SimpleUserCreationForm
-from .models import Referrer
+from .models import CrmBackfillRun, CrmSyncTask, OutboundEmail, Referrer
 from .views import _find_referrer_profile
 
 
 class ActiveCampaignReferralCodeTagTests(SimpleTestCase):
+	def setUp(self):
+		# Tag and field IDs are cached between lookups
+		cache.clear()
+
 	@override_settings(ACTIVECAMPAIGN_REFERRAL_CODE_TAG_PREFIX='ref=')
 	def test_build_referral_code_tag_name_normalizes_code(self):
 		tag_name = activecampaign.build_referral_code_tag_name(' my-code_123 ')
@@ -362,3 +375,351 @@ class CsrfTrustedOriginsTests(SimpleTestCase):
 		self.assertIn('https://lexit-production.up.railway.app', origins)
 		self.assertIn('http://localhost', origins)
 		self.assertIn('http://127.0.0.1', origins)
+
+
+class FlakyEmailBackend(BaseEmailBackend):
+	"""Delivery backend for the outbox tests, answering like Postmark with results"""
+	results = []
+
+	def send_messages(self, email_messages):
+		result = FlakyEmailBackend.results.pop(0)
+		if isinstance(result, Exception):
+			raise result
+		for message, error_code in zip(email_messages, result):
+			message.postmark_result = {'ErrorCode': error_code, 'Message': 'Inactive recipient' if error_code else 'OK',
+				'MessageID': f'id-{message.to[0]}'}
+			if not error_code:
+				mail.outbox.append(message)
+		return result.count(0)
+
+
+@override_settings(
+	EMAIL_BACKEND='users.outbox.OutboxEmailBackend',
+	OUTBOUND_EMAIL_BACKEND='users.tests.FlakyEmailBackend',
+	OUTBOUND_EMAIL_DISPATCH_THREAD=False,
+)
+class OutboundEmailTests(TestCase):
+	def setUp(self):
+		outbox.reset_outbox_stats()
+
+	def test_email_is_stored_with_the_transaction_and_sent_later(self):
+		try:
+			with transaction.atomic():
+				send_mail('Rolled back', 'Body', 'hello@lexit.co.uk', ['gone@example.com'])
+				raise RuntimeError
+		except RuntimeError:
+			pass
+		self.assertFalse(OutboundEmail.objects.exists())
+
+		message = EmailMultiAlternatives('Report', 'Plain', 'hello@lexit.co.uk', ['investor@example.com'])
+		message.attach_alternative('<p>Report</p>', 'text/html')
+		message.attach('report.pdf', b'%PDF-1.4 bytes', 'application/pdf')
+		self.assertEqual(message.send(), 1)
+		self.assertEqual(mail.outbox, [])
+
+		FlakyEmailBackend.results = [[0]]
+		self.assertEqual(outbox.dispatch(), {OutboundEmail.SENT: 1})
+		sent, = mail.outbox
+		self.assertEqual(sent.alternatives[0][0], '<p>Report</p>')
+		self.assertEqual(sent.attachments[0][:2], ('report.pdf', b'%PDF-1.4 bytes'))
+
+		email = OutboundEmail.objects.get()
+		self.assertEqual((email.status, email.attempts), (OutboundEmail.SENT, 1))
+		self.assertEqual(email.provider_message_id, 'id-investor@example.com')
+
+	def test_failures_back_off_then_dead_letter(self):
+		send_mail('Digest', 'Body', 'hello@lexit.co.uk', ['a@example.com'])
+		send_mail('Digest', 'Body', 'hello@lexit.co.uk', ['b@example.com'])
+
+		FlakyEmailBackend.results = [[0, 406]]
+		self.assertEqual(outbox.dispatch(), {OutboundEmail.SENT: 1, OutboundEmail.DEAD: 1})
+		self.assertEqual(OutboundEmail.objects.get(recipients='b@example.com').status, OutboundEmail.DEAD)
+
+		send_mail('Digest', 'Body', 'hello@lexit.co.uk', ['c@example.com'])
+		FlakyEmailBackend.results = [OSError('timed out')]
+		outbox.dispatch()
+		email = OutboundEmail.objects.get(recipients='c@example.com')
+		self.assertEqual((email.status, email.last_error), (OutboundEmail.PENDING, 'timed out'))
+		self.assertGreater(email.next_attempt_at, email.created_at)
+		# Not due yet, so nothing is sent
+		self.assertEqual(outbox.dispatch(), {})
+
+		OutboundEmail.objects.filter(pk=email.pk).update(attempts=outbox.MAX_ATTEMPTS - 1, next_attempt_at=email.created_at)
+		FlakyEmailBackend.results = [OSError('timed out')]
+		self.assertEqual(outbox.dispatch(), {OutboundEmail.DEAD: 1})
+
+		metrics = outbox.outbox_metrics()
+		self.assertEqual((metrics['sent'], metrics['dead'], metrics['pending']), (1, 2, 0))
+		self.assertEqual(metrics['process']['queued'], 3)
+		self.assertEqual(metrics['process']['retried'], 1)
+
+	@override_settings(OUTBOUND_EMAIL_BACKEND='lexit.postmark_backend.PostmarkBackend', POSTMARK_SERVER_TOKEN='token')
+	def test_email_is_kept_for_another_try_when_postmark_cannot_be_reached(self):
+		send_mail('Digest', 'Body', 'hello@lexit.co.uk', ['outage@example.com'])
+		with patch.object(PostmarkBackend, '_post', side_effect=ConnectionRefusedError('refused')), \
+				self.assertLogs('lexit.postmark_backend', 'ERROR'):
+			self.assertEqual(outbox.dispatch(), {OutboundEmail.PENDING: 1})
+		email = OutboundEmail.objects.get()
+		self.assertEqual((email.status, email.last_error), (OutboundEmail.PENDING, '-1: refused'))
+		self.assertIsNone(email.sent_at)
+
+	@override_settings(OUTBOUND_EMAIL_DISPATCH_THREAD=True)
+	def test_a_timer_wakes_the_dispatcher_when_the_next_retry_is_due(self):
+		self.assertIsNone(outbox.schedule_next_wake())
+		with patch.object(outbox, 'wake_dispatcher'):
+			send_mail('Digest', 'Body', 'hello@lexit.co.uk', ['later@example.com'])
+		due = timezone.now() + timedelta(minutes=5)
+		OutboundEmail.objects.update(next_attempt_at=due)
+
+		with patch.object(background.threading, 'Timer') as timer:
+			self.addCleanup(outbox.worker.cancel_timer)
+			self.assertEqual(outbox.schedule_next_wake(), due)
+			# Already set for then, so not set again
+			self.assertEqual(outbox.schedule_next_wake(), due)
+		timer.assert_called_once()
+		delay, callback = timer.call_args.args
+		self.assertAlmostEqual(delay, 300, delta=2)
+		self.assertEqual(callback, outbox.worker.wake)
+		timer.return_value.start.assert_called_once()
+
+	def test_retry_delay_grows_and_is_capped(self):
+		with patch.object(background.random, 'uniform', return_value=1):
+			self.assertEqual(outbox.retry_delay(1), outbox.RETRY_BASE_DELAY)
+			self.assertEqual(outbox.retry_delay(3), outbox.RETRY_BASE_DELAY * 4)
+			self.assertEqual(outbox.retry_delay(20), outbox.RETRY_MAX_DELAY)
+
+
+@override_settings(ACTIVECAMPAIGN_SYNC_THREAD=False)
+class CrmSyncQueueTests(TestCase):
+	def setUp(self):
+		self.referrer = Referrer.objects.create(first_name='Queue', email='queue.referrer@example.com')
+
+	def register(self):
+		return self.client.post(reverse('users:register'), {
+			'username': 'queued-user',
+			'first_name': 'Queued',
+			'last_name': 'User',
+			'email': 'queued@example.com',
+			'password1': 'StrongPass123!',
+			'password2': 'StrongPass123!',
+			'agree_terms': True,
+			'agree_gdpr': True,
+			'referral_code': self.referrer.referral_code,
+		})
+
+	def test_signup_queues_updates_without_calling_activecampaign(self):
+		with patch.object(crm_queue, 'sync_contact') as sync, patch.object(crm_queue, 'notify_referrer_of_signup') as notify:
+			self.assertEqual(self.register().status_code, 302)
+			sync.assert_not_called()
+			notify.assert_not_called()
+
+			user = User.objects.get(username='queued-user')
+			self.assertEqual(
+				set(CrmSyncTask.objects.values_list('kind', 'user', 'status')),
+				{
+					(CrmSyncTask.CONTACT_SYNC, user.pk, CrmSyncTask.PENDING),
+					(CrmSyncTask.REFERRER_NOTIFICATION, self.referrer.user_id, CrmSyncTask.PENDING),
+				},
+			)
+
+			sync.return_value = {'success': True, 'contact_id': '9'}
+			notify.return_value = {'success': True, 'contact_id': '8'}
+			self.assertEqual(crm_queue.process_queue(), 2)
+
+		self.assertEqual(sync.call_args.kwargs['referred_by'], self.referrer.user)
+		self.assertEqual(sync.call_args.kwargs['referral_code'], self.referrer.referral_code)
+		self.assertEqual(notify.call_args.args[:2], (self.referrer.user, user))
+		self.assertFalse(CrmSyncTask.objects.exclude(status=CrmSyncTask.DONE).exists())
+
+	def test_repeated_updates_for_a_contact_are_merged(self):
+		user = User.objects.create_user(username='merge-me', email='merge@example.com', password='StrongPass123!')
+		crm_queue.enqueue_contact_sync(user, referral_code='ABC123')
+		crm_queue.enqueue_contact_sync(user)
+		task = CrmSyncTask.objects.get()
+		self.assertEqual((task.version, task.payload['referral_code']), (1, 'ABC123'))
+
+		# Merged in while the task is running, so it runs again
+		def sync_and_update(*args, **kwargs):
+			crm_queue.enqueue_contact_sync(user, referral_code='XYZ789')
+			return {'success': True}
+
+		with patch.object(crm_queue, 'sync_contact', side_effect=sync_and_update):
+			crm_queue.process_task(crm_queue.claim_due()[0])
+		task.refresh_from_db()
+		self.assertEqual((task.status, task.payload['referral_code']), (CrmSyncTask.PENDING, 'XYZ789'))
+
+		with patch.object(crm_queue, 'sync_contact', return_value={'success': True}) as sync:
+			crm_queue.process_queue()
+		self.assertEqual(sync.call_args.kwargs['referral_code'], 'XYZ789')
+		self.assertEqual(CrmSyncTask.objects.get().status, CrmSyncTask.DONE)
+
+	def test_failures_back_off_then_dead_letter(self):
+		user = User.objects.create_user(username='flaky', email='flaky@example.com', password='StrongPass123!')
+		crm_queue.enqueue_contact_sync(user)
+		with patch.object(crm_queue, 'sync_contact', return_value={'success': False, 'reason': 'HTTP 429: slow down'}):
+			crm_queue.process_queue()
+			task = CrmSyncTask.objects.get()
+			self.assertEqual((task.status, task.last_error), (CrmSyncTask.PENDING, 'HTTP 429: slow down'))
+			self.assertEqual(crm_queue.process_queue(), 0)
+
+			CrmSyncTask.objects.update(attempts=crm_queue.MAX_ATTEMPTS - 1, next_attempt_at=task.created_at)
+			crm_queue.process_queue()
+		self.assertEqual(CrmSyncTask.objects.get().status, CrmSyncTask.DEAD)
+
+
+	@override_settings(ACTIVECAMPAIGN_SYNC_THREAD=True)
+	def test_a_timer_wakes_the_worker_when_a_retry_is_due(self):
+		user = User.objects.create_user(username='retry-later', email='later@example.com', password='StrongPass123!')
+		with patch.object(crm_queue, 'wake_sync_worker'):
+			crm_queue.enqueue_contact_sync(user)
+		with patch.object(crm_queue, 'sync_contact', return_value={'success': False, 'reason': 'HTTP 503'}):
+			crm_queue.process_queue()
+		task = CrmSyncTask.objects.get()
+
+		with patch.object(background.threading, 'Timer') as timer:
+			self.addCleanup(crm_queue.worker.cancel_timer)
+			self.assertEqual(crm_queue.schedule_next_wake(), task.next_attempt_at)
+		delay, callback = timer.call_args.args
+		self.assertAlmostEqual(delay, (task.next_attempt_at - timezone.now()).total_seconds(), delta=2)
+		self.assertEqual(callback, crm_queue.worker.wake)
+
+
+@override_settings(ACTIVECAMPAIGN_API_URL='https://example.api-us1.com', ACTIVECAMPAIGN_API_KEY='test-key')
+class ActiveCampaignLookupCacheTests(SimpleTestCase):
+	def setUp(self):
+		cache.clear()
+
+	def test_tag_and_field_ids_are_looked_up_once(self):
+		def fake_get(url, api_key):
+			if '/tags?search=' in url:
+				return {'tags': [{'id': '555', 'tag': 'ref=ABC123'}]}
+			return {'fields': [{'id': '301', 'title': 'Latest Referred User ID'}]}
+
+		with patch.object(activecampaign, '_get_json', side_effect=fake_get) as get:
+			for _ in range(3):
+				self.assertEqual(activecampaign._ensure_referral_code_tag('https://example.api-us1.com', 'test-key', 'ABC123'), '555')
+				field = activecampaign._find_contact_field('https://example.api-us1.com', 'test-key', 'Latest Referred User ID')
+				self.assertEqual(field['id'], '301')
+		self.assertEqual(get.call_count, 2)
+
+
+@override_settings(
+	ACTIVECAMPAIGN_API_URL='https://example.api-us1.com',
+	ACTIVECAMPAIGN_API_KEY='test-key',
+	ACTIVECAMPAIGN_DEFAULT_LIST_ID='3',
+	ACTIVECAMPAIGN_SIGNUP_TAG_ID='101',
+	ACTIVECAMPAIGN_REFERRAL_TAG_ID='202',
+	ACTIVECAMPAIGN_RATE_LIMIT=0,
+)
+class ActiveCampaignBackfillTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.referrer = Referrer.objects.create(first_name='Backfill', email='backfill.referrer@example.com')
+		self.users = [
+			User.objects.create_user(username=f'backfill{i}', email=f'backfill{i}@example.com', password='StrongPass123!')
+			for i in range(5)
+		]
+		profile = self.users[0].profile
+		profile.referral_code_used = 'ABC123'
+		profile.referred_by = self.referrer.user
+		profile.save()
+		User.objects.create_user(username='no-email', email='', password='StrongPass123!')
+
+	def fake_get(self, url, api_key, imports=None):
+		if '/import/info?batchId=' in url:
+			return (imports or {}).get(url.rsplit('=', 1)[1], {'status': 'completed', 'success': [], 'failure': []})
+		return {'tag': {'id': url.rsplit('/', 1)[1], 'tag': {'101': 'signed-up', '202': 'referred'}[url.rsplit('/', 1)[1]]}}
+
+	def fake_post(self):
+		batch_ids = (f'b{number}' for number in range(1, 100))
+		return lambda url, payload, api_key: {'success': 1, 'batchId': next(batch_ids)}
+
+	def test_bulk_import_sends_batches_with_tag_names(self):
+		with patch.object(activecampaign, '_post_json', side_effect=self.fake_post()) as post, \
+				patch.object(activecampaign, '_get_json', side_effect=self.fake_get) as get:
+			run = crm_backfill.backfill_contacts(batch_size=2)
+
+		urls = {call.args[0] for call in post.call_args_list}
+		self.assertEqual(urls, {'https://example.api-us1.com/api/3/import/bulk_import'})
+		contacts = [contact for call in post.call_args_list for contact in call.args[1]['contacts']]
+		self.assertEqual([len(call.args[1]['contacts']) for call in post.call_args_list], [2, 2, 2])
+		by_email = {contact['email']: contact for contact in contacts}
+		self.assertNotIn('', by_email)
+		self.assertEqual(by_email['backfill0@example.com']['tags'], ['signed-up', 'referred', 'ref=ABC123'])
+		self.assertEqual(by_email['backfill1@example.com']['tags'], ['signed-up'])
+		self.assertEqual(by_email['backfill1@example.com']['subscribe'], [{'listid': '3'}])
+		# Tag names are looked up once each, and each import is checked
+		tag_urls = [call.args[0] for call in get.call_args_list if '/tags/' in call.args[0]]
+		self.assertEqual(len(tag_urls), 2)
+		self.assertEqual(get.call_count, 5)
+		self.assertEqual((run.processed, run.failed, run.pending_imports), (6, 0, []))
+		self.assertIsNotNone(run.finished_at)
+
+	def test_contacts_rejected_by_a_bulk_import_are_failed(self):
+		# Only the batch with that contact in it counts the failure
+		imports = {f'b{number}': {'status': 'completed', 'failure': ['Backfill3@example.com']} for number in range(1, 4)}
+		with patch.object(activecampaign, '_post_json', side_effect=self.fake_post()), \
+				patch.object(activecampaign, '_get_json', side_effect=lambda url, key: self.fake_get(url, key, imports)):
+			run = crm_backfill.backfill_contacts(batch_size=2)
+		self.assertEqual((run.processed, run.failed, run.failed_user_ids), (6, 1, [self.users[3].pk]))
+		self.assertIsNotNone(run.finished_at)
+
+	def test_run_is_only_finished_once_its_imports_complete(self):
+		imports = {'b1': {'status': 'in progress'}}
+		get = lambda url, key: self.fake_get(url, key, imports)
+		with patch.object(activecampaign, '_post_json', side_effect=self.fake_post()), \
+				patch.object(activecampaign, '_get_json', side_effect=get):
+			run = crm_backfill.backfill_contacts(name='slow', batch_size=2, import_wait=0)
+			self.assertIsNone(run.finished_at)
+			self.assertEqual([entry['batch_id'] for entry in run.pending_imports], ['b1'])
+
+			imports['b1'] = {'status': 'completed', 'success': [], 'failure': ['backfill0@example.com']}
+			with patch.object(activecampaign, 'bulk_import_contacts') as bulk_import:
+				run = crm_backfill.backfill_contacts(name='slow', batch_size=2, import_wait=0)
+		bulk_import.assert_not_called()
+		self.assertIsNotNone(run.finished_at)
+		self.assertEqual((run.processed, run.failed, run.failed_user_ids), (6, 1, [self.users[0].pk]))
+		self.assertEqual(run.pending_imports, [])
+
+	def test_falls_back_to_syncing_each_contact_when_bulk_import_fails(self):
+		def sync(user, **kwargs):
+			self.assertFalse(kwargs['add_note'])
+			if user == self.users[2]:
+				return {'success': False, 'reason': 'HTTP 500'}
+			return {'success': True}
+
+		with patch.object(activecampaign, '_get_json', side_effect=self.fake_get), \
+				patch.object(activecampaign, '_post_json', side_effect=RuntimeError('HTTP 403: forbidden')) as post, \
+				patch.object(crm_backfill, 'sync_contact', side_effect=sync) as sync_contact:
+			run = crm_backfill.backfill_contacts(batch_size=2, workers=3)
+
+		post.assert_called_once()
+		self.assertEqual(sync_contact.call_count, 6)
+		self.assertEqual((run.processed, run.failed, run.failed_user_ids), (6, 1, [self.users[2].pk]))
+
+	def test_an_interrupted_run_carries_on_from_its_checkpoint(self):
+		with patch.object(crm_backfill, 'sync_contact', return_value={'success': True}) as sync:
+			run = crm_backfill.backfill_contacts(name='resume', batch_size=2, use_bulk=False, max_batches=1)
+			self.assertIsNone(run.finished_at)
+			self.assertEqual(CrmBackfillRun.objects.get(name='resume').last_user_id, self.users[0].pk)
+
+			run = crm_backfill.backfill_contacts(name='resume', batch_size=2, use_bulk=False)
+		synced = [call.args[0].pk for call in sync.call_args_list]
+		self.assertEqual(sorted(synced), sorted(set(synced)))
+		self.assertEqual(len(synced), 6)
+		self.assertEqual(run.processed, 6)
+		self.assertIsNotNone(run.finished_at)
+
+	def test_requests_go_through_the_shared_client(self):
+		responses = [
+			http_client.Response(200, {}, b'{"tag": {"tag": "signed-up"}}'),
+			http_client.Response(422, {}, b'{"errors": ["duplicate"]}'),
+		]
+		with patch.object(activecampaign.http_client, 'request', side_effect=responses) as request:
+			self.assertEqual(activecampaign._get_json('https://example.api-us1.com/api/3/tags/101', 'test-key'),
+							 {'tag': {'tag': 'signed-up'}})
+			with self.assertRaisesMessage(RuntimeError, 'HTTP 422'):
+				activecampaign._post_json('https://example.api-us1.com/api/3/tags', {'tag': {}}, 'test-key')
+		self.assertEqual(request.call_args_list[0].args, ('GET', 'https://example.api-us1.com/api/3/tags/101'))
+		self.assertEqual(request.call_args_list[1].kwargs['json'], {'tag': {}})
+		self.assertEqual(request.call_args_list[1].kwargs['headers']['Api-Token'], 'test-key')
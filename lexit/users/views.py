@@ -15,7 +15,8 @@ from honeypot.decorators import check_honeypot
 from .security_utils import check_honeypot_with_logging
 from .forms import SimpleUserCreationForm, UserProfileForm, ExtendedUserProfileForm
 from .models import UserProfile
-from .activecampaign import sync_contact, notify_referrer_of_signup, build_referred_user_identifier
+from .activecampaign import build_referred_user_identifier
+from .crm_queue import enqueue_contact_sync, enqueue_referrer_notification
 import datetime
 import logging
 
@@ -179,24 +180,12 @@ def register_view(request):
                             referrer_email_result.get('referred_identifier'),
                         )
 
-                    ac_referrer_notification_result = notify_referrer_of_signup(
+                    # Made in the background, so signup doesn't wait on ActiveCampaign
+                    enqueue_referrer_notification(
                         referrer_user=referrer_user,
                         referred_user=user,
                         referral_code=referral_code,
                     )
-                    if ac_referrer_notification_result.get('success'):
-                        logger.info(
-                            "ActiveCampaign referrer notification recorded: referrer=%s contact_id=%s referred_identifier=%s",
-                            referrer_user.email,
-                            ac_referrer_notification_result.get('contact_id'),
-                            ac_referrer_notification_result.get('referred_identifier'),
-                        )
-                    else:
-                        logger.warning(
-                            "ActiveCampaign referrer notification failed: referrer=%s reason=%s",
-                            referrer_user.email,
-                            ac_referrer_notification_result.get('reason'),
-                        )
                 else:
                     profile = user.profile
                     profile.referral_code_used = referral_code
@@ -212,25 +201,12 @@ def register_view(request):
                     user.email,
                 )
 
-            # Sync new signup to ActiveCampaign (non-blocking)
-            ac_result = sync_contact(
+            # Sync new signup to ActiveCampaign in the background
+            enqueue_contact_sync(
                 user,
                 referral_code=referral_code,
                 referred_by=referrer_user,
             )
-            if ac_result.get('success'):
-                logger.info(
-                    "ActiveCampaign sync success for %s (contact_id=%s, tags=%s)",
-                    user.email,
-                    ac_result.get('contact_id'),
-                    ac_result.get('applied_tags') or [],
-                )
-            else:
-                logger.warning(
-                    "ActiveCampaign sync result for %s: %s",
-                    user.email,
-                    ac_result.get('reason'),
-                )
             
             # Send welcome email
             try: